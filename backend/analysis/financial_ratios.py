@@ -1,26 +1,8 @@
 from storage.db import SessionLocal
-from storage.models import FinancialSnapshot
-import re
-from typing import Any, Dict, Optional
-
-
-def _to_float(x: Any) -> Optional[float]:
-    try:
-        if x is None:
-            return None
-        # Allow strings like "1,234" or "1 234"
-        if isinstance(x, str):
-            x = x.replace(",", "").replace(" ", "")
-        return float(x)
-    except Exception:
-        return None
-
-
-def _pick(d: Dict[str, Any], *keys: str) -> Optional[float]:
-    for k in keys:
-        if k in d and d[k] is not None:
-            return _to_float(d[k])
-    return None
+from storage.facts import load_facts
+from storage.metric_values import load_metric_values
+from storage.periods import period_key
+from typing import Optional
 
 
 def _safe_div(a: Optional[float], b: Optional[float]) -> Optional[float]:
@@ -31,18 +13,9 @@ def _safe_div(a: Optional[float], b: Optional[float]) -> Optional[float]:
     return a / b
 
 
-_period_rx = re.compile(r"(?P<y>\d{4})(?:[-/ ]?Q(?P<q>[1-4]))?")
-
-
-def _period_key(p: str):
-    """Sort key for periods like '2023', '2023-Q4', '2023/ Q1'. Unknowns go last."""
-    s = str(p)
-    m = _period_rx.search(s)
-    if not m:
-        return (float("inf"), float("inf"))
-    y = int(m.group("y"))
-    q = int(m.group("q") or 0)
-    return (y, q)
+_RATIO_ITEMS = ("Revenue", "OperatingIncome", "NetIncome", "GrossProfit", "Assets", "Equity")
+_RATIOS = ("OperatingMargin", "NetMargin", "ROE", "ROA", "EquityRatio")
+_OPTIONAL = ("GrossMargin", "RevenueGrowth")
 
 
 def compute_basic_ratios(company_id: str):
@@ -53,40 +26,32 @@ def compute_basic_ratios(company_id: str):
     """
     db = SessionLocal()
     try:
-        snaps = (
-            db.query(FinancialSnapshot)
-            .filter(FinancialSnapshot.company_id == company_id)
-            .all()
-        )
-        # Sort by parsed period
-        snaps = sorted(snaps, key=lambda x: _period_key(x.period))
+        # 取り込み時に計算済みの metric_value があればそれを使う
+        stored = load_metric_values(db, [company_id], _RATIOS + _OPTIONAL)[company_id]
+        if stored:
+            periods = {p for vals in stored.values() for p in vals}
+            return [
+                {
+                    "period": p,
+                    **{m: stored.get(m, {}).get(p) for m in _RATIOS},
+                    **{m: stored[m][p] for m in _OPTIONAL if p in stored.get(m, {})},
+                }
+                for p in sorted(periods, key=period_key)  # 指標ごとの系列（DB で整列済み）を突き合わせる
+            ]
+
+        by_period = load_facts(db, [company_id], _RATIO_ITEMS)[company_id]
 
         series = []
         prev_revenue: Optional[float] = None
-        for s in snaps:
-            pl, bs = s.pl or {}, s.bs or {}
-
-            revenue = _pick(pl, "Revenue", "NetSales", "Sales")
-            op = _pick(pl, "OperatingIncome", "OperatingProfit", "OpIncome", "EBIT")
-            net = _pick(
-                pl,
-                "NetIncome",
-                "Profit",
-                "NetProfit",
-                "ProfitAttributableToOwners",
-                "PAT",
-            )
-            gross = _pick(pl, "GrossProfit")
-
-            assets = _pick(bs, "Assets", "TotalAssets")
-            equity = _pick(
-                bs,
-                "Equity",
-                "TotalEquity",
-                "ShareholdersEquity",
-                "EquityAttributableToOwners",
-                "NetAssets",
-            )
+        # Periods come in series order from the database
+        for period in by_period:
+            items = by_period[period]
+            revenue = items.get("Revenue")
+            op = items.get("OperatingIncome")
+            net = items.get("NetIncome")
+            gross = items.get("GrossProfit")
+            assets = items.get("Assets")
+            equity = items.get("Equity")
 
             operating_margin = _safe_div(op, revenue)  # decimal
             net_margin = _safe_div(net, revenue)  # decimal
@@ -102,7 +67,7 @@ def compute_basic_ratios(company_id: str):
 
             series.append(
                 {
-                    "period": s.period,
+                    "period": period,
                     "OperatingMargin": operating_margin,
                     "NetMargin": net_margin,
                     "ROE": roe,
@@ -5,7 +5,7 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 import base64
 import datetime
-import re
+from storage.periods import period_key
 
 _percent_metric_names = {
     "ROE",
@@ -17,19 +17,6 @@ _percent_metric_names = {
     "REVENUE_GROWTH",
 }
 
-_period_rx = re.compile(r"(?P<y>\d{4})(?:[-/ ]?Q(?P<q>[1-4]))?")
-
-
-def _period_key(p: str):
-    s = str(p)
-    m = _period_rx.search(s)
-    if not m:
-        return (float("inf"), float("inf"))
-    y = int(m.group("y"))
-    q = int(m.group("q") or 0)
-    return (y, q)
-
-
 def _fmt_metric(name: str, val):
     if val is None:
         return ""
@@ -73,7 +60,7 @@ def build_pdf(
                 if latest_period is None:
                     latest_period = p
                 else:
-                    latest_period = max(latest_period, p, key=_period_key)
+                    latest_period = max(latest_period, p, key=period_key)
 
     if latest_period:
         header = [f"Metric ({latest_period})"] + [c.get("name", "-") for c in companies]
@@ -89,7 +76,7 @@ def build_pdf(
                 else:
                     # try best-effort: pick max period available for this metric
                     if mv:
-                        best_p = max(mv.keys(), key=_period_key)
+                        best_p = max(mv.keys(), key=period_key)
                         v = mv[best_p]
                 row.append(_fmt_metric(m, v))
             rows.append(row)
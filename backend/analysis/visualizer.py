@@ -3,7 +3,7 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
-import re
+from storage.periods import period_key
 
 # Prefer Japanese-capable fonts but keep graceful fallback
 matplotlib.rcParams["font.family"] = "sans-serif"
@@ -18,11 +18,6 @@ matplotlib.rcParams["font.sans-serif"] = [
 ]
 
 
-def _natural_key(s: str):
-    """Split digits and non-digits for natural sorting like 2023, 2023-Q4, etc."""
-    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", str(s))]
-
-
 def line_chart_image(
     series_map: dict[str, list[tuple[str, float | None]]],
     title: str = "",
@@ -54,7 +49,7 @@ def line_chart_image(
         cleaned[label] = pts
         for x, _ in pts:
             all_x.add(str(x))
-    ordered_x = sorted(all_x, key=_natural_key) if all_x else []
+    ordered_x = sorted(all_x, key=period_key) if all_x else []
 
     # Plot each series aligned to ordered_x where possible
     for label, pts in cleaned.items():
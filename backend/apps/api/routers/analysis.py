@@ -1,18 +1,21 @@
 
 from fastapi import APIRouter, Response, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, field_validator
 from typing import Dict, List, Optional
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from core.config import get_settings
-from services.metrics_service import calc_metrics
+from services.metrics_service import calc_metrics, calc_metrics_async
 from services.financial_service import get_financials
+from storage.db import get_async_db
+from ingestion import upstream
 from analysis.visualizer import line_chart_image
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 security = HTTPBasic()
 
 
-def _auth(creds: HTTPBasicCredentials = Depends(security)):
+async def _auth(creds: HTTPBasicCredentials = Depends(security)):
     s = get_settings()
     if creds.username != s.API_USER or creds.password != s.API_PASSWORD:
         raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Basic"})
@@ -22,6 +25,7 @@ class TimeseriesBody(BaseModel):
     companyIds: List[str] = Field(..., min_length=1)
     metricIds: List[str] = Field(..., min_length=1)
     period: str = Field("fy", description="fy | q | tq (backend dependent)")
+    lastN: Optional[int] = Field(None, ge=1, description="Only the latest N periods of each company")
 
     @field_validator("period")
     @classmethod
@@ -32,18 +36,31 @@ class TimeseriesBody(BaseModel):
         return v
 
 
+def _preload(body: TimeseriesBody) -> None:
+    # Opportunistic preload of financials into cache/DB for each company.
+    # Upstream calls share one budget per request; a slow or open-circuit host fails fast.
+    with upstream.deadline(get_settings().API_UPSTREAM_BUDGET_SEC):
+        for cid in body.companyIds:
+            if upstream.remaining() <= 0:
+                break  # 残りは DB にある分で答える
+            try:
+                get_financials(cid, period=body.period)
+            except Exception:
+                # Non-fatal: calc_metrics may still succeed using cached/available data
+                pass
+
+
 @router.post("/timeseries")
-def timeseries(body: TimeseriesBody, _: str = Depends(_auth)):
-    # Opportunistic preload of financials into cache/DB for each company
-    for cid in body.companyIds:
-        try:
-            get_financials(cid, period=body.period)
-        except Exception:
-            # Non-fatal: calc_metrics may still succeed using cached/available data
-            pass
+async def timeseries(body: TimeseriesBody, _: str = Depends(_auth), db=Depends(get_async_db)):
+    # 取り込み（外部 API・書き込み）は同期クライアントなのでスレッドで、読み出しは async セッションで
+    await run_in_threadpool(_preload, body)
     try:
         # NOTE: calc_metrics is expected to return decimals (e.g., 0.123 for 12.3%)
-        return calc_metrics(body.companyIds, body.metricIds, period=body.period)
+        if db is None:
+            return await run_in_threadpool(
+                calc_metrics, body.companyIds, body.metricIds, period=body.period, last=body.lastN
+            )
+        return await calc_metrics_async(db, body.companyIds, body.metricIds, period=body.period, last=body.lastN)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"metrics calculation failed: {e}")
 
@@ -72,7 +89,7 @@ def chart_png(body: ChartBody, _: str = Depends(_auth)):
     # Convert nested dict into the visualizer-friendly list of tuples
     try:
         series_map = {
-            label: [(k, v) for k, v in kv.items()]  # ordering handled in visualizer via natural sort
+            label: [(k, v) for k, v in kv.items()]  # ordering handled in visualizer (storage.periods order)
             for label, kv in body.series.items()
         }
         img = line_chart_image(
@@ -1,22 +1,27 @@
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from core.config import get_settings
-from services.company_service import search_companies
+from services.company_service import search_companies, search_companies_async
+from storage.db import get_async_db
 
 router = APIRouter(tags=["companies"])
 security = HTTPBasic()
 
 
-def _auth(creds: HTTPBasicCredentials = Depends(security)):
+async def _auth(creds: HTTPBasicCredentials = Depends(security)):
     s = get_settings()
     if creds.username != s.API_USER or creds.password != s.API_PASSWORD:
         raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Basic"})
 
 
 @router.get("/companies/search")
-def companies_search(q: str, _: str = Depends(_auth)):
+async def companies_search(q: str, _: str = Depends(_auth), db=Depends(get_async_db)):
     try:
-        return search_companies(q)
+        if db is None:
+            # async ドライバなし: 同期版をスレッドプールで
+            return await run_in_threadpool(search_companies, q)
+        return await search_companies_async(db, q)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"company search failed: {e}")
@@ -1,6 +1,15 @@
-
 from fastapi import APIRouter
+from ingestion.rate_limit import get_rate_limiter
+from ingestion.upstream import get_circuit_breakers
 router = APIRouter(tags=["health"])
 @router.get("/health")
 def health():
     return {"status": "ok"}
+@router.get("/health/rate-limits")
+def rate_limits():
+    # 外部 API ごとの現在レート・429/503 回数・待ち時間
+    return get_rate_limiter().stats()
+@router.get("/health/circuits")
+def circuits():
+    # 外部 API ごとのサーキット状態（open なら retry_in 秒後に 1 本だけ試行）
+    return get_circuit_breakers().stats()
@@ -0,0 +1,308 @@
+# backend/benchmarks/fake_api.py
+"""Local stand-in for the EDINET and J-Quants APIs (load testing without hitting the real services).
+
+    cd backend
+    python -m benchmarks.fake_api --port 8765 --latency-ms 50 --rate-429 0.02 --max-rps 100
+    EDINET_API_BASE=http://127.0.0.1:8765/api/v2 JQUANTS_API_BASE=http://127.0.0.1:8765/v1 \
+        JQ_REFRESH_TOKEN=fake python -m services.sync_service --date 2024-06-30
+
+Routes (same shapes as the real APIs):
+    GET  /api/v2/documents.json?date=&type=2[&pagenumber=]   daily listing
+    GET  /api/v2/documents/{docID}?type=1                      submission zip
+    POST /v1/token/auth_user, /v1/token/auth_refresh           tokens
+    GET  /v1/fins/statements?date=|code=[&pagination_key=]     statements
+    GET  /_stats                                               request counters
+
+Responses are synthetic (benchmarks.synthetic) and deterministic per seed,
+unless a recorded file exists under --replay:
+    edinet/documents/{date}.json, edinet/zips/{docID}.zip, jquants/statements/{date}.json
+
+Faults: fixed latency + jitter, random 500s, random 429s with Retry-After,
+and a server-side requests/sec cap that answers 429 like a real throttle.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import date
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.synthetic import PRESETS, make_zip
+
+DOC_TYPES = ("120", "140", "160")
+
+
+@dataclass(frozen=True)
+class FakeApiConfig:
+    # --- faults ---
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0         # fraction of requests answered 500
+    rate_429: float = 0.0           # fraction of requests answered 429
+    retry_after: float = 1.0        # Retry-After seconds on 429
+    max_rps: float = 0.0            # server-side cap (0 = unlimited), excess -> 429
+    # --- synthetic data ---
+    filings_per_day: int = 50
+    companies: int = 200
+    weekends: bool = False          # False: no filings on Sat/Sun
+    preset: str = "small"           # benchmarks.synthetic preset of each zip
+    ixbrl_ratio: float = 0.0        # share of inline XBRL submissions
+    variants: int = 8               # distinct zip contents (generated once, then cached)
+    statements_per_day: int = 100
+    page_size: int = 0              # 0 = whole day in one page
+    replay_dir: Optional[str] = None
+    seed: int = 1
+
+
+def _h(*parts: object) -> int:
+    return int.from_bytes(hashlib.sha256("|".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+class FakeApi:
+    """Threaded HTTP server; start() returns immediately, bases are ready to use."""
+
+    def __init__(self, config: FakeApiConfig = FakeApiConfig(), host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._window: List[float] = []  # max_rps 判定用の直近 1 秒の受付時刻
+        self._rng = random.Random(config.seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle --------------------------------------------------------
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def edinet_base(self) -> str:
+        return f"{self.url}/api/v2"
+
+    @property
+    def jquants_base(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "FakeApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeApi":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    # --- faults -----------------------------------------------------------
+    def _fault(self) -> Optional[int]:
+        c = self.config
+        with self._lock:
+            now = time.monotonic()
+            if c.max_rps > 0:
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= c.max_rps:
+                    return 429
+                self._window.append(now)
+            r = self._rng.random()
+        if r < c.rate_429:
+            return 429
+        if r < c.rate_429 + c.error_rate:
+            return 500
+        return None
+
+    def _sleep(self) -> None:
+        c = self.config
+        if c.latency_ms or c.jitter_ms:
+            time.sleep(max(0.0, c.latency_ms + self._rng.uniform(-c.jitter_ms, c.jitter_ms)) / 1000)
+
+    # --- data -------------------------------------------------------------
+    def _replay(self, *parts: str) -> Optional[bytes]:
+        if not self.config.replay_dir:
+            return None
+        p = Path(self.config.replay_dir, *parts)
+        return p.read_bytes() if p.is_file() else None
+
+    def filings(self, day: str) -> List[dict]:
+        c = self.config
+        if not c.weekends and date.fromisoformat(day).weekday() >= 5:
+            return []
+        out = []
+        for i in range(c.filings_per_day):
+            h = _h(c.seed, day, i)
+            code = f"E{h % c.companies + 1:05d}"
+            out.append({
+                "seqNumber": i + 1,
+                "docID": f"S1{h % 16**6:06X}",
+                "edinetCode": code,
+                "secCode": f"{1000 + h % c.companies}0",
+                "docTypeCode": DOC_TYPES[h % len(DOC_TYPES)],
+                "periodStart": f"{int(day[:4]) - 1}-04-01",
+                "periodEnd": f"{day[:4]}-03-31",
+                "submitDateTime": f"{day} 15:00",
+                "xbrlFlag": "1",
+            })
+        return out
+
+    def zip_for(self, doc_id: str) -> bytes:
+        recorded = self._replay("edinet", "zips", f"{doc_id}.zip")
+        if recorded is not None:
+            return recorded
+        h = _h(self.config.seed, doc_id)
+        kind = "ixbrl" if (h % 1000) / 1000 < self.config.ixbrl_ratio else "xbrl"
+        return _synthetic_zip(self.config.preset, self.config.seed + h % max(1, self.config.variants), kind)
+
+    def statements(self, key: str) -> List[dict]:
+        c = self.config
+        out = []
+        for i in range(c.statements_per_day):
+            h = _h(c.seed, "jq", key, i)
+            year = int(key[:4]) if key[:4].isdigit() else 2024
+            sales = 10_000_000 + h % 10**11
+            out.append({
+                "DisclosedDate": key, "DisclosedTime": f"{15 + i % 3}:00:00",
+                "LocalCode": f"{1000 + h % c.companies}0",
+                "TypeOfDocument": "FYFinancialStatements_Consolidated_JP",
+                "TypeOfCurrentPeriod": ("FY", "1Q", "2Q", "3Q")[h % 4],
+                "CurrentFiscalYearEndDate": f"{year}-03-31",
+                "NetSales": str(sales), "OperatingProfit": str(sales // 10), "OrdinaryProfit": str(sales // 11),
+                "Profit": str(sales // 15), "TotalAssets": str(sales * 3), "Equity": str(sales),
+                "CashFlowsFromOperatingActivities": str(sales // 8), "CashFlowsFromInvestingActivities": str(-sales // 20),
+                "CashFlowsFromFinancingActivities": str(-sales // 30), "CashAndEquivalents": str(sales // 4),
+            })
+        return out
+
+    # --- HTTP -------------------------------------------------------------
+    def _route(self, method: str, path: str, q: Dict[str, str]) -> Tuple[int, str, bytes]:
+        c = self.config
+        if path == "/_stats":
+            return 200, "application/json", json.dumps(self.stats()).encode()
+        if method == "GET" and path == "/api/v2/documents.json":
+            day = q.get("date", "")
+            recorded = self._replay("edinet", "documents", f"{day}.json")
+            if recorded is not None:
+                return 200, "application/json", recorded
+            recs = self.filings(day)
+            page = int(q.get("pagenumber", "1") or 1)
+            size = c.page_size or max(1, len(recs))
+            chunk = recs[(page - 1) * size: page * size]
+            body = {
+                "metadata": {"title": "提出された書類を把握するための API", "status": "200", "message": "OK",
+                             "parameter": {"date": day, "type": q.get("type", "2")},
+                             "resultset": {"count": len(recs)}},
+                "results": chunk,
+                "hasNextPage": page * size < len(recs),
+            }
+            return 200, "application/json; charset=utf-8", json.dumps(body, ensure_ascii=False).encode()
+        if method == "GET" and path.startswith("/api/v2/documents/"):
+            return 200, "application/octet-stream", self.zip_for(path.rsplit("/", 1)[-1])
+        if method == "POST" and path == "/v1/token/auth_user":
+            return 200, "application/json", b'{"refreshToken": "fake-refresh"}'
+        if method == "POST" and path == "/v1/token/auth_refresh":
+            return 200, "application/json", b'{"idToken": "fake-id"}'
+        if method == "GET" and path == "/v1/fins/statements":
+            key = q.get("date") or q.get("code") or ""
+            recorded = self._replay("jquants", "statements", f"{key}.json")
+            rows = json.loads(recorded)["statements"] if recorded is not None else self.statements(key)
+            off = int(q.get("pagination_key", "0") or 0)
+            size = c.page_size or max(1, len(rows))
+            body: dict = {"statements": rows[off:off + size]}
+            if off + size < len(rows):
+                body["pagination_key"] = str(off + size)
+            return 200, "application/json", json.dumps(body).encode()
+        return 404, "application/json", b'{"message": "not found"}'
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive（クライアントの接続プールを効かせる）
+
+            def _serve(self, method: str) -> None:
+                u = urlsplit(self.path)
+                q = {k: v[-1] for k, v in parse_qs(u.query).items()}
+                if method == "POST":
+                    self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                api._sleep()
+                fault = api._fault() if u.path != "/_stats" else None
+                if fault == 429:
+                    status, ctype, body = 429, "application/json", b'{"message": "Too Many Requests"}'
+                elif fault == 500:
+                    status, ctype, body = 500, "application/json", b'{"message": "Internal Server Error"}'
+                else:
+                    status, ctype, body = api._route(method, u.path, q)
+                route = u.path.split("/documents/")[0] + "/documents/{id}" if "/documents/" in u.path else u.path
+                api._count(f"{method} {route} {status}")
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", f"{api.config.retry_after:g}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                self._serve("GET")
+
+            def do_POST(self) -> None:
+                self._serve("POST")
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+@lru_cache(maxsize=64)
+def _synthetic_zip(preset: str, seed: int, kind: str) -> bytes:
+    return make_zip(replace(PRESETS[preset], seed=seed), kind)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Fake EDINET / J-Quants API server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    for f in FakeApiConfig.__dataclass_fields__.values():
+        if f.name == "replay_dir":
+            ap.add_argument("--replay", dest="replay_dir", help="directory of recorded responses")
+        elif f.type in ("bool", bool):
+            ap.add_argument(f"--{f.name.replace('_', '-')}", action="store_true")
+        else:
+            typ = {"float": float, "int": int}.get(str(f.type), str)
+            ap.add_argument(f"--{f.name.replace('_', '-')}", type=typ, default=f.default)
+    args = vars(ap.parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+    api = FakeApi(FakeApiConfig(**args), host, port).start()
+    print(f"EDINET_API_BASE={api.edinet_base}\nJQUANTS_API_BASE={api.jquants_base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        api.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
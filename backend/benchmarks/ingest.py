@@ -0,0 +1,157 @@
+# backend/benchmarks/ingest.py
+"""End-to-end ingestion benchmark against benchmarks.fake_api (no traffic to the real APIs).
+
+    cd backend
+    python -m benchmarks.ingest --start 2024-06-03 --end 2024-06-28 --filings-per-day 200 --latency-ms 30
+    python -m benchmarks.ingest --rate-429 0.05 --rate 20 --download-workers 16
+    python -m benchmarks.ingest --writer db --jquants   # also through financial_snapshot / J-Quants sweep
+
+The real code paths run unchanged: AsyncEdinetClient (pool + rate limiter),
+the filing index, and the Backfill pipeline (download -> parse -> store). Only
+the host differs. Index, checkpoint and zips go to a temp dir so every run is
+cold; --writer null counts rows instead of writing financial_snapshot.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_api import FakeApi, FakeApiConfig
+from ingestion.backfill import Backfill, Checkpoint, Job
+from ingestion.edinet_client import AsyncEdinetClient, date_range
+from ingestion.filing_index import FilingIndex, refresh_days
+from ingestion.rate_limit import RateLimiter
+
+
+def _null_writer(rows: List[dict]) -> int:
+    return len(rows)
+
+
+def _db_writer(rows: List[dict]) -> int:
+    from ingestion.backfill import store_snapshots
+
+    return store_snapshots(rows)
+
+
+async def run_edinet(api: FakeApi, args: argparse.Namespace, work: Path) -> Dict[str, Any]:
+    limiter = RateLimiter({})
+    limiter.configure(api.edinet_base, args.rate, args.burst)
+    days = date_range(args.start, args.end)
+    today = "9999-12-31"  # 全日を確定扱い（索引の再取得を避ける）
+    index = FilingIndex(work / "filing_index.sqlite")
+    checkpoint = Checkpoint(work / "backfill.sqlite")
+    out: Dict[str, Any] = {}
+    try:
+        async with AsyncEdinetClient(
+            api.edinet_base, max_concurrency=args.download_workers, data_dir=work / "zips", limiter=limiter
+        ) as client:
+            (work / "zips").mkdir()
+            t0 = time.perf_counter()
+            await refresh_days(index, client, days, today=today)
+            t_index = time.perf_counter() - t0
+
+            jobs = [Job(f["docID"], f"C{f['edinetCode']}", f) for f in index.query(None, days[0], days[-1])]
+            bf = Backfill(
+                client, checkpoint, writer=_db_writer if args.writer == "db" else _null_writer,
+                download_workers=args.download_workers, parse_workers=args.parse_workers,
+                batch_size=args.batch_size, report_every=args.report_every,
+                report=lambda s: print(s, file=sys.stderr),
+            )
+            t1 = time.perf_counter()
+            summary = await bf.run(jobs)
+            t_pipe = time.perf_counter() - t1
+        out = {
+            "days": len(days),
+            "filings": len(jobs),
+            "index_seconds": round(t_index, 3),
+            "pipeline_seconds": round(t_pipe, 3),
+            "filings_per_sec": round(len(jobs) / t_pipe, 2) if t_pipe > 0 else None,
+            "end_to_end_filings_per_sec": round(len(jobs) / (t_index + t_pipe), 2) if jobs else None,
+            "backfill": summary,
+            "limiter": limiter.stats(),
+        }
+    finally:
+        checkpoint.close()
+    return out
+
+
+def run_jquants(api: FakeApi, args: argparse.Namespace) -> Dict[str, Any]:
+    # jquants_downloader は import 時に BASE を確定するので、環境変数を先に差し替える
+    os.environ["JQUANTS_API_BASE"] = api.jquants_base
+    os.environ.setdefault("JQ_REFRESH_TOKEN", "fake")
+    from ingestion import jquants_downloader as jq
+    from ingestion.rate_limit import get_rate_limiter
+
+    get_rate_limiter().configure(api.jquants_base, args.rate, args.burst)
+    t0 = time.perf_counter()
+    n = sum(len(jq.get_statements_by_date(d)) for d in date_range(args.start, args.end))
+    dt = time.perf_counter() - t0
+    return {"statements": n, "seconds": round(dt, 3), "statements_per_sec": round(n / dt, 2) if dt > 0 else None}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Ingestion benchmark against the fake EDINET/J-Quants server")
+    ap.add_argument("--start", default="2024-06-03")
+    ap.add_argument("--end", default="2024-06-07")
+    ap.add_argument("--filings-per-day", type=int, default=50)
+    ap.add_argument("--companies", type=int, default=200)
+    ap.add_argument("--preset", default="small")
+    ap.add_argument("--ixbrl-ratio", type=float, default=0.0)
+    ap.add_argument("--page-size", type=int, default=0)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--max-rps", type=float, default=0.0, help="server-side cap (excess answered 429)")
+    ap.add_argument("--replay", default=None, help="directory of recorded responses (see benchmarks.fake_api)")
+    ap.add_argument("--rate", type=float, default=50.0, help="client rate limit for the fake host (req/s)")
+    ap.add_argument("--burst", type=float, default=None)
+    ap.add_argument("--download-workers", type=int, default=8)
+    ap.add_argument("--parse-workers", type=int, default=None)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--report-every", type=float, default=5.0)
+    ap.add_argument("--writer", choices=("null", "db"), default="null")
+    ap.add_argument("--jquants", action="store_true", help="also time the J-Quants statements sweep")
+    ap.add_argument("--json", action="store_true", help="print the result as JSON only")
+    args = ap.parse_args(argv)
+
+    config = FakeApiConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_429=args.rate_429, retry_after=args.retry_after, max_rps=args.max_rps,
+        filings_per_day=args.filings_per_day, companies=args.companies, preset=args.preset,
+        ixbrl_ratio=args.ixbrl_ratio, page_size=args.page_size, replay_dir=args.replay,
+    )
+    with FakeApi(config) as api, tempfile.TemporaryDirectory(prefix="ingest-bench-") as tmp:
+        result: Dict[str, Any] = {"edinet": asyncio.run(run_edinet(api, args, Path(tmp)))}
+        if args.jquants:
+            result["jquants"] = run_jquants(api, args)
+        result["server"] = api.stats()
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+        return 0
+    e = result["edinet"]
+    print(f"{e['filings']} filings over {e['days']} days: index {e['index_seconds']}s, "
+          f"pipeline {e['pipeline_seconds']}s -> {e['filings_per_sec']} filings/s "
+          f"(end-to-end {e['end_to_end_filings_per_sec']}/s)")
+    for name, s in e["backfill"]["stages"].items():
+        print(f"  {name:<9} done={s['done']:<6} failed={s['failed']:<4} {s['per_sec']:.1f}/s busy={s['busy_seconds']:.1f}s")
+    if "jquants" in result:
+        j = result["jquants"]
+        print(f"J-Quants: {j['statements']} statements in {j['seconds']}s -> {j['statements_per_sec']}/s")
+    for host, s in e["limiter"].items():
+        print(f"limiter {host}: {s}")
+    for route, n in sorted(result["server"].items()):
+        print(f"  server {route}: {n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# backend/benchmarks/run.py
+"""Parser benchmark harness.
+
+    cd backend
+    python -m benchmarks.run --preset medium                 # print results
+    python -m benchmarks.run --preset medium --save base     # save benchmarks/baselines/base.json
+    python -m benchmarks.run --preset medium --compare base  # exit 1 on regression
+
+Each case runs in a fresh (spawned) process so peak RSS is per case, not
+cumulative. Parse caches are bypassed (.uncached) so every repeat really parses.
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import PRESETS, Spec, make_zip
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class _Phases:
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self._t = time.perf_counter()
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.seconds[name] = self.seconds.get(name, 0.0) + (now - self._t)
+        self._t = now
+
+
+# --- cases: (zip path) -> phase timings -------------------------------------
+def _v2_dom(path: str) -> Dict[str, float]:
+    from parsing import edinet_parser_v2 as v2
+    from parsing.package import EdinetPackage
+    ph = _Phases()
+    with EdinetPackage(path) as pkg:
+        # パーサと同じ選択: XBRL インスタンスが無ければ iXBRL 分割提出の全メンバー
+        inline = not pkg.instances() and bool(pkg.inline_instances())
+        members = pkg.inline_instances() if inline else [pkg.primary_instance()]
+        ph.mark("open")
+        parts = []
+        for member in members:
+            tree = v2._parse_any_xbrl(pkg.zf.read(member) if inline else (lambda: pkg.open(member)))
+            ph.mark("parse_tree")
+            ctxs = v2.ContextIndex.from_tree(tree)
+            _ = ctxs.rank
+            ph.mark("contexts")
+            cands: dict = {}
+            for name, text, attrs in v2._iter_facts(tree):
+                v2._collect_fact(cands, name, text, attrs, "zip")
+            parts.append((cands, ctxs))
+            ph.mark("facts")
+        merged, ctxs = v2._merge_parts(parts)
+        v2._finalize(merged, ctxs)
+        ph.mark("finalize")
+    return ph.seconds
+
+
+def _v2_stream(path: str) -> Dict[str, float]:
+    from parsing.edinet_parser_v2 import parse_edinet_zip_file
+    ph = _Phases()
+    parse_edinet_zip_file.uncached(path, streaming=True)
+    ph.mark("stream")
+    return ph.seconds
+
+
+def _v2_bytes(path: str) -> Dict[str, float]:
+    from parsing.edinet_parser_v2 import parse_financials_from_xbrl_bytes
+    ph = _Phases()
+    data = Path(path).read_bytes()
+    ph.mark("read")
+    parse_financials_from_xbrl_bytes.uncached(data)
+    ph.mark("parse")
+    return ph.seconds
+
+
+def _xbrl_zip(path: str) -> Dict[str, float]:
+    from parsing.xbrl_parser import parse_xbrl_zip
+    ph = _Phases()
+    parse_xbrl_zip.uncached(Path(path))
+    ph.mark("scan")
+    return ph.seconds
+
+
+CASES: Dict[str, Callable[[str], Dict[str, float]]] = {
+    "v2_bytes": _v2_bytes,      # parse_financials_from_xbrl_bytes (DOM)
+    "v2_dom": _v2_dom,          # same, split into phases
+    "v2_stream": _v2_stream,    # parse_edinet_zip_file(streaming=True)
+    "xbrl_zip": _xbrl_zip,      # xbrl_parser.parse_xbrl_zip
+}
+
+
+def _run_case(case: str, path: str, repeat: int, n_facts: int) -> dict:
+    fn = CASES[case]
+    rss0 = _peak_rss_mb()
+    fn(path)  # warm-up (imports, canon memo)
+    runs: List[Dict[str, float]] = [fn(path) for _ in range(repeat)]
+    totals = sorted(sum(r.values()) for r in runs)
+    best = min(runs, key=lambda r: sum(r.values()))
+    median = totals[len(totals) // 2]
+    return {
+        "seconds_median": median,
+        "seconds_best": totals[0],
+        "facts_per_sec": n_facts / median if median else None,
+        "mb_per_sec": os.path.getsize(path) / (1024 * 1024) / median if median else None,
+        "phases": best,
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_after_import_mb": rss0,
+    }
+
+
+def run(spec: Spec, cases: List[str], kinds: List[str], repeat: int = 3) -> dict:
+    out: dict = {
+        "spec": spec.__dict__ | {"label": spec.label},
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {},
+    }
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="parser_bench_") as tmp:
+        for kind in kinds:
+            path = os.path.join(tmp, f"{kind}.zip")
+            Path(path).write_bytes(make_zip(spec, kind))
+            for case in cases:
+                if case == "xbrl_zip" and kind == "ixbrl":
+                    continue  # xbrl_parser は .xbrl/.xml のみ対象
+                with ctx.Pool(1) as pool:
+                    res = pool.apply(_run_case, (case, path, repeat, spec.facts))
+                res["zip_mb"] = os.path.getsize(path) / (1024 * 1024)
+                out["results"][f"{case}/{kind}"] = res
+    return out
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15, min_delta: float = 0.005) -> List[str]:
+    """Regressions: median time or peak RSS worse than baseline by more than tolerance.
+
+    Time differences below min_delta seconds are ignored (timer noise on tiny presets).
+    """
+    problems = []
+    for key, cur in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        slower = cur["seconds_median"] - base["seconds_median"]
+        if slower > min_delta and cur["seconds_median"] > base["seconds_median"] * (1 + tolerance):
+            problems.append(f"{key}: {base['seconds_median']:.3f}s -> {cur['seconds_median']:.3f}s")
+        if cur.get("peak_rss_mb") and base.get("peak_rss_mb") and cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            problems.append(f"{key}: peak RSS {base['peak_rss_mb']:.0f}MB -> {cur['peak_rss_mb']:.0f}MB")
+    return problems
+
+
+def _print(report: dict) -> None:
+    print(f"spec {report['spec']['label']}  python {report['python']}")
+    print(f"{'case':<20}{'median s':>10}{'facts/s':>12}{'MB/s':>8}{'peak MB':>9}  phases")
+    for key, r in report["results"].items():
+        phases = " ".join(f"{k}={v:.3f}" for k, v in r["phases"].items())
+        print(f"{key:<20}{r['seconds_median']:>10.3f}{(r['facts_per_sec'] or 0):>12,.0f}"
+              f"{(r['mb_per_sec'] or 0):>8.1f}{(r['peak_rss_mb'] or 0):>9.0f}  {phases}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="EDINET parser benchmarks")
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    ap.add_argument("--facts", type=int, help="override number of facts")
+    ap.add_argument("--cases", default=",".join(CASES), help="comma-separated: " + ",".join(CASES))
+    ap.add_argument("--kinds", default="xbrl,ixbrl", help="comma-separated: xbrl,ixbrl")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", metavar="NAME", help="save results as baselines/NAME.json")
+    ap.add_argument("--compare", metavar="NAME", help="compare with baselines/NAME.json")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args(argv)
+
+    spec = PRESETS[args.preset]
+    if args.facts:
+        spec = Spec(**{**spec.__dict__, "facts": args.facts})
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        ap.error(f"unknown cases: {sorted(unknown)}")
+
+    report = run(spec, cases, [k for k in args.kinds.split(",") if k], repeat=args.repeat)
+    _print(report)
+
+    if args.save:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        (BASELINE_DIR / f"{args.save}.json").write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"saved baseline: {BASELINE_DIR / (args.save + '.json')}")
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if baseline.get("spec", {}).get("label") != spec.label:
+            print(f"warning: baseline spec {baseline.get('spec', {}).get('label')} != {spec.label}")
+        problems = compare(report, baseline, args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
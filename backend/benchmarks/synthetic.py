@@ -0,0 +1,163 @@
+# backend/benchmarks/synthetic.py
+"""Deterministic generator of EDINET-like XBRL / inline XBRL submissions.
+
+Documents follow the EDINET layout closely enough to exercise the parsers at
+realistic scale: Current/Prior context ids, scenario dimensions
+(consolidated/non-consolidated, reportable segments), jppfs_cor concepts with
+the statement totals mixed into thousands of filler line items, and inline
+XBRL split across several *_ixbrl.htm members.
+"""
+from __future__ import annotations
+import io
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+NS_DECL = (
+    'xmlns:xbrli="http://www.xbrl.org/2003/instance" '
+    'xmlns:xbrldi="http://xbrl.org/2006/xbrldi" '
+    'xmlns:link="http://www.xbrl.org/2003/linkbase" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+    'xmlns:iso4217="http://www.xbrl.org/2003/iso4217" '
+    'xmlns:jpdei_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpdei/2013-08-31/jpdei_cor" '
+    'xmlns:jppfs_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2023-11-01/jppfs_cor" '
+    'xmlns:jpcrp_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpcrp/2023-11-01/jpcrp_cor"'
+)
+
+# concepts both parsers look for (duration / instant)
+KEY_DURATION = [
+    "NetSales", "OperatingIncome", "ProfitAttributableToOwnersOfParent", "GrossProfit",
+    "NetCashProvidedByUsedInOperatingActivities", "NetCashProvidedByUsedInInvestingActivities",
+    "NetCashProvidedByUsedInFinancingActivities",
+]
+KEY_INSTANT = ["Assets", "Liabilities", "Equity", "CashAndCashEquivalents"]
+
+
+@dataclass(frozen=True)
+class Spec:
+    """Size of a synthetic filing."""
+    years: int = 5              # Current + Prior1..N-1
+    segments: int = 40          # reportable segment members (dimension fan-out)
+    facts: int = 20_000         # total numeric facts
+    ix_files: int = 6           # inline XBRL members (header + statements)
+    seed: int = 20240331
+
+    @property
+    def label(self) -> str:
+        return f"y{self.years}-s{self.segments}-f{self.facts}-ix{self.ix_files}"
+
+
+PRESETS: Dict[str, Spec] = {
+    "small": Spec(years=2, segments=5, facts=2_000, ix_files=3),
+    "medium": Spec(),
+    "large": Spec(years=10, segments=200, facts=100_000, ix_files=12),
+}
+
+
+def _contexts(spec: Spec) -> List[Tuple[str, str, str, str]]:
+    """[(id, period xml, scenario xml, kind)], kind is 'duration' or 'instant'."""
+    out = []
+    for y in range(spec.years):
+        prefix = "Current" if y == 0 else f"Prior{y}"
+        end_year = 2024 - y
+        dur = f"<xbrli:startDate>{end_year - 1}-04-01</xbrli:startDate><xbrli:endDate>{end_year}-03-31</xbrli:endDate>"
+        inst = f"<xbrli:instant>{end_year}-03-31</xbrli:instant>"
+        for kind, period in (("duration", dur), ("instant", inst)):
+            base = f"{prefix}Year{'Duration' if kind == 'duration' else 'Instant'}"
+            out.append((base, period, "", kind))
+            nc = ('<xbrldi:explicitMember dimension="jppfs_cor:ConsolidatedOrNonConsolidatedAxis">'
+                  "jppfs_cor:NonConsolidatedMember</xbrldi:explicitMember>")
+            out.append((f"{base}_NonConsolidatedMember", period, nc, kind))
+            for s in range(spec.segments):
+                seg = ('<xbrldi:explicitMember dimension="jpcrp_cor:OperatingSegmentsAxis">'
+                       f"jpcrp030000-asr_E99999-000Segment{s:03d}Member</xbrldi:explicitMember>")
+                out.append((f"{base}_jpcrp030000-asr_E99999-000Segment{s:03d}Member", period, seg, kind))
+    return out
+
+
+def _context_xml(cid: str, period: str, scenario: str) -> str:
+    sc = f"<xbrli:scenario>{scenario}</xbrli:scenario>" if scenario else ""
+    return (f'<xbrli:context id="{cid}"><xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">'
+            f"E99999-000</xbrli:identifier></xbrli:entity><xbrli:period>{period}</xbrli:period>{sc}</xbrli:context>")
+
+
+def _facts(spec: Spec, contexts) -> List[Tuple[str, str, int]]:
+    """[(concept local-name, context id, value)] — key concepts first, then filler items."""
+    rng = random.Random(spec.seed)
+    dur = [c for c in contexts if c[3] == "duration"]
+    inst = [c for c in contexts if c[3] == "instant"]
+    facts: List[Tuple[str, str, int]] = []
+    for pool, names in ((dur, KEY_DURATION), (inst, KEY_INSTANT)):
+        for cid, _, _, _ in pool:
+            for n in names:
+                facts.append((n, cid, rng.randrange(-10**11, 10**12) // 10**6 * 10**6))
+    i = 0
+    while len(facts) < spec.facts:
+        cid = rng.choice(dur if i % 2 else inst)[0]
+        facts.append((f"OtherLineItem{i % 997:03d}", cid, rng.randrange(-10**10, 10**11) // 10**6 * 10**6))
+        i += 1
+    rng.shuffle(facts)
+    return facts[: max(spec.facts, 1)]
+
+
+def make_xbrl(spec: Spec) -> bytes:
+    """Single XBRL instance document."""
+    ctxs = _contexts(spec)
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<xbrli:xbrl {NS_DECL}>',
+             '<link:schemaRef xlink:type="simple" xlink:href="jpcrp030000-asr-001_E99999-000_2024-03-31_01_2024-06-20.xsd"/>',
+             '<jpdei_cor:DocumentPeriodEndDate contextRef="FilingDateInstant">2024-03-31</jpdei_cor:DocumentPeriodEndDate>',
+             '<xbrli:unit id="JPY"><xbrli:measure>iso4217:JPY</xbrli:measure></xbrli:unit>']
+    parts += [_context_xml(cid, p, sc) for cid, p, sc, _ in ctxs]
+    for name, cid, v in _facts(spec, ctxs):
+        parts.append(f'<jppfs_cor:{name} contextRef="{cid}" unitRef="JPY" decimals="-6">{v}</jppfs_cor:{name}>')
+    parts.append("</xbrli:xbrl>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def make_ixbrl_files(spec: Spec) -> Dict[str, bytes]:
+    """Inline XBRL split across spec.ix_files members; contexts live in the first (header) file."""
+    ctxs = _contexts(spec)
+    facts = _facts(spec, ctxs)
+    n_files = max(1, spec.ix_files)
+    files: Dict[str, bytes] = {}
+    per = -(-len(facts) // max(1, n_files - 1)) if n_files > 1 else len(facts)
+    for k in range(n_files):
+        body: List[str] = []
+        if k == 0:
+            body.append('<div style="display:none"><ix:header><ix:resources>')
+            body += [_context_xml(cid, p, sc) for cid, p, sc, _ in ctxs]
+            body.append('<xbrli:unit id="JPY"><xbrli:measure>iso4217:JPY</xbrli:measure></xbrli:unit>')
+            body.append("</ix:resources></ix:header></div>")
+            body.append('<p>提出日 <ix:nonNumeric name="jpdei_cor:DocumentPeriodEndDate" contextRef="FilingDateInstant">2024-03-31</ix:nonNumeric></p>')
+            chunk = facts if n_files == 1 else []
+        else:
+            chunk = facts[(k - 1) * per: k * per]
+        if chunk:
+            body.append("<table>")
+            for name, cid, v in chunk:
+                sign = ' sign="-"' if v < 0 else ""
+                body.append(f'<tr><td>{name}</td><td><ix:nonFraction name="jppfs_cor:{name}" contextRef="{cid}" '
+                            f'unitRef="JPY" decimals="-6" scale="6" format="ixt:num-dot-decimal"{sign}>'
+                            f"{abs(v) // 10**6:,}</ix:nonFraction></td></tr>")
+            body.append("</table>")
+        doc = (f'<?xml version="1.0" encoding="UTF-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml" '
+               f'xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" {NS_DECL}><body>' + "\n".join(body) + "</body></html>")
+        files[f"XBRL/PublicDoc/{k:07d}{'header' if k == 0 else 'statement'}_{k:02d}_ixbrl.htm"] = doc.encode("utf-8")
+    return files
+
+
+def make_zip(spec: Spec, kind: str = "xbrl") -> bytes:
+    """EDINET-style submission zip. kind: 'xbrl' (instance + audit report) or 'ixbrl' (multi-file inline)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        if kind == "xbrl":
+            zf.writestr("XBRL/AuditDoc/jpaud-aar-cn-001_E99999-000_2024-03-31_01_2024-06-20.xbrl",
+                        f'<?xml version="1.0" encoding="UTF-8"?><xbrli:xbrl {NS_DECL}/>')
+            zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E99999-000_2024-03-31_01_2024-06-20.xbrl", make_xbrl(spec))
+        elif kind == "ixbrl":
+            for name, data in make_ixbrl_files(spec).items():
+                zf.writestr(name, data)
+        else:
+            raise ValueError("kind must be 'xbrl' or 'ixbrl'")
+    return buf.getvalue()
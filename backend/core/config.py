@@ -1,6 +1,6 @@
 
 from __future__ import annotations
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from typing import List
 
@@ -37,16 +37,28 @@ class Settings(BaseSettings):
     JQ_EMAIL: str | None = None
     JQ_PASSWORD: str | None = None
     JQ_REFRESH_TOKEN: str | None = None  # if you cache refresh tokens
+    EDINET_API_BASE: str = "https://disclosure.edinet-fsa.go.jp/api/v2"  # point at benchmarks.fake_api for load tests
+    JQUANTS_API_BASE: str = "https://api.jquants.com/v1"
+    EDINET_MAX_CONCURRENCY: int = 8  # parallel EDINET requests per client
+    EDINET_RATE_PER_SEC: float = 5.0  # token-bucket budget per host (adapts down on 429/503)
+    JQUANTS_RATE_PER_SEC: float = 2.0
+    UPSTREAM_FAILURE_THRESHOLD: int = 5  # consecutive failures before a host's circuit opens
+    UPSTREAM_RESET_SEC: float = 30.0  # open circuit fails fast this long, then lets one probe through
+    API_UPSTREAM_BUDGET_SEC: float = 2.0  # max time an API request spends on EDINET / J-Quants
 
     # --- Database (optional) ---
     DATABASE_URL: str | None = None
+    ASYNC_DATABASE_URL: str | None = None  # default: DATABASE_URL on aiosqlite / asyncpg
+    DB_ASYNC: bool = True  # async read paths for API handlers (needs sqlalchemy[asyncio] + the async driver)
+    DB_POOL_SIZE: int = 5  # connections kept per engine (sync and async each)
+    DB_MAX_OVERFLOW: int = 10  # extra connections under load
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced (-1 = never)
 
     # --- CORS ---
     CORS_ALLOW_ORIGINS: str = "*"  # comma-separated list or "*"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
     # Helper: parse comma-separated origins → list, with fallback
     @property
@@ -0,0 +1,422 @@
+# backend/ingestion/backfill.py
+"""Resumable bulk backfill: list -> download -> parse -> store.
+
+    cd backend
+    python -m ingestion.backfill --all --start 2019-01-01 --end 2024-12-31
+    python -m ingestion.backfill --companies 7203,6758 --download-workers 16 --parse-workers 8
+
+Stages are connected by bounded asyncio queues, so a slow stage applies
+back-pressure instead of buffering the whole backfill in memory:
+
+    plan ──> download (async, N workers) ──> parse (process pool) ──> store (1 batched writer)
+
+Every document is checkpointed (stored / skipped / failed) only after its
+batch is committed, so a crashed run resumes where it stopped. Failed
+documents are retried on the next run only with --retry-failed.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from loguru import logger
+
+from ingestion.edinet_client import AsyncEdinetClient, date_range
+from ingestion.filing_index import FilingIndex, refresh_days
+from parsing.batch import ENGINES
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).resolve().parents[1] / "data" / "cache" / "backfill.sqlite"
+# 有価証券報告書 / 訂正有報 / 四半期報告書 / 半期報告書
+DEFAULT_DOC_TYPES = ("120", "130", "140", "160")
+
+Row = Dict[str, Any]  # FinancialSnapshot の列 (company_id, period, period_end, pl, bs, cf, source)
+
+
+@dataclass
+class Job:
+    doc_id: str
+    company_id: str
+    filing: dict = field(default_factory=dict)
+    path: Optional[Path] = None
+    data: Optional[dict] = None
+    error: Optional[str] = None  # "stage: message"
+
+
+@dataclass
+class StageStats:
+    name: str
+    done: int = 0
+    failed: int = 0
+    busy: float = 0.0  # worker seconds spent in this stage
+
+    def per_sec(self, elapsed: float) -> float:
+        return (self.done + self.failed) / elapsed if elapsed > 0 else 0.0
+
+
+class Checkpoint:
+    """Per-document progress in SQLite: stored / skipped / failed."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CHECKPOINT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS backfill_doc ("
+            " doc_id TEXT PRIMARY KEY, company_id TEXT NOT NULL, status TEXT NOT NULL,"
+            " error TEXT, updated_at REAL NOT NULL)"
+        )
+
+    def finished(self, retry_failed: bool = False) -> Set[str]:
+        statuses = ("stored", "skipped") if retry_failed else ("stored", "skipped", "failed")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc_id FROM backfill_doc WHERE status IN ({','.join('?' * len(statuses))})", statuses
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def mark(self, entries: Sequence[Tuple[str, str, str, Optional[str]]]) -> None:
+        """entries: (doc_id, company_id, status, error)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO backfill_doc (doc_id, company_id, status, error, updated_at) VALUES (?,?,?,?,?)",
+                [(*e, now) for e in entries],
+            )
+
+    def statuses(self, doc_ids: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """{doc_id: (company_id, status)} for the given documents that have a checkpoint."""
+        ids = list(doc_ids)
+        out: Dict[str, Tuple[str, str]] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                for doc_id, company_id, status in self._conn.execute(
+                    f"SELECT doc_id, company_id, status FROM backfill_doc WHERE doc_id IN ({','.join('?' * len(part))})",
+                    part,
+                ):
+                    out[doc_id] = (company_id, status)
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM backfill_doc GROUP BY status").fetchall())
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _parse_one(engine: str, path: str) -> dict:
+    # プロセスプール側で実行（トップレベル関数である必要がある）
+    return ENGINES[engine](Path(path))
+
+
+def snapshot_row(job: Job) -> Optional[Row]:
+    """Parsed document -> FinancialSnapshot row; None when no period could be determined."""
+    data = job.data or {}
+    period = data.get("period") or ""
+    if not period and job.filing.get("periodEnd"):
+        period = f"FY{str(job.filing['periodEnd'])[:4]}"
+    if not period:
+        return None
+    return {
+        "company_id": job.company_id,
+        "period": period,
+        "period_end": job.filing.get("periodEnd"),
+        "pl": data.get("PL", {}),
+        "bs": data.get("BS", {}),
+        "cf": data.get("CF", {}),
+        "source": "edinet",
+    }
+
+
+def store_snapshots(rows: List[Row]) -> int:
+    """Insert rows that are not in financial_snapshot yet (same rule as get_financials). Returns inserted count."""
+    from storage.snapshots import upsert_snapshots
+
+    return upsert_snapshots(rows, update=False)["inserted"]
+
+
+async def plan_jobs(
+    client: AsyncEdinetClient,
+    index: FilingIndex,
+    companies: Sequence[Tuple[str, str]],
+    start_date: str,
+    end_date: str,
+    doc_type_codes: Optional[Sequence[str]] = DEFAULT_DOC_TYPES,
+) -> List[Job]:
+    """One Job per filing of each (company_id, edinet_code) in the range, via the local filing index."""
+    await refresh_days(index, client, date_range(start_date, end_date))
+    jobs: List[Job] = []
+    for company_id, edinet_code in companies:
+        for f in index.query(edinet_code, start_date, end_date, doc_type_codes=doc_type_codes):
+            doc_id = f.get("docID") or f.get("docId")
+            if doc_id:
+                jobs.append(Job(doc_id, company_id, f))
+    return jobs
+
+
+class Backfill:
+    """Staged pipeline; run() is resumable through the Checkpoint."""
+
+    def __init__(
+        self,
+        client: AsyncEdinetClient,
+        checkpoint: Checkpoint,
+        writer: Callable[[List[Row]], int] = store_snapshots,
+        engine: str = "xbrl",
+        download_workers: int = 8,
+        parse_workers: Optional[int] = None,
+        queue_size: int = 64,
+        batch_size: int = 200,
+        flush_seconds: float = 2.0,
+        report_every: float = 5.0,
+        report: Callable[[str], None] = logger.info,
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {sorted(ENGINES)}")
+        self.client = client
+        self.checkpoint = checkpoint
+        self.writer = writer
+        self.engine = engine
+        self.download_workers = max(1, download_workers)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.report_every = report_every
+        self.report = report
+        self.stats = {n: StageStats(n) for n in ("download", "parse", "store")}
+        self.inserted = 0
+        self.skipped_done = 0
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._t0 = 0.0
+
+    # --- stages -----------------------------------------------------------
+    async def _produce(self, jobs: Iterable[Job], done: Set[str]) -> None:
+        q = self._queues["download"]
+        for job in jobs:
+            if job.doc_id in done:
+                self.skipped_done += 1
+                continue
+            await q.put(job)
+        for _ in range(self.download_workers):
+            await q.put(None)
+
+    async def _download_worker(self) -> None:
+        src, parse_q, write_q = self._queues["download"], self._queues["parse"], self._queues["store"]
+        st = self.stats["download"]
+        while (job := await src.get()) is not None:
+            t0 = time.perf_counter()
+            try:
+                job.path = await self.client.download_zip(job.doc_id)
+                st.done += 1
+                nxt = parse_q
+            except Exception as e:
+                job.error = f"download: {type(e).__name__}: {e}"
+                st.failed += 1
+                nxt = write_q  # 失敗もチェックポイントに残すため writer へ
+            st.busy += time.perf_counter() - t0
+            await nxt.put(job)
+
+    async def _download_stage(self) -> None:
+        await asyncio.gather(*(self._download_worker() for _ in range(self.download_workers)))
+        for _ in range(self.parse_workers):
+            await self._queues["parse"].put(None)
+
+    async def _parse_worker(self, pool: Optional[Executor]) -> None:
+        loop = asyncio.get_running_loop()
+        src, write_q = self._queues["parse"], self._queues["store"]
+        st = self.stats["parse"]
+        while (job := await src.get()) is not None:
+            t0 = time.perf_counter()
+            try:
+                job.data = await loop.run_in_executor(pool, _parse_one, self.engine, str(job.path))
+                st.done += 1
+            except Exception as e:
+                job.error = f"parse: {type(e).__name__}: {e}"
+                st.failed += 1
+            st.busy += time.perf_counter() - t0
+            await write_q.put(job)
+
+    async def _parse_stage(self) -> None:
+        # parse_workers=1 はプロセスプールを使わずスレッドで解析（デバッグ用）
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 1 else None
+        try:
+            await asyncio.gather(*(self._parse_worker(pool) for _ in range(self.parse_workers)))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        await self._queues["store"].put(None)
+
+    async def _flush(self, batch: List[Job]) -> None:
+        if not batch:
+            return
+        st = self.stats["store"]
+        t0 = time.perf_counter()
+        rows, marks = [], []
+        for job in batch:
+            row = None if job.error else snapshot_row(job)
+            if row is not None:
+                rows.append(row)
+            status = "failed" if job.error else ("stored" if row is not None else "skipped")
+            marks.append((job.doc_id, job.company_id, status, job.error))
+        if rows:
+            self.inserted += await asyncio.to_thread(self.writer, rows)
+        # DB コミット後にのみチェックポイントを進める（クラッシュ時は再処理＝冪等）
+        await asyncio.to_thread(self.checkpoint.mark, marks)
+        st.done += len(batch)
+        st.busy += time.perf_counter() - t0
+        batch.clear()
+
+    async def _store_stage(self) -> None:
+        q = self._queues["store"]
+        batch: List[Job] = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                job = await asyncio.wait_for(q.get(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                job = ...
+            if job is None:
+                await self._flush(batch)
+                return
+            if job is not ...:
+                batch.append(job)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                await self._flush(batch)
+                deadline = time.monotonic() + self.flush_seconds
+
+    async def _reporter(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.report(self.progress_line())
+
+    # --- public -----------------------------------------------------------
+    def progress_line(self) -> str:
+        elapsed = time.perf_counter() - self._t0
+        parts = [f"{elapsed:6.1f}s"]
+        for name, st in self.stats.items():
+            q = self._queues.get(name)
+            parts.append(
+                f"{name} {st.done}/{st.failed}err {st.per_sec(elapsed):.1f}/s q={q.qsize() if q else 0}"
+            )
+        return " | ".join(parts)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self._t0
+        return {
+            "seconds": elapsed,
+            "inserted": self.inserted,
+            "already_done": self.skipped_done,
+            "stages": {
+                n: {"done": s.done, "failed": s.failed, "per_sec": s.per_sec(elapsed), "busy_seconds": s.busy}
+                for n, s in self.stats.items()
+            },
+            "checkpoint": self.checkpoint.counts(),
+        }
+
+    async def run(self, jobs: Iterable[Job], retry_failed: bool = False) -> dict:
+        self._t0 = time.perf_counter()
+        self._queues = {n: asyncio.Queue(maxsize=self.queue_size) for n in ("download", "parse", "store")}
+        done = self.checkpoint.finished(retry_failed=retry_failed)
+        tasks = [
+            asyncio.create_task(self._produce(jobs, done)),
+            asyncio.create_task(self._download_stage()),
+            asyncio.create_task(self._parse_stage()),
+            asyncio.create_task(self._store_stage()),
+        ]
+        reporter = asyncio.create_task(self._reporter())
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # どこかのステージが落ちたら全体を止める（進捗はチェックポイントに残る）
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            reporter.cancel()
+        self.report(self.progress_line())
+        return self.summary()
+
+
+# --- CLI ---------------------------------------------------------------------
+def _companies(ids: Optional[List[str]], all_companies: bool) -> List[Tuple[str, str]]:
+    from storage.db import SessionLocal
+    from storage.models import CompanyRef
+
+    db = SessionLocal()
+    try:
+        q = db.query(CompanyRef.company_id, CompanyRef.edinet_code).filter(CompanyRef.edinet_code.isnot(None))
+        if not all_companies:
+            q = q.filter(CompanyRef.company_id.in_(ids or []))
+        return [(c, e) for c, e in q.all() if e]
+    finally:
+        db.close()
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    from core.config import get_settings
+    from ingestion.edinet_downloader import BASE, DATA_DIR, UA
+    from ingestion.filing_index import get_filing_index
+    from storage.db import init_db
+    from storage.raw_archive import get_raw_archive
+
+    init_db()
+    companies = _companies(args.companies.split(",") if args.companies else None, args.all)
+    if not companies:
+        raise SystemExit("no companies with an EDINET code (see company_ref)")
+    doc_types = [c for c in args.doc_types.split(",") if c] or None
+    concurrency = max(args.download_workers, get_settings().EDINET_MAX_CONCURRENCY)
+    checkpoint = Checkpoint(args.checkpoint)
+    try:
+        async with AsyncEdinetClient(
+            BASE, max_concurrency=concurrency, data_dir=DATA_DIR, headers=UA, archive=get_raw_archive()
+        ) as client:
+            jobs = await plan_jobs(client, get_filing_index(), companies, args.start, args.end, doc_types)
+            logger.info(f"backfill: {len(companies)} companies, {len(jobs)} documents")
+            bf = Backfill(
+                client, checkpoint, engine=args.engine, download_workers=args.download_workers,
+                parse_workers=args.parse_workers, queue_size=args.queue_size, batch_size=args.batch_size,
+                report_every=args.report_every, report=lambda s: print(s, file=sys.stderr),
+            )
+            return await bf.run(jobs, retry_failed=args.retry_failed)
+    finally:
+        checkpoint.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="EDINET bulk backfill (resumable)")
+    who = ap.add_mutually_exclusive_group(required=True)
+    who.add_argument("--companies", help="comma-separated company_id (company_ref)")
+    who.add_argument("--all", action="store_true", help="every company_ref row with an EDINET code")
+    ap.add_argument("--start", default="2023-01-01")
+    ap.add_argument("--end", default="2025-12-31")
+    ap.add_argument("--doc-types", default=",".join(DEFAULT_DOC_TYPES), help="docTypeCode filter ('' = all)")
+    ap.add_argument("--engine", choices=sorted(ENGINES), default="xbrl")
+    ap.add_argument("--download-workers", type=int, default=8)
+    ap.add_argument("--parse-workers", type=int, default=None)
+    ap.add_argument("--queue-size", type=int, default=64)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--report-every", type=float, default=5.0)
+    ap.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_PATH))
+    ap.add_argument("--retry-failed", action="store_true")
+    args = ap.parse_args(argv)
+
+    summary = asyncio.run(_main(args))
+    print(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
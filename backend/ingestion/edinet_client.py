@@ -0,0 +1,175 @@
+"""Async EDINET API v2 client with a persistent connection pool.
+
+Date pages and document zips are fetched concurrently, bounded by a semaphore.
+The sync helpers in ingestion.edinet_downloader wrap this client, so routers
+and services keep calling plain functions. Every request passes the host's
+rate limiter and circuit breaker and honours the caller's upstream.deadline.
+
+    async with AsyncEdinetClient(max_concurrency=8) as c:
+        filings = await c.list_filings_range("E02144", "2024-01-01", "2024-12-31")
+        paths = await c.download_many([f["docID"] for f in filings])
+"""
+from __future__ import annotations
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, List, Optional, TypeVar
+
+import httpx
+from . import upstream
+from .rate_limit import RateLimiter, get_rate_limiter
+from .upstream import CircuitBreakers, get_circuit_breakers, upstream_retry
+from .zip_store import CHUNK_SIZE, ZipWriter, cached_zip
+
+if TYPE_CHECKING:
+    from storage.raw_archive import RawArchive
+
+T = TypeVar("T")
+
+DEFAULT_BASE = "https://disclosure.edinet-fsa.go.jp/api/v2"
+DEFAULT_UA = {"User-Agent": "FinancialAI/1.0 (+backend/ingestion/edinet_client.py)"}
+MAX_PAGES = 30
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
+    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
+    return [(d0 + timedelta(days=i)).isoformat() for i in range((d1 - d0).days + 1)]
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine from sync code (also safe when called inside a running loop)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)  # type: ignore[arg-type]
+    ctx = contextvars.copy_context()  # deadline などの ContextVar をスレッドへ引き継ぐ
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(ctx.run, asyncio.run, coro).result()  # type: ignore[arg-type]
+
+
+class AsyncEdinetClient:
+    def __init__(
+        self,
+        base: str = DEFAULT_BASE,
+        max_concurrency: int = 8,
+        timeout: float = 60.0,
+        data_dir: Optional[Path] = None,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+        archive: Optional["RawArchive"] = None,
+        breakers: Optional[CircuitBreakers] = None,
+    ):
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self.data_dir = data_dir
+        self.limiter = limiter or get_rate_limiter()
+        self.breakers = breakers or get_circuit_breakers()
+        self.archive = archive
+        self._sem = asyncio.Semaphore(max(1, max_concurrency))
+        self._client = httpx.AsyncClient(
+            headers={**DEFAULT_UA, **(headers or {})},
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncEdinetClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # --- documents.json ---------------------------------------------------
+    @upstream_retry()
+    async def get_documents_json(self, date: str, edinet_code: Optional[str] = None, page: int = 1) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"date": date, "type": 2, "pagenumber": page}
+        if edinet_code:
+            params["edinetCode"] = edinet_code
+        url = f"{self.base}/documents.json"
+        self.breakers.before(url)
+        async with self._sem:
+            await self.limiter.acquire_async(url)
+            try:
+                r = await self._client.get(url, params=params, timeout=upstream.timeout(self.timeout))
+            except httpx.TransportError:
+                self.breakers.failure(url)
+                raise
+        self.limiter.feedback(url, r.status_code, r.headers.get("Retry-After"))
+        self.breakers.record(url, r.status_code)
+        r.raise_for_status()
+        return r.json()
+
+    async def list_filings_by_date(
+        self, date: str, edinet_code: Optional[str] = None, doc_type_codes: Optional[List[str]] = None
+    ) -> List[dict]:
+        page, results = 1, []
+        codes = set(doc_type_codes or [])
+        while True:
+            js = await self.get_documents_json(date, edinet_code=edinet_code, page=page)
+            recs = js.get("results") or []
+            if codes:
+                recs = [r for r in recs if str(r.get("docTypeCode")) in codes]
+            results.extend(recs)
+            if not js.get("hasNextPage") or len(recs) == 0:
+                break
+            page += 1
+            if page > MAX_PAGES:
+                break
+        return results
+
+    async def list_filings_range(
+        self, edinet_code: Optional[str], start_date: str, end_date: str, doc_type_codes: Optional[List[str]] = None
+    ) -> List[dict]:
+        """All filings in [start_date, end_date]; days are fetched concurrently, result is in date order."""
+        days = date_range(start_date, end_date)
+        pages = await asyncio.gather(
+            *(self.list_filings_by_date(d, edinet_code=edinet_code, doc_type_codes=doc_type_codes) for d in days)
+        )
+        return [rec for recs in pages for rec in recs]
+
+    # --- documents/{docID} ------------------------------------------------
+    @upstream_retry()
+    async def download_zip(self, document_id: str) -> Path:
+        if self.data_dir is None:
+            raise ValueError("data_dir is required for downloads")
+        p = self.data_dir / f"{document_id}.zip"
+        if await asyncio.to_thread(cached_zip, p):
+            return p
+        if self.archive is not None:
+            # 原本が退避済みでもアーカイブから再構成できればネットワークに出ない
+            z = await asyncio.to_thread(self.archive.resolve_zip, document_id)
+            if z is not None:
+                return z
+        url = f"{self.base}/documents/{document_id}"
+        self.breakers.before(url)
+        async with self._sem:
+            await self.limiter.acquire_async(url)
+            try:
+                async with self._client.stream("GET", url, params={"type": 1}, timeout=upstream.timeout(90.0)) as r:
+                    self.limiter.feedback(url, r.status_code, r.headers.get("Retry-After"))
+                    self.breakers.record(url, r.status_code)
+                    r.raise_for_status()
+                    with ZipWriter(p, source=url) as w:
+                        async for chunk in r.aiter_bytes(CHUNK_SIZE):
+                            upstream.check_deadline()  # 読み取りごとのタイムアウトでは総時間を縛れない
+                            w.write(chunk)
+                        # CRC 検証はファイル全体を読むのでスレッドへ逃がす
+                        p = await asyncio.to_thread(w.commit)
+            except httpx.TransportError:
+                self.breakers.failure(url)
+                raise
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.put, document_id, p)
+        return p
+
+    async def download_many(self, document_ids: List[str]) -> Dict[str, Any]:
+        """{docID: Path | Exception} — one failed document does not cancel the others."""
+        got = await asyncio.gather(*(self.download_zip(d) for d in document_ids), return_exceptions=True)
+        return dict(zip(document_ids, got))
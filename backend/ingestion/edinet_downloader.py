@@ -1,53 +1,77 @@
 from pathlib import Path
-from datetime import datetime, timedelta
 import requests
-from tenacity import retry, wait_exponential, stop_after_attempt
+from core.config import get_settings
 from parsing.xbrl_parser import parse_xbrl_zip
+from ingestion.edinet_client import AsyncEdinetClient, date_range, run_sync
+from ingestion.filing_index import get_filing_index, refresh_days
+from ingestion.zip_store import CHUNK_SIZE, ZipWriter, cached_zip
+from ingestion.rate_limit import get_rate_limiter
+from ingestion import upstream
+from ingestion.upstream import FAIL_FAST, get_circuit_breakers, upstream_retry
+from storage.raw_archive import get_raw_archive
 
 DATA_DIR = Path("backend/data/raw/edinet")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-BASE = "https://disclosure.edinet-fsa.go.jp/api/v2"
+BASE = get_settings().EDINET_API_BASE.rstrip("/")
 UA = {"User-Agent": "FinancialAI/1.0 (+backend/ingestion/edinet_downloader.py)"}
+_SESSION = requests.Session()  # keep-alive for single sync downloads
+_LIMITER = get_rate_limiter()
+_LIMITER.configure(BASE, rate=get_settings().EDINET_RATE_PER_SEC)
+_BREAKERS = get_circuit_breakers()
+_BREAKERS.configure(BASE, get_settings().UPSTREAM_FAILURE_THRESHOLD, get_settings().UPSTREAM_RESET_SEC)
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-def _get_documents_json(date: str, edinet_code: str | None = None, page: int = 1):
-    params = {"date": date, "type": 2, "pagenumber": page}
-    if edinet_code:
-        params["edinetCode"] = edinet_code
-    r = requests.get(f"{BASE}/documents.json", params=params, timeout=60, headers=UA)
-    r.raise_for_status()
-    return r.json()
+def _client() -> AsyncEdinetClient:
+    # 1 呼び出し = 1 接続プール（range 取得では数百リクエストで使い回す）
+    return AsyncEdinetClient(
+        BASE, max_concurrency=get_settings().EDINET_MAX_CONCURRENCY, data_dir=DATA_DIR, headers=UA,
+        archive=get_raw_archive(),
+    )
 
 def list_filings_by_date(date: str, edinet_code: str | None = None, doc_type_codes: list[str] | None = None) -> list[dict]:
-    page = 1; results = []
-    while True:
-        js = _get_documents_json(date, edinet_code=edinet_code, page=page)
-        recs = js.get("results") or []
-        if doc_type_codes:
-            recs = [r for r in recs if str(r.get("docTypeCode")) in set(doc_type_codes)]
-        results.extend(recs)
-        if not js.get("hasNextPage") or len(recs) == 0: break
-        page += 1
-        if page > 30: break
-    return results
+    return list_filings_range(edinet_code, date, date, doc_type_codes=doc_type_codes)
 
-def list_filings_range(edinet_code: str, start_date: str, end_date: str, doc_type_codes: list[str] | None = None) -> list[dict]:
-    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
-    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
-    out, cur = [], d0
-    while cur <= d1:
-        out.extend(list_filings_by_date(cur.isoformat(), edinet_code=edinet_code, doc_type_codes=doc_type_codes))
-        cur += timedelta(days=1)
-    return out
+def list_filings_range(edinet_code: str | None, start_date: str, end_date: str, doc_type_codes: list[str] | None = None) -> list[dict]:
+    # 日次一覧はローカル索引から引く（未取得日・当日分のみ API へ）
+    index = get_filing_index()
+    async def go():
+        async with _client() as c:
+            await refresh_days(index, c, date_range(start_date, end_date))
+    if index.missing_days(date_range(start_date, end_date)):
+        run_sync(go())
+    return index.query(edinet_code, start_date, end_date, doc_type_codes=doc_type_codes)
+
+def download_zips(document_ids: list[str]) -> dict:
+    """{docID: Path | Exception} を並列ダウンロードで返す（キャッシュ済みは再取得しない）。"""
+    async def go():
+        async with _client() as c:
+            return await c.download_many(document_ids)
+    return run_sync(go())
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
+@upstream_retry()
 def _download_zip(document_id: str) -> Path:
     p = DATA_DIR / f"{document_id}.zip"
-    if p.exists(): return p
-    r = requests.get(f"{BASE}/documents/{document_id}", params={"type": 1}, timeout=90, headers=UA)
-    r.raise_for_status()
-    p.write_bytes(r.content)
+    if cached_zip(p): return p
+    archived = get_raw_archive().resolve_zip(document_id)
+    if archived: return archived
+    url = f"{BASE}/documents/{document_id}"
+    # 一時ファイルへ逐次書き込み → zip 検証 → rename（途中で落ちても壊れた zip を残さない）
+    _BREAKERS.before(url)
+    _LIMITER.acquire(url)
+    try:
+        with _SESSION.get(url, params={"type": 1}, timeout=upstream.timeout(90), headers=UA, stream=True) as r:
+            _LIMITER.feedback(url, r.status_code, r.headers.get("Retry-After"))
+            _BREAKERS.record(url, r.status_code)
+            r.raise_for_status()
+            with ZipWriter(p, source=url) as w:
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    upstream.check_deadline()
+                    w.write(chunk)
+                w.commit()
+    except (requests.ConnectionError, requests.Timeout):
+        _BREAKERS.failure(url)
+        raise
+    get_raw_archive().put(document_id, p)
     return p
 
 def parse_document(document_id: str):
@@ -55,20 +79,45 @@ def parse_document(document_id: str):
     # 例外は上位で個別スキップするためここでは送出
     return parse_xbrl_zip(z)
 
-def get_latest_financials_from_edinet_by_code(edinet_code: str, start_date: str, end_date: str):
+def filed_on(filing: dict, default: str) -> str:
+    """Listing day (JST) of a filing from its submitDateTime ("YYYY-MM-DD hh:mm")."""
+    day = str(filing.get("submitDateTime") or "")[:10]
+    return day if len(day) == 10 else default
+
+def get_latest_financials_from_edinet_by_code(
+    edinet_code: str, start_date: str, end_date: str, known_doc_ids: set[str] | None = None,
+    failed: list | None = None,
+):
+    """Parsed financials of the company's filings in the range, newest period first.
+
+    Documents that fail to download or parse are skipped; `failed` (if given)
+    receives their (docID, listing day).
+    """
     filings = list_filings_range(edinet_code, start_date, end_date)
+    doc_ids = [d for d in ((f.get("docID") or f.get("docId")) for f in filings) if d]
+    if known_doc_ids:
+        # 取り込み済みの docID はダウンロード・解析しない（差分同期）
+        doc_ids = [d for d in doc_ids if d not in known_doc_ids]
+    paths = download_zips(doc_ids)
+    for z in paths.values():
+        if isinstance(z, FAIL_FAST):
+            raise z  # 期限切れ・遮断で欠けた結果では差分同期の watermark を進めない
+    by_id = {(f.get("docID") or f.get("docId")): f for f in filings}
     out: list[dict] = []
-    for f in filings:
-        doc_id = f.get("docID") or f.get("docId")
-        if not doc_id:
-            continue
+    for doc_id in doc_ids:
         try:
-            parsed = parse_document(doc_id)
+            z = paths.get(doc_id)
+            if isinstance(z, Exception):
+                raise z
+            parsed = parse_xbrl_zip(z)
         except Exception:
-            # 解析失敗のドキュメントは安全にスキップ
+            # 解析失敗のドキュメントは安全にスキップ（呼び出し側は watermark をその日より前に留める）
+            if failed is not None:
+                failed.append((doc_id, filed_on(by_id.get(doc_id, {}), start_date)))
             continue
         out.append({
             "period": parsed.get("period", ""),
+            "period_end": by_id.get(doc_id, {}).get("periodEnd"),
             "pl": parsed.get("PL", {}),
             "bs": parsed.get("BS", {}),
             "cf": parsed.get("CF", {}),
@@ -0,0 +1,179 @@
+# backend/ingestion/filing_index.py
+"""Local index of EDINET daily listings (documents.json?type=2).
+
+A past date's listing never changes, so each day is fetched once, in full
+(not per company), and stored in SQLite. Range queries for any company are
+then indexed lookups; only today/future and missing days go to the network.
+
+    idx = get_filing_index()
+    await refresh_days(idx, client, date_range("2024-01-01", "2024-12-31"))
+    idx.query("E02144", "2024-01-01", "2024-12-31", doc_type_codes=["120"])
+
+Env:
+    FILING_INDEX_PATH  sqlite file (default: backend/data/cache/edinet_index.sqlite)
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Set, Union
+
+if TYPE_CHECKING:
+    from ingestion.edinet_client import AsyncEdinetClient
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parents[1] / "data" / "cache" / "edinet_index.sqlite"
+JST = timezone(timedelta(hours=9))
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS index_day ("
+    " date TEXT PRIMARY KEY, n_docs INTEGER NOT NULL, final INTEGER NOT NULL, fetched_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS filing ("
+    " date TEXT NOT NULL, doc_id TEXT NOT NULL, seq INTEGER NOT NULL,"
+    " edinet_code TEXT, doc_type_code TEXT, period_end TEXT, record TEXT NOT NULL,"
+    " PRIMARY KEY (date, doc_id))",
+    "CREATE INDEX IF NOT EXISTS ix_filing_code_date ON filing (edinet_code, date)",
+    "CREATE INDEX IF NOT EXISTS ix_filing_type_date ON filing (doc_type_code, date)",
+    "CREATE INDEX IF NOT EXISTS ix_filing_period_end ON filing (period_end)",
+    "CREATE INDEX IF NOT EXISTS ix_filing_date ON filing (date, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_filing_doc ON filing (doc_id)",
+)
+
+
+def today_jst() -> str:
+    # EDINET の日付は JST 基準
+    return datetime.now(JST).date().isoformat()
+
+
+class FilingIndex:
+    """SQLite store of full daily listings, one row per document."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def known_days(self, days: Iterable[str]) -> Set[str]:
+        """Days whose stored listing is final (fetched after the day was over)."""
+        days = list(days)
+        if not days:
+            return set()
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT date FROM index_day WHERE final=1 AND date BETWEEN ? AND ?", (min(days), max(days))
+            ).fetchall()
+        return {r[0] for r in rows} & set(days)
+
+    def missing_days(self, days: Iterable[str], today: Optional[str] = None) -> List[str]:
+        """Days that must be fetched: not stored as final, or today/future."""
+        days = sorted(set(days))
+        today = today or today_jst()
+        known = self.known_days(days)
+        return [d for d in days if d >= today or d not in known]
+
+    def store_day(self, day: str, records: Sequence[dict], today: Optional[str] = None) -> None:
+        """Replace the listing of one day. It is final only if the day is already over."""
+        final = int(day < (today or today_jst()))
+        rows = []
+        for seq, r in enumerate(records):
+            doc_id = r.get("docID") or r.get("docId")
+            if not doc_id:
+                continue
+            rows.append((
+                day, doc_id, seq, r.get("edinetCode"),
+                None if r.get("docTypeCode") is None else str(r.get("docTypeCode")),
+                r.get("periodEnd"), json.dumps(r, ensure_ascii=False, separators=(",", ":")),
+            ))
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM filing WHERE date=?", (day,))
+                db.executemany(
+                    "INSERT OR REPLACE INTO filing (date, doc_id, seq, edinet_code, doc_type_code, period_end, record)"
+                    " VALUES (?,?,?,?,?,?,?)", rows,
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO index_day (date, n_docs, final, fetched_at) VALUES (?,?,?,?)",
+                    (day, len(rows), final, time.time()),
+                )
+
+    def query(
+        self,
+        edinet_code: Optional[str],
+        start_date: str,
+        end_date: str,
+        doc_type_codes: Optional[Sequence[str]] = None,
+        period_end_from: Optional[str] = None,
+        period_end_to: Optional[str] = None,
+    ) -> List[dict]:
+        """Stored filings in [start_date, end_date], in listing order (date, then API order)."""
+        sql = ["SELECT record FROM filing WHERE date BETWEEN ? AND ?"]
+        args: list = [start_date, end_date]
+        if edinet_code:
+            sql.append("AND edinet_code=?")
+            args.append(edinet_code)
+        if doc_type_codes:
+            codes = [str(c) for c in doc_type_codes]
+            sql.append(f"AND doc_type_code IN ({','.join('?' * len(codes))})")
+            args += codes
+        if period_end_from:
+            sql.append("AND period_end >= ?")
+            args.append(period_end_from)
+        if period_end_to:
+            sql.append("AND period_end <= ?")
+            args.append(period_end_to)
+        sql.append("ORDER BY date, seq")
+        with self._lock:
+            rows = self._db().execute(" ".join(sql), args).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            days, final = db.execute("SELECT COUNT(*), COALESCE(SUM(final), 0) FROM index_day").fetchone()
+            docs = db.execute("SELECT COUNT(*) FROM filing").fetchone()[0]
+        return {"days": days, "final_days": final, "filings": docs}
+
+
+async def refresh_days(
+    index: FilingIndex, client: "AsyncEdinetClient", days: Iterable[str], today: Optional[str] = None
+) -> List[str]:
+    """Fetch and store the full listing of every missing day (concurrently). Returns the fetched days."""
+    today = today or today_jst()
+    todo = index.missing_days(days, today=today)
+
+    async def one(day: str) -> None:
+        recs = await client.list_filings_by_date(day)
+        # SQLite への書き込みはブロッキングなのでイベントループの外で行う
+        await asyncio.to_thread(index.store_day, day, recs, today=today)
+
+    await asyncio.gather(*(one(d) for d in todo))
+    return todo
+
+
+_DEFAULT: Optional[FilingIndex] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_filing_index() -> FilingIndex:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = FilingIndex(os.getenv("FILING_INDEX_PATH") or DEFAULT_INDEX_PATH)
+        return _DEFAULT
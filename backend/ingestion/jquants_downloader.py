@@ -1,34 +1,69 @@
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, Iterator, List
 import requests
-from tenacity import retry, wait_exponential, stop_after_attempt
 from core.config import get_settings
+from ingestion.rate_limit import get_rate_limiter
+from ingestion import upstream
+from ingestion.upstream import FAIL_FAST, get_circuit_breakers, upstream_retry
 
-BASE = "https://api.jquants.com/v1"
+BASE = get_settings().JQUANTS_API_BASE.rstrip("/")
 UA = {"User-Agent": "FinancialAI/1.0 (+backend/ingestion/jquants_downloader.py)"}
 
-# Simple in-process cache for idToken
+# Simple in-process cache for idToken (guarded by _ID_TOKEN_LOCK)
 _ID_TOKEN: Optional[str] = None
 _ID_TOKEN_TS: float = 0.0
 _ID_TOKEN_TTL = 600.0  # seconds
+_ID_TOKEN_LOCK = threading.Lock()
 
+BY_DATE_MAX_DAYS = 7  # これより短い期間の差分は日付指定で取得（長ければ銘柄指定で全履歴）
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
-def _post(url: str, **kwargs) -> requests.Response:
+_SESSION = requests.Session()  # keep-alive across token / statements calls
+
+_LIMITER = get_rate_limiter()
+_LIMITER.configure(BASE, rate=get_settings().JQUANTS_RATE_PER_SEC)
+_BREAKERS = get_circuit_breakers()
+_BREAKERS.configure(BASE, get_settings().UPSTREAM_FAILURE_THRESHOLD, get_settings().UPSTREAM_RESET_SEC)
+
+
+def _send(method: str, url: str, **kwargs) -> requests.Response:
     headers = kwargs.pop("headers", {}) or {}
     headers = {**UA, **headers}
-    return requests.post(url, timeout=20, headers=headers, **kwargs)
+    _BREAKERS.before(url)
+    _LIMITER.acquire(url)
+    try:
+        r = _SESSION.request(method, url, timeout=upstream.timeout(20), headers=headers, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        _BREAKERS.failure(url)
+        raise
+    _BREAKERS.record(url, r.status_code)
+    # 429/503 は limiter に伝えて例外にする（tenacity が Retry-After 明けに再試行）
+    if _LIMITER.feedback(url, r.status_code, r.headers.get("Retry-After")):
+        r.raise_for_status()
+    return r
 
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=10), stop=stop_after_attempt(3))
+@upstream_retry()
+def _post(url: str, **kwargs) -> requests.Response:
+    return _send("POST", url, **kwargs)
+
+
+@upstream_retry()
 def _get(url: str, **kwargs) -> requests.Response:
-    headers = kwargs.pop("headers", {}) or {}
-    headers = {**UA, **headers}
-    return requests.get(url, timeout=20, headers=headers, **kwargs)
+    return _send("GET", url, **kwargs)
 
 
 def _fetch_id_token() -> Optional[str]:
-    """Retrieve and cache idToken. Prefer refresh token if provided."""
+    """Retrieve and cache idToken. Prefer refresh token if provided.
+
+    Thread-safe: concurrent callers wait for a single refresh.
+    """
+    with _ID_TOKEN_LOCK:
+        return _fetch_id_token_locked()
+
+
+def _fetch_id_token_locked() -> Optional[str]:
     global _ID_TOKEN, _ID_TOKEN_TS
     now = time.time()
     if _ID_TOKEN and (now - _ID_TOKEN_TS) < _ID_TOKEN_TTL:
@@ -61,16 +96,24 @@ def _fetch_id_token() -> Optional[str]:
                     _ID_TOKEN = tok
                     _ID_TOKEN_TS = now
                     return tok
+    except FAIL_FAST:
+        raise  # 障害中・期限切れを「未設定」（デモデータ）と取り違えない
     except Exception:
+        upstream.check_deadline()
         return None
     return None
 
 
+def has_credentials() -> bool:
+    """True if J-Quants credentials are configured and an idToken can be obtained."""
+    return _fetch_id_token() is not None
+
+
 def _api_get(path: str, params: Optional[Dict[str, Any]] = None) -> Optional[dict]:
-    tok = _fetch_id_token()
-    if not tok:
-        return None
     try:
+        tok = _fetch_id_token()
+        if not tok:
+            return None
         r = _get(f"{BASE}{path}", params=params or {}, headers={"Authorization": f"Bearer {tok}"})
         r.raise_for_status()
         return r.json()
@@ -78,16 +121,126 @@ def _api_get(path: str, params: Optional[Dict[str, Any]] = None) -> Optional[dic
         return None
 
 
-def get_statements(company_id: str, period: str = "fy") -> List[Dict[str, Any]]:
+# /fins/statements の列 -> 正規化キー
+_PL_FIELDS = {
+    "NetSales": "Revenue",
+    "OperatingProfit": "OperatingIncome",
+    "OrdinaryProfit": "OrdinaryIncome",
+    "Profit": "NetIncome",
+}
+_BS_FIELDS = {"TotalAssets": "Assets", "Equity": "Equity"}
+_CF_FIELDS = {
+    "CashFlowsFromOperatingActivities": "OperatingCF",
+    "CashFlowsFromInvestingActivities": "InvestingCF",
+    "CashFlowsFromFinancingActivities": "FinancingCF",
+    "CashAndEquivalents": "Cash",
+}
+
+
+def _num(v: Any) -> Optional[float]:
+    if v is None or v == "":
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_statement(st: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """One /fins/statements row -> {code, period, period_end, disclosed, pl, bs, cf}.
+
+    Returns None for rows without actual figures (e.g. forecast revisions).
+    period is FY<yyyy> for full-year results and <yyyy>-Q<n> for quarters,
+    where yyyy is the year the fiscal year ends.
+    """
+    if "FinancialStatements" not in str(st.get("TypeOfDocument") or "FinancialStatements"):
+        return None
+    fy_end = str(st.get("CurrentFiscalYearEndDate") or st.get("CurrentPeriodEndDate") or "")
+    kind = str(st.get("TypeOfCurrentPeriod") or "")
+    if len(fy_end) < 4 or not kind:
+        return None
+    year = fy_end[:4]
+    period = f"FY{year}" if kind in ("FY", "4Q") else f"{year}-Q{kind[0]}" if kind[0] in "123" else ""
+    if not period:
+        return None
+    pl = {k: _num(st.get(f)) for f, k in _PL_FIELDS.items()}
+    bs = {k: _num(st.get(f)) for f, k in _BS_FIELDS.items()}
+    cf = {k: _num(st.get(f)) for f, k in _CF_FIELDS.items()}
+    if bs["Assets"] is not None and bs["Equity"] is not None:
+        bs["Liabilities"] = bs["Assets"] - bs["Equity"]
+    if not any(v is not None for sec in (pl, bs, cf) for v in sec.values()):
+        return None
+    return {
+        "code": str(st.get("LocalCode") or ""),
+        "period": period,
+        "period_end": str(st.get("CurrentPeriodEndDate") or "") or None,
+        "disclosed": f"{st.get('DisclosedDate') or ''} {st.get('DisclosedTime') or ''}".strip(),
+        "pl": pl,
+        "bs": bs,
+        "cf": cf,
+    }
+
+
+def iter_statements(params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Stream raw /fins/statements rows, following pagination_key. Raises if not authenticated."""
+    tok = _fetch_id_token()
+    if not tok:
+        raise RuntimeError("J-Quants credentials are not configured")
+    headers = {"Authorization": f"Bearer {tok}"}
+    query = dict(params)
+    while True:
+        r = _get(f"{BASE}/fins/statements", params=query, headers=headers)
+        r.raise_for_status()
+        js = r.json() or {}
+        yield from js.get("statements") or []
+        key = js.get("pagination_key")
+        if not key:
+            return
+        query = {**params, "pagination_key": key}
+
+
+def _code_matches(local_code: Any, code: str) -> bool:
+    """J-Quants LocalCode (5 digits, e.g. 72030) vs a 4- or 5-digit company code."""
+    local = str(local_code or "")
+    return local == code or (len(code) == 4 and local == code + "0")
+
+
+def _days_between(start: str, end: str) -> int:
+    return (date.fromisoformat(end) - date.fromisoformat(start)).days
+
+
+def _shift(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def get_statements_by_date(date: str) -> List[Dict[str, Any]]:
+    """All companies' normalized statements disclosed on `date` (YYYY-MM-DD), in disclosure order."""
+    rows = [n for n in (normalize_statement(st) for st in iter_statements({"date": date})) if n]
+    rows.sort(key=lambda r: r["disclosed"])
+    return rows
+
+
+def get_statements(
+    company_id: str, period: str = "fy", since: Optional[str] = None, until: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
     Return normalized statements for a company. If J-Quants API credentials are not
-    configured/valid, return demo data (backward-compatible).
+    configured/valid, return demo data (backward-compatible); API errors return [].
+
+    Live data comes from /fins/statements?code=...; period="fy" keeps full-year
+    results only. For many companies use get_statements_by_date instead.
 
-    NOTE: Real API mapping to PL/BS/CF should be implemented here once schema is finalized.
-    This stub keeps the interface stable for the rest of the app.
+    since / until (YYYY-MM-DD, inclusive) keep only statements disclosed in
+    that range (incremental sync). A short range is read with one
+    /fins/statements?date=... request per day instead of the whole history.
+    The incremental form never returns demo data or a silent []: missing
+    credentials and API errors raise, so a caller's watermark is not advanced.
     """
+    incremental = since is not None or until is not None
     id_token = _fetch_id_token()
     if not id_token:
+        if incremental:
+            raise RuntimeError("J-Quants credentials are not configured")
         # Fallback demo data for dev/preview
         return [
             {
@@ -104,12 +257,26 @@ def get_statements(company_id: str, period: str = "fy") -> List[Dict[str, Any]]:
             },
         ]
 
-    # --- TODO: Implement actual mapping to your normalized schema ---
-    # Example (pseudo):
-    # js_pl = _api_get("/securities/finance/pl", params={"code": company_id, "period": period})
-    # js_bs = _api_get("/securities/finance/bs", params={"code": company_id, "period": period})
-    # js_cf = _api_get("/securities/finance/cf", params={"code": company_id, "period": period})
-    # ...normalize to your {period, pl, bs, cf} list...
-    # If any API returns None or raises, return [] to signal no live data yet.
-
-    return []
+    try:
+        if since and until and _days_between(since, until) < BY_DATE_MAX_DAYS:
+            # 数日分なら開示日ごとの一括取得から当該銘柄だけ拾う（全履歴を取り直さない）
+            days = [_shift(since, i) for i in range(_days_between(since, until) + 1)]
+            raw = (st for d in days for st in iter_statements({"date": d}) if _code_matches(st.get("LocalCode"), company_id))
+        else:
+            raw = iter_statements({"code": company_id})
+        rows = [n for n in (normalize_statement(st) for st in raw) if n]
+        rows = [r for r in rows if (not since or r["disclosed"][:10] >= since) and (not until or r["disclosed"][:10] <= until)]
+    except FAIL_FAST:
+        raise
+    except Exception:
+        upstream.check_deadline()  # 期限切れで失敗したなら「データなし」ではなく期限切れとして返す
+        if incremental:
+            raise  # 差分取得の失敗を「新しい開示なし」と取り違えない
+        return []
+    if period == "fy":
+        rows = [r for r in rows if r["period"].startswith("FY")]
+    # 同一期間は後の開示（訂正など）を採用
+    latest: Dict[str, Dict[str, Any]] = {}
+    for r in sorted(rows, key=lambda r: r["disclosed"]):
+        latest[r["period"]] = {k: r[k] for k in ("period", "period_end", "pl", "bs", "cf")}
+    return sorted(latest.values(), key=lambda r: r["period"], reverse=True)
@@ -0,0 +1,193 @@
+# backend/ingestion/rate_limit.py
+"""Process-wide, per-host adaptive token buckets for outbound API calls.
+
+Every EDINET / J-Quants request acquires a token for its host first (sync or
+async), then reports the response status back:
+
+    lim = get_rate_limiter()
+    lim.acquire(url)                 # or: await lim.acquire_async(url)
+    r = session.get(url)
+    lim.feedback(url, r.status_code, r.headers.get("Retry-After"))
+
+On 429/503 the host is paused for Retry-After (or one token interval) and its
+rate is halved; each success adds back a small step up to the configured
+budget (AIMD), so ingestion settles at the highest rate the server accepts.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+THROTTLE_STATUSES = (429, 503)
+# host -> (requests/sec, burst)
+DEFAULT_BUDGETS: Dict[str, Tuple[float, float]] = {
+    "disclosure.edinet-fsa.go.jp": (5.0, 10.0),
+    "api.jquants.com": (2.0, 5.0),
+}
+DEFAULT_BUDGET = (5.0, 10.0)
+
+
+def host_of(url_or_host: str) -> str:
+    return (urlsplit(url_or_host).hostname or url_or_host) if "//" in url_or_host else url_or_host
+
+
+def parse_retry_after(value: Union[str, float, None], now: Optional[float] = None) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        at = parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, at - (now if now is not None else time.time()))
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts between min_rate and max_rate.
+
+    Tokens may go negative: each caller reserves a token immediately and
+    sleeps for the deficit, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: Optional[float] = None, increase: Optional[float] = None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = min_rate if min_rate is not None else max(self.max_rate / 32, 0.05)
+        self.increase = increase if increase is not None else self.max_rate / 20
+        self.tokens = self.burst
+        self.updated = time.monotonic()  # 未来時刻 = Retry-After による停止中
+        self._lock = threading.Lock()
+        # counters
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.updated
+            if elapsed > 0:
+                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+                self.updated = now
+            self.tokens -= 1.0
+            wait = max(0.0, self.updated - now) + max(0.0, -self.tokens) / self.rate
+            self.requests += 1
+            self.waited += wait
+            return wait
+
+    def refund(self, wait: float) -> None:
+        """Undo a reserve() whose request was not sent."""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1.0)
+            self.requests -= 1
+            self.waited -= wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            now = time.monotonic()
+            # 停止が明けるまで補充しない・溜まったトークンも捨てる
+            self.updated = max(self.updated, now + pause)
+            self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited, 3),
+                "paused_for": round(max(0.0, self.updated - time.monotonic()), 3),
+            }
+
+
+class RateLimiter:
+    """Registry of per-host TokenBuckets."""
+
+    def __init__(self, budgets: Optional[Dict[str, Tuple[float, float]]] = None):
+        self._budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, burst: Optional[float] = None) -> None:
+        """Set the budget of a host (replaces its bucket and counters)."""
+        host = host_of(host)
+        with self._lock:
+            self._budgets[host] = (rate, burst if burst is not None else max(1.0, rate * 2))
+            self._buckets.pop(host, None)
+
+    def bucket(self, url_or_host: str) -> TokenBucket:
+        host = host_of(url_or_host)
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(*self._budgets.get(host, DEFAULT_BUDGET))
+            return b
+
+    def _reserve(self, url_or_host: str) -> float:
+        from .upstream import DeadlineExceeded, remaining
+
+        b = self.bucket(url_or_host)
+        wait = b.reserve()
+        left = remaining()
+        if left is not None and wait >= left:
+            # 期限内に送れないなら待たずに諦める（予約したトークンは返す）
+            b.refund(wait)
+            raise DeadlineExceeded(f"rate limit wait {wait:.2f}s exceeds the deadline ({max(0.0, left):.2f}s left)")
+        return wait
+
+    def acquire(self, url_or_host: str) -> float:
+        wait = self._reserve(url_or_host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_host: str) -> float:
+        wait = self._reserve(url_or_host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def feedback(self, url_or_host: str, status: int, retry_after: Union[str, float, None] = None) -> bool:
+        """Report a response status; returns True if it was a throttle (429/503)."""
+        b = self.bucket(url_or_host)
+        if status in THROTTLE_STATUSES:
+            b.on_throttle(parse_retry_after(retry_after))
+            return True
+        if status < 500:
+            b.on_success()
+        return False
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {h: b.stats() for h, b in buckets.items()}
+
+
+_DEFAULT: Optional[RateLimiter] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = RateLimiter()
+        return _DEFAULT
@@ -0,0 +1,245 @@
+# backend/ingestion/upstream.py
+"""Fail-fast guards for EDINET / J-Quants calls: per-host circuit breakers and request deadlines.
+
+A deadline is a monotonic instant stored in a ContextVar, so it follows the
+call through sync helpers, asyncio tasks and run_sync threads without extra
+parameters. Every outbound request caps its socket timeout at the time left:
+
+    with deadline(2.0):              # e.g. one API request's budget
+        get_financials("7203")       # no call below waits past the 2 s
+
+The breaker of a host opens after `failure_threshold` consecutive failures
+(transport errors, timeouts, 5xx) and rejects calls with CircuitOpenError
+until `reset_timeout` has passed; then one probe is let through (half-open)
+and its outcome closes or re-opens the circuit.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from tenacity import retry, retry_if_exception_type, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from .rate_limit import host_of
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's time budget ran out before (or while) talking to the upstream."""
+
+
+class CircuitOpenError(ConnectionError):
+    """The upstream host is failing; the call was rejected without touching the network."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host} (retry in {retry_in:.1f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+# 再試行しても無駄な例外（上位へそのまま返す）
+FAIL_FAST: Tuple[type, ...] = (CircuitOpenError, DeadlineExceeded)
+
+
+# --- deadlines ---------------------------------------------------------------
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Limit every upstream call in the block to `seconds` from now (nested blocks keep the earlier end)."""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    cur = _DEADLINE.get()
+    token = _DEADLINE.set(at if cur is None else min(cur, at))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None = no deadline)."""
+    at = _DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"deadline exceeded by {-left:.3f}s")
+
+
+def timeout(default: float) -> float:
+    """Socket timeout for the next request: `default`, capped at the time left."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(f"deadline exceeded by {-left:.3f}s")
+    return min(default, left)
+
+
+def stop_at_deadline(retry_state) -> bool:
+    """tenacity stop condition: give up when the next backoff would end past the deadline."""
+    left = remaining()
+    return left is not None and left <= (retry_state.upcoming_sleep or 0.0)
+
+
+def _give_up(retry_state) -> None:
+    exc = retry_state.outcome.exception()
+    if stop_at_deadline(retry_state):
+        raise DeadlineExceeded("no time left to retry") from exc
+    if retry_state.retry_object.reraise:
+        raise exc
+    raise retry_state.retry_object.retry_error_cls(retry_state.outcome) from exc
+
+
+def upstream_retry(attempts: int = 3):
+    """Retry policy of the downloaders: exponential backoff, bounded by the deadline, no retry on FAIL_FAST.
+
+    Out of attempts -> tenacity.RetryError as before; out of time -> DeadlineExceeded.
+    """
+    return retry(
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        stop=stop_after_attempt(attempts) | stop_at_deadline,
+        retry=retry_if_exception_type(Exception) & retry_if_not_exception_type(FAIL_FAST),  # cancel は再試行しない
+        retry_error_callback=_give_up,
+    )
+
+
+# --- circuit breakers --------------------------------------------------------
+class CircuitBreaker:
+    """closed -> (N consecutive failures) -> open -> (reset_timeout) -> half-open -> 1 probe -> closed | open."""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_at: Optional[float] = None  # half-open 中の試行開始時刻
+        self._lock = threading.Lock()
+        # counters
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if now - self.opened_at < self.reset_timeout else "half_open"
+
+    def allow(self, host: str = "") -> None:
+        """Raise CircuitOpenError unless a call may go out now."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return
+            if state == "half_open" and (self.probe_at is None or now - self.probe_at >= self.reset_timeout):
+                # 試行は 1 本だけ（結果が返らないまま放置されたら次の 1 本を許可）
+                self.probe_at = now
+                return
+            self.rejected += 1
+            retry_in = self.reset_timeout - (now - self.opened_at) if state == "open" else self.reset_timeout
+            raise CircuitOpenError(host, max(0.0, retry_in))
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = self.probe_at = None
+
+    def on_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.failures += 1
+            if self._state(now) == "half_open" or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = now
+                self.probe_at = None
+                self.opened += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return {
+                "state": state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": round(max(0.0, self.reset_timeout - (now - self.opened_at)), 3) if state == "open" else 0.0,
+            }
+
+
+class CircuitBreakers:
+    """Registry of per-host CircuitBreakers, used around every outbound request:
+
+        breakers.before(url)                 # deadline + circuit check
+        try: r = send(...)
+        except TransportError: breakers.failure(url); raise
+        breakers.record(url, r.status_code)
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self._defaults = (failure_threshold, reset_timeout)
+        self._settings: Dict[str, Tuple[int, float]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, failure_threshold: int, reset_timeout: float) -> None:
+        host = host_of(host)
+        with self._lock:
+            self._settings[host] = (failure_threshold, reset_timeout)
+            self._breakers.pop(host, None)
+
+    def breaker(self, url_or_host: str) -> CircuitBreaker:
+        host = host_of(url_or_host)
+        with self._lock:
+            b = self._breakers.get(host)
+            if b is None:
+                b = self._breakers[host] = CircuitBreaker(*self._settings.get(host, self._defaults))
+            return b
+
+    def before(self, url_or_host: str) -> None:
+        check_deadline()
+        self.breaker(url_or_host).allow(host_of(url_or_host))
+
+    def record(self, url_or_host: str, status: int) -> None:
+        if status >= 500:
+            self.breaker(url_or_host).on_failure()
+        else:
+            self.breaker(url_or_host).on_success()  # 4xx はサーバー自体は生きている
+
+    def failure(self, url_or_host: str) -> None:
+        """Transport error / timeout. A timeout caused by our own deadline is not the host's fault."""
+        left = remaining()
+        if left is not None and left <= 0.05:
+            raise DeadlineExceeded("deadline exceeded while waiting for the upstream")
+        self.breaker(url_or_host).on_failure()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {h: b.stats() for h, b in breakers.items()}
+
+
+_DEFAULT: Optional[CircuitBreakers] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = CircuitBreakers()
+        return _DEFAULT
@@ -0,0 +1,160 @@
+# backend/ingestion/zip_store.py
+"""Crash-safe on-disk cache of downloaded EDINET zips.
+
+A download is streamed in chunks into a temp file next to its destination,
+verified as a complete zip (central directory + member CRCs), and only then
+renamed into place. A sidecar manifest (<docID>.zip.json) records size,
+sha256 and fetch time:
+
+    with ZipWriter(DATA_DIR / "S100ABCD.zip", source=url) as w:
+        for chunk in r.iter_content(1 << 16):
+            w.write(chunk)
+        path = w.commit()
+
+cached_zip() accepts a file only if it matches its manifest; truncated or
+corrupt entries are deleted so the caller refetches them.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+CHUNK_SIZE = 1 << 16
+
+
+class CorruptZipError(ValueError):
+    """Downloaded payload is not a complete, valid zip."""
+
+
+def manifest_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+def read_manifest(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(manifest_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".part")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink(Path(tmp))
+        raise
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def verify_zip(path: Path) -> None:
+    """Raise CorruptZipError unless every member of the zip reads back with a good CRC."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            bad = zf.testzip()
+    except (zipfile.BadZipFile, OSError, EOFError) as e:
+        raise CorruptZipError(f"{path.name}: {e}") from e
+    if bad is not None:
+        raise CorruptZipError(f"{path.name}: bad CRC in {bad}")
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_manifest(path: Path, size: int, sha256: str, source: Optional[str] = None) -> dict:
+    man = {"file": path.name, "size": size, "sha256": sha256, "fetched_at": time.time(), "source": source}
+    _atomic_write_text(manifest_path(path), json.dumps(man, ensure_ascii=False))
+    return man
+
+
+def cached_zip(path: Path, deep: bool = False) -> Optional[Path]:
+    """path if it is a usable cached download, else None (and the broken entry is removed).
+
+    The cheap check is size == manifest size; deep=True also re-hashes the file.
+    A zip without manifest (older cache, or crash right after rename) is
+    verified once and gets a manifest.
+    """
+    if not path.exists():
+        _unlink(manifest_path(path))
+        return None
+    man = read_manifest(path)
+    try:
+        if man is None:
+            verify_zip(path)
+            write_manifest(path, path.stat().st_size, _sha256_file(path), source="adopted")
+            return path
+        if path.stat().st_size != man.get("size"):
+            raise CorruptZipError(f"{path.name}: size {path.stat().st_size} != manifest {man.get('size')}")
+        if deep and _sha256_file(path) != man.get("sha256"):
+            raise CorruptZipError(f"{path.name}: sha256 mismatch")
+        return path
+    except CorruptZipError:
+        _unlink(path)
+        _unlink(manifest_path(path))
+        return None
+
+
+class ZipWriter:
+    """Chunked writer: temp file -> verify -> atomic rename -> manifest. Memory use is one chunk."""
+
+    def __init__(self, dest: Path, source: Optional[str] = None):
+        self.dest = Path(dest)
+        self.source = source
+        self.dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.dest.parent, prefix=self.dest.name + ".", suffix=".part")
+        self._tmp = Path(tmp)
+        self._f = os.fdopen(fd, "wb")
+        self._sha = hashlib.sha256()
+        self.size = 0
+        self._done = False
+
+    def write(self, chunk: bytes) -> None:
+        self._f.write(chunk)
+        self._sha.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Path:
+        """Verify and move into place; raises CorruptZipError (temp file removed) on a bad payload."""
+        try:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._f.close()
+            verify_zip(self._tmp)
+            os.replace(self._tmp, self.dest)
+        except BaseException:
+            self.abort()
+            raise
+        self._done = True
+        write_manifest(self.dest, self.size, self._sha.hexdigest(), self.source)
+        return self.dest
+
+    def abort(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+        _unlink(self._tmp)
+        self._done = True
+
+    def __enter__(self) -> "ZipWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if not self._done:
+            self.abort()
@@ -0,0 +1,145 @@
+# backend/parsing/batch.py
+"""Multi-core batch parsing of EDINET zips.
+
+    res = parse_many(["S100ABCD", "data/raw/edinet/S100EFGH.zip"], workers=8, engine="v2")
+    res.stats.docs_per_sec
+
+Work is split into chunks and parsed on a process pool. A failing document is
+recorded as ParseResult(ok=False, error=...) and never aborts the batch.
+"""
+from __future__ import annotations
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from .edinet_parser_v2 import parse_edinet_zip_file
+from .xbrl_parser import parse_xbrl_zip
+
+PathOrId = Union[str, Path]
+
+
+def _resolve(item: PathOrId) -> Path:
+    """File path as-is; otherwise treat as an EDINET docID (downloaded/cached zip)."""
+    p = Path(item)
+    if p.exists():
+        return p
+    from ingestion.edinet_downloader import _download_zip  # lazy: only needed for docIDs
+    return _download_zip(str(item))
+
+
+def _engine_xbrl(path: Path) -> Dict[str, Any]:
+    return parse_xbrl_zip(path)
+
+
+def _engine_v2(path: Path) -> Dict[str, Any]:
+    return parse_edinet_zip_file(str(path), streaming=True)
+
+
+ENGINES: Dict[str, Callable[[Path], Dict[str, Any]]] = {
+    "xbrl": _engine_xbrl,  # parsing.xbrl_parser.parse_xbrl_zip
+    "v2": _engine_v2,      # parsing.edinet_parser_v2（streaming）
+}
+
+
+@dataclass
+class ParseResult:
+    key: str
+    ok: bool
+    data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    seconds: float = 0.0
+    index: int = -1  # position in the input sequence
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    ok: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.total / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class BatchResult:
+    results: List[ParseResult]
+    stats: BatchStats
+
+
+def _parse_chunk(engine: str, chunk: Sequence[tuple]) -> List[ParseResult]:
+    fn = ENGINES[engine]
+    out: List[ParseResult] = []
+    for index, item in chunk:
+        t0 = time.perf_counter()
+        try:
+            data = fn(_resolve(item))
+            out.append(ParseResult(str(item), True, data, None, time.perf_counter() - t0, index))
+        except Exception as e:
+            out.append(ParseResult(str(item), False, {}, f"{type(e).__name__}: {e}", time.perf_counter() - t0, index))
+    return out
+
+
+def iter_parse_many(
+    items: Iterable[PathOrId],
+    workers: Optional[int] = None,
+    engine: str = "xbrl",
+    ordered: bool = True,
+    chunksize: int = 4,
+    stats: Optional[BatchStats] = None,
+) -> Iterator[ParseResult]:
+    """Yield ParseResult per document, in input order (ordered=True) or as chunks finish.
+
+    workers=1 parses in-process (no pool), which is handy for debugging.
+    Pass a BatchStats to have it updated while results are streamed.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {sorted(ENGINES)}")
+    indexed = list(enumerate(items))
+    chunksize = max(1, int(chunksize))
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else BatchStats()
+    t0 = time.perf_counter()
+
+    def _emit(results: List[ParseResult]) -> Iterator[ParseResult]:
+        for r in results:
+            stats.total += 1
+            if r.ok:
+                stats.ok += 1
+            else:
+                stats.failed += 1
+            stats.seconds = time.perf_counter() - t0
+            yield r
+
+    if workers <= 1 or len(chunks) <= 1:
+        for ch in chunks:
+            yield from _emit(_parse_chunk(engine, ch))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as ex:
+        if ordered:
+            for results in ex.map(_parse_chunk, [engine] * len(chunks), chunks):
+                yield from _emit(results)
+        else:
+            futures = [ex.submit(_parse_chunk, engine, ch) for ch in chunks]
+            for fut in as_completed(futures):
+                yield from _emit(fut.result())
+
+
+def parse_many(
+    items: Iterable[PathOrId],
+    workers: Optional[int] = None,
+    engine: str = "xbrl",
+    ordered: bool = True,
+    chunksize: int = 4,
+) -> BatchResult:
+    """Parse many EDINET zips (paths or docIDs) on a process pool and collect the results."""
+    stats = BatchStats()
+    results = list(iter_parse_many(items, workers=workers, engine=engine, ordered=ordered, chunksize=chunksize, stats=stats))
+    return BatchResult(results=results, stats=stats)
@@ -0,0 +1,166 @@
+# backend/parsing/cache.py
+"""Content-addressed, persistent cache of parser output.
+
+EDINET filings are immutable, so a parse result keyed by
+(sha256 of the input, parser name, parser version) can be kept forever.
+Bumping a parser's PARSER_VERSION makes its old entries unreachable.
+
+Storage: SQLite table of zlib-compressed JSON blobs, with an in-process LRU
+in front. Env:
+    PARSE_CACHE_PATH      sqlite file (default: backend/data/cache/parse_cache.sqlite)
+    PARSE_CACHE_DISABLED  1/true to bypass the cache entirely
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / "data" / "cache" / "parse_cache.sqlite"
+
+Key = Tuple[str, str, str]  # (sha256, parser, version)
+
+
+def sha256_of(src: Union[str, Path, bytes, bytearray, memoryview], chunk_size: int = 1 << 20) -> str:
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(src).hexdigest()
+    h = hashlib.sha256()
+    with open(src, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class ParseCache:
+    """SQLite-backed blob store with an LRU of encoded blobs in front.
+
+    The LRU holds encoded bytes, so every hit returns a fresh object that the
+    caller may mutate freely.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH, lru_size: int = 256):
+        self.path = Path(path)
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[Key, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # 1 connection per process (process pool workers open their own)
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_result ("
+                " sha256 TEXT NOT NULL, parser TEXT NOT NULL, version TEXT NOT NULL,"
+                " blob BLOB NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (sha256, parser, version)) WITHOUT ROWID"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, key: Key, blob: bytes) -> None:
+        self._lru[key] = blob
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, key: Key) -> Optional[Any]:
+        with self._lock:
+            blob = self._lru.get(key)
+            if blob is not None:
+                self._lru.move_to_end(key)
+            else:
+                row = self._db().execute(
+                    "SELECT blob FROM parse_result WHERE sha256=? AND parser=? AND version=?", key
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                blob = row[0]
+                self._remember(key, blob)
+            self.hits += 1
+        return _decode(blob)
+
+    def put(self, key: Key, value: Any) -> None:
+        blob = _encode(value)
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO parse_result (sha256, parser, version, blob, created_at) VALUES (?,?,?,?,?)",
+                (*key, blob, time.time()),
+            )
+            db.commit()
+            self._remember(key, blob)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "lru": len(self._lru)}
+
+
+_DEFAULT: Optional[ParseCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def _disabled() -> bool:
+    return str(os.getenv("PARSE_CACHE_DISABLED", "")).strip().lower() in {"1", "true", "yes", "y", "on"}
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Process-wide cache, or None when disabled via PARSE_CACHE_DISABLED."""
+    global _DEFAULT
+    if _disabled():
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = ParseCache(os.getenv("PARSE_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        return _DEFAULT
+
+
+def cached_parse(parser: str, version: str) -> Callable:
+    """Decorator: cache fn(src, ...) by the sha256 of src (file path or bytes).
+
+    Extra arguments must not change the result (e.g. streaming=True/False).
+    Cache errors never break parsing; they only cost a re-parse.
+    """
+    def deco(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(src, *args, **kwargs):
+            cache = get_parse_cache()
+            if cache is None:
+                return fn(src, *args, **kwargs)
+            try:
+                key = (sha256_of(src), parser, version)
+                hit = cache.get(key)
+            except Exception:
+                return fn(src, *args, **kwargs)
+            if hit is not None:
+                return hit
+            value = fn(src, *args, **kwargs)
+            try:
+                cache.put(key, value)
+            except Exception:
+                pass
+            return value
+        wrapper.uncached = fn  # type: ignore[attr-defined]
+        return wrapper
+    return deco
@@ -1,12 +1,22 @@
 # backend/parsing/edinet_parser_v2.py
 from __future__ import annotations
-import io, re, zipfile
+import io, json, re, struct, sys, zipfile, zlib
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, List, Iterable, Union
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, List, Iterable, Iterator, IO, Union
 from lxml import etree
 
+from .cache import cached_parse
+from .package import EdinetPackage
+
+# 出力が変わる変更を入れたら上げる（キャッシュ済み結果を無効化）
+PARSER_VERSION = "6"
+
 # ===== 基本ユーティリティ =====
-_ZEN2HAN = str.maketrans("０１２３４５６７８９－，．％", "0123456789- ,.%")
+_ZEN2HAN = str.maketrans("０１２３４５６７８９－，．％", "0123456789-,.%")
 _UNIT_RX = re.compile(r"(百万円|千円|万円|円|％|%|percent|JPY|iso4217:JPY)", re.I)
 _PAREN_NEG_RX = re.compile(r"^\s*\((.+)\)\s*$")
 
@@ -39,8 +49,10 @@ def _infer_unit_multiplier(text: str) -> float:
     if re.search(r"円|JPY|iso4217:JPY", t, re.I): return 1.0
     return 1.0  # shares/pure 等は 1.0（％は別処理）
 
+_NORM_RX = re.compile(r"[\s_\-‐・:：/\\()（）]+")
+
 def _norm_key(s: str) -> str:
-    return re.sub(r"[\s_\-‐・:：/\\()（）]+", "", _zen2han(s).lower())
+    return _NORM_RX.sub("", _zen2han(s).lower())
 
 # ===== タクソノミー（同義語マップ） =====
 CANON = {
@@ -83,56 +95,119 @@ CANON2SECTION = {
 NS = {
     "xbrli": "http://www.xbrl.org/2003/instance",
     "ix":    "http://www.xbrl.org/2013/inlineXBRL",
+    "xbrldi": "http://xbrl.org/2006/xbrldi",
 }
 
-def _parse_any_xbrl(raw: bytes) -> etree._ElementTree:
+def _parse_any_xbrl(src: Union[bytes, Callable[[], IO[bytes]]]) -> etree._ElementTree:
+    # src は bytes（メモリ上から解析し GIL を解放）か、ストリームを開く関数（zip メンバーを複製せずに渡す）
+    if isinstance(src, (bytes, bytearray)):
+        try:
+            return etree.fromstring(src).getroottree()
+        except etree.XMLSyntaxError:
+            return etree.fromstring(src, etree.HTMLParser()).getroottree()
     try:
-        return etree.parse(io.BytesIO(raw))
+        with src() as fp:
+            return etree.parse(fp)
     except etree.XMLSyntaxError:
         parser = etree.HTMLParser()
-        return etree.parse(io.BytesIO(raw), parser)
-
-def _load_xbrl_from_zip(zbytes: bytes) -> etree._ElementTree:
-    with zipfile.ZipFile(io.BytesIO(zbytes)) as zf:
-        names = [n for n in zf.namelist() if n.endswith(".xbrl")]
-        if not names:
-            names = [n for n in zf.namelist() if n.lower().endswith((".htm",".html"))]
-        if not names:
-            raise ValueError("XBRL/iXBRL ファイルが見つかりません")
-        data = zf.read(sorted(names)[0])
-    return _parse_any_xbrl(data)
+        with src() as fp:
+            return etree.parse(fp, parser)
 
 # ===== コンテキスト抽出・優先順位 =====
-def _contexts(tree: etree._ElementTree) -> Dict[str, dict]:
-    ctx = {}
-    for c in tree.findall(".//xbrli:context", namespaces=NS):
-        cid = c.attrib.get("id") or ""
-        period = c.find(".//xbrli:period", namespaces=NS)
-        if not period:
+_CTX_ID_RX = re.compile(r"^(?:Current|Prior(\d+))(?:Year|Quarter|Interim|Accumulated)", re.I)
+
+class Context:
+    """1 context 分の解析結果（大量に生成されるため __slots__ で軽量化）。"""
+    __slots__ = ("id", "start", "end", "instant", "period_type", "dims", "consolidated", "fy_offset")
+
+    def __init__(self, id: str, start: Optional[str], end: Optional[str], instant: Optional[str],
+                 dims: Tuple[Tuple[str, str], ...]):
+        self.id = id
+        self.start = start
+        self.end = end
+        self.instant = instant
+        self.period_type = "duration" if (start and end) else ("instant" if instant else "forever")
+        self.dims = dims  # ((軸 QName, メンバー QName/値), ...)
+        # 旧実装の segment XML 文字列判定と同じ語で、scenario の次元（EDINET）も対象にする
+        consolidated = any(("Consolidated" in ax or "Consolidated" in mem or "連結" in mem) for ax, mem in dims)
+        non_consolidated = any(("NonConsolidatedMember" in mem or "個別" in mem) for _, mem in dims)
+        self.consolidated = consolidated and not non_consolidated
+        m = _CTX_ID_RX.match(id)
+        self.fy_offset: Optional[int] = (-int(m.group(1)) if m.group(1) else 0) if m else None
+
+    @property
+    def period_end(self) -> str:
+        return self.end or self.instant or ""
+
+    def __repr__(self) -> str:
+        return f"<Context {self.id} {self.period_type} {self.period_end} dims={len(self.dims)}>"
+
+def _context_record(c: etree._Element) -> Optional[Context]:
+    period = c.find("xbrli:period", namespaces=NS)
+    if period is None:
+        return None
+    dims: List[Tuple[str, str]] = []
+    # EDINET は scenario、他の発行体は segment に次元を置く
+    for holder in (c.find("xbrli:entity/xbrli:segment", namespaces=NS), c.find("xbrli:scenario", namespaces=NS)):
+        if holder is None:
             continue
-        ent = c.find(".//xbrli:entity", namespaces=NS)
-        seg = ent.find(".//xbrli:segment", namespaces=NS) if ent is not None else None
-        seg_xml = etree.tostring(seg, encoding="unicode") if seg is not None else ""
-        consolidated = ("ConsolidatedMember" in seg_xml) or ("連結" in seg_xml) or ("Consolidated" in seg_xml)
-        non_consolidated = ("NonConsolidatedMember" in seg_xml) or ("個別" in seg_xml)
-        ctx[cid] = {
-            "instant": period.findtext("xbrli:instant", namespaces=NS),
-            "start": period.findtext("xbrli:startDate", namespaces=NS),
-            "end": period.findtext("xbrli:endDate", namespaces=NS),
-            "consolidated": consolidated and not non_consolidated,
-        }
-    return ctx
+        for m in holder.iterchildren("{%s}explicitMember" % NS["xbrldi"], "{%s}typedMember" % NS["xbrldi"]):
+            value = (m.text or "").strip() if len(m) == 0 else "".join(m.itertext()).strip()
+            dims.append((m.attrib.get("dimension") or "", value))
+    return Context(
+        c.attrib.get("id") or "",
+        start=period.findtext("xbrli:startDate", namespaces=NS),
+        end=period.findtext("xbrli:endDate", namespaces=NS),
+        instant=period.findtext("xbrli:instant", namespaces=NS),
+        dims=tuple(dims),
+    )
+
+class ContextIndex:
+    """文書内の context と fact 採用順位（rank）を保持するインデックス。
+
+    rank は 連結 > 期間 > 期末日が新しい > 次元が少ない の降順で 0 始まり。
+    未知の context は len(contexts) + 1 として最下位に扱う。
+    """
 
-def _pick_best_context_ids(ctxs: Dict[str, dict]) -> List[str]:
-    def score(item: Tuple[str, dict]) -> Tuple[int, int, str]:
-        cid, c = item
-        duration = 1 if (c.get("start") and c.get("end")) else 0
-        cons = 1 if c.get("consolidated") else 0
-        end = c.get("end") or c.get("instant") or ""
-        return (cons, duration, end)  # 降順
-    return [cid for cid,_ in sorted(ctxs.items(), key=score, reverse=True)]
+    def __init__(self, contexts: Iterable[Context] = ()):
+        self.contexts: Dict[str, Context] = {}
+        self._rank: Optional[Dict[str, int]] = None
+        for c in contexts:
+            self.add(c)
+
+    @classmethod
+    def from_tree(cls, tree: etree._ElementTree) -> "ContextIndex":
+        return cls(rec for rec in map(_context_record, tree.iterfind(".//xbrli:context", namespaces=NS)) if rec is not None)
+
+    def add(self, ctx: Context) -> None:
+        self.contexts[ctx.id] = ctx
+        self._rank = None
+
+    def __len__(self) -> int:
+        return len(self.contexts)
+
+    def __getitem__(self, ctx_id: str) -> Context:
+        return self.contexts[ctx_id]
+
+    def get(self, ctx_id: Optional[str]) -> Optional[Context]:
+        return self.contexts.get(ctx_id or "")
+
+    @property
+    def rank(self) -> Dict[str, int]:
+        if self._rank is None:
+            def score(c: Context) -> Tuple[int, int, str, int]:
+                return (int(c.consolidated), int(c.period_type == "duration"), c.period_end, -len(c.dims))  # 降順
+            ordered = sorted(self.contexts.values(), key=score, reverse=True)
+            self._rank = {c.id: i for i, c in enumerate(ordered)}
+        return self._rank
+
+    def rank_of(self, ctx_id: Optional[str]) -> int:
+        return self.rank.get(ctx_id or "", len(self.contexts) + 1)
 
 # ===== fact列挙（XBRL / iXBRL） =====
+def _fact_name(qn: etree.QName) -> str:
+    return f"{qn.namespace and qn.namespace.split('/')[-1]}:{qn.localname}" if qn.namespace else qn.localname
+
 def _iter_facts(tree: etree._ElementTree) -> Iterable[Tuple[str, str, dict]]:
     root = tree.getroot()
     root_local = etree.QName(root).localname.lower()
@@ -153,8 +228,53 @@ def _iter_facts(tree: etree._ElementTree) -> Iterable[Tuple[str, str, dict]]:
         t = (el.text or "").strip()
         if not t:
             continue
-        name = f"{qn.namespace and qn.namespace.split('/')[-1]}:{qn.localname}" if qn.namespace else qn.localname
-        yield (name, t, dict(el.attrib))
+        yield (_fact_name(qn), t, dict(el.attrib))
+
+# ===== ストリーミング（iterparse 1パス） =====
+_CONTEXT_TAG = f"{{{NS['xbrli']}}}context"
+_IX_FACT_TAGS = (f"{{{NS['ix']}}}nonFraction", f"{{{NS['ix']}}}nonNumeric")
+
+def _iterparse_xbrl(fp: IO[bytes], html: bool = False) -> Iterator[Tuple[str, str, object]]:
+    """1パスで ("context", id, record) / ("fact", name, (text, attrs)) を順に返す。
+
+    処理済みの要素は clear し先行兄弟も削除するため、保持するのは
+    処理中の context / ix fact の部分木だけで、文書サイズに対しメモリはほぼ一定。
+    """
+    ixbrl = None
+    hold = 0  # context / ix fact の内側にいる深さ（この間は clear しない）
+    for ev, el in etree.iterparse(fp, events=("start", "end"), html=html, recover=html):
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue  # コメント・処理命令
+        if ev == "start":
+            if ixbrl is None:
+                ixbrl = etree.QName(el).localname.lower() in ("html", "xhtml")
+            if tag == _CONTEXT_TAG or (ixbrl and tag in _IX_FACT_TAGS):
+                hold += 1
+            continue
+
+        if tag == _CONTEXT_TAG:
+            hold -= 1
+            rec = _context_record(el)
+            if rec is not None:
+                yield ("context", el.attrib.get("id") or "", rec)
+        elif ixbrl:
+            if tag in _IX_FACT_TAGS:
+                hold -= 1
+                yield ("fact", el.attrib.get("name") or "", ("".join(el.itertext()).strip(), dict(el.attrib)))
+        else:
+            qn = etree.QName(tag)
+            if qn.namespace != NS["xbrli"] and qn.localname != "schemaRef":
+                t = (el.text or "").strip()
+                if t:
+                    yield ("fact", _fact_name(qn), (t, dict(el.attrib)))
+
+        if hold == 0:
+            el.clear()
+            parent = el.getparent()
+            if parent is not None:
+                while el.getprevious() is not None:
+                    del parent[0]
 
 @dataclass
 class XVal:
@@ -174,65 +294,476 @@ def _xval_from_fact(text: str, attrs: dict, unit_hint: str) -> XVal:
             scale = None
     if v is not None and scale:
         v *= (10 ** scale)
+    if v is not None and attrs.get("sign") == "-":  # ix:nonFraction の符号（表示値は絶対値）
+        v = -v
     if v is not None and is_pct:
         v = v / 100.0
     return XVal(value=v, is_percent=is_pct, unit_ref=attrs.get("unitRef"), scale=scale)
 
+# ===== canon 解決（import 時に構築） =====
+class _SynonymAutomaton:
+    """正規化済み同義語の Aho-Corasick。
+
+    match(nk) は「同義語 ⊂ nk」または「nk ⊂ 同義語」となる canon のうち
+    CANON の定義順で最も優先度の高いものを返す（旧実装の双方向部分一致と同じ判定）。
+    """
+
+    def __init__(self, canon: Dict[str, List[str]]):
+        self.names = list(canon)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[int] = [len(self.names)]  # ノードで終わる同義語の最良優先度
+        self.substr: Dict[str, int] = {}           # 同義語の全部分文字列 -> 最良優先度
+        for prio, alts in enumerate(canon.values()):
+            for a in alts:
+                key = _norm_key(a)
+                self._add(key, prio)
+                for i in range(len(key)):
+                    for j in range(i + 1, len(key) + 1):
+                        sub = key[i:j]
+                        if prio < self.substr.get(sub, len(self.names)):
+                            self.substr[sub] = prio
+        self._link()
+
+    def _add(self, key: str, prio: int) -> None:
+        node = 0
+        for ch in key:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.out.append(len(self.names))
+            node = nxt
+        self.out[node] = min(self.out[node], prio)
+
+    def _link(self) -> None:
+        # BFS で failure リンクを張り、出力（最良優先度）を伝播させる
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = min(self.out[nxt], self.out[self.fail[nxt]])
+                queue.append(nxt)
+
+    def match(self, nk: str) -> Optional[str]:
+        if not nk:
+            return None
+        best = self.substr.get(nk, len(self.names))
+        node = 0
+        for ch in nk:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            if self.out[node] < best:
+                best = self.out[node]
+                if best == 0:
+                    break
+        return self.names[best] if best < len(self.names) else None
+
+_SYNONYMS = _SynonymAutomaton(CANON)
+
+@lru_cache(maxsize=65536)
 def _canon_from_label_or_tag(label_or_tag: str) -> Optional[str]:
-    nk = _norm_key(label_or_tag)
-    for k, alts in CANON.items():
-        if any(_norm_key(a) in nk or nk in _norm_key(a) for a in alts):
-            return k
-    return TAG2CANON.get(label_or_tag)
+    # 1) タグ名の完全一致  2) 正規化済み同義語の部分一致
+    return TAG2CANON.get(label_or_tag) or _SYNONYMS.match(_norm_key(label_or_tag))
+
+def canon_cache_stats() -> Dict[str, int]:
+    """canon 解決のメモ化状況（hits / misses / size）。"""
+    info = _canon_from_label_or_tag.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
 
 # ===== 公開関数：PL/BS/CF抽出 =====
-def parse_financials_from_xbrl_bytes(z_or_x_bytes: bytes) -> Dict[str, Dict[str, float]]:
-    # zip or raw
-    if zipfile.is_zipfile(io.BytesIO(z_or_x_bytes)):
-        tree = _load_xbrl_from_zip(z_or_x_bytes)
-        unit_hint = "zip"
-    else:
-        tree = _parse_any_xbrl(z_or_x_bytes)
-        unit_hint = "raw"
+_LABEL = {
+    "revenue": "売上高",
+    "operating_income": "営業利益",
+    "net_income": "当期純利益",
+    "total_assets": "総資産",
+    "net_assets": "純資産",
+    "equity_ratio_pct": "自己資本比率(%)",
+    "cfo": "営業CF",
+    "cfi": "投資CF",
+    "cff": "財務CF",
+}
 
-    ctxs = _contexts(tree)
-    order = _pick_best_context_ids(ctxs)
+def _collect_fact(cands: Dict[str, Dict[Optional[str], float]], tag_or_name: str, text: str, attrs: dict, unit_hint: str) -> None:
+    """canon 候補を context 毎に積む（同一 context では文書順で最初の値を採用）。"""
+    canon = _canon_from_label_or_tag(tag_or_name) or _canon_from_label_or_tag(text)
+    if not canon:
+        return
+    xval = _xval_from_fact(text, attrs, unit_hint)
+    if xval.value is None:
+        return
+    mult = _infer_unit_multiplier((attrs.get("unitRef") or "") + " " + tag_or_name + " " + text)
+    cands.setdefault(canon, {}).setdefault(attrs.get("contextRef"), float(xval.value) * mult)
 
+def _finalize(cands: Dict[str, Dict[Optional[str], float]], ctxs: ContextIndex) -> Dict[str, Dict[str, float]]:
     picked: Dict[str, Tuple[float, int]] = {}  # canon -> (value, rank)
-    for tag_or_name, text, attrs in _iter_facts(tree):
-        canon = _canon_from_label_or_tag(tag_or_name) or _canon_from_label_or_tag(text)
-        if not canon:
-            continue
-        ctx_id = attrs.get("contextRef")
-        rank = order.index(ctx_id) if ctx_id in order else len(order) + 1
-        xval = _xval_from_fact(text, attrs, unit_hint)
-        if xval.value is None:
-            continue
-        mult = _infer_unit_multiplier((attrs.get("unitRef") or "") + " " + tag_or_name + " " + text)
-        val = float(xval.value) * mult
-        # より良い rank（小さい方）を採用
-        if (canon not in picked) or (rank < picked[canon][1]):
-            picked[canon] = (val, rank)
+    for canon, by_ctx in cands.items():
+        for ctx_id, val in by_ctx.items():
+            rank = ctxs.rank_of(ctx_id)
+            # より良い rank（小さい方）を採用
+            if (canon not in picked) or (rank < picked[canon][1]):
+                picked[canon] = (val, rank)
 
     sections = {"PL": {}, "BS": {}, "CF": {}}
-    label = {
-        "revenue": "売上高",
-        "operating_income": "営業利益",
-        "net_income": "当期純利益",
-        "total_assets": "総資産",
-        "net_assets": "純資産",
-        "equity_ratio_pct": "自己資本比率(%)",
-        "cfo": "営業CF",
-        "cfi": "投資CF",
-        "cff": "財務CF",
-    }
     for canon, (v, _) in picked.items():
         sec = CANON2SECTION.get(canon, "PL")
-        sections[sec][label.get(canon, canon)] = v
+        sections[sec][_LABEL.get(canon, canon)] = v
     return sections
 
-def parse_edinet_zip_file(path_or_bytes: Union[str, bytes]) -> Dict[str, Dict[str, float]]:
+_Cands = Dict[str, Dict[Optional[str], float]]
+
+def _stream_collect(open_src: Callable[[], IO[bytes]], unit_hint: str) -> Tuple[_Cands, ContextIndex]:
+    def run(html: bool):
+        ctxs = ContextIndex()
+        cands: _Cands = {}
+        with open_src() as fp:
+            for kind, key, payload in _iterparse_xbrl(fp, html=html):
+                if kind == "context":
+                    ctxs.add(payload)
+                else:
+                    text, attrs = payload
+                    _collect_fact(cands, key, text, attrs, unit_hint)
+        return cands, ctxs
+
+    try:
+        return run(html=False)
+    except etree.XMLSyntaxError:
+        # _parse_any_xbrl と同様に HTML パーサで読み直す
+        return run(html=True)
+
+def _tree_collect(tree: etree._ElementTree, unit_hint: str) -> Tuple[_Cands, ContextIndex]:
+    cands: _Cands = {}
+    for tag_or_name, text, attrs in _iter_facts(tree):
+        _collect_fact(cands, tag_or_name, text, attrs, unit_hint)
+    return cands, ContextIndex.from_tree(tree)
+
+def _parse_streaming(open_src: Callable[[], IO[bytes]], unit_hint: str) -> Dict[str, Dict[str, float]]:
+    return _finalize(*_stream_collect(open_src, unit_hint))
+
+def _parse_tree(tree: etree._ElementTree, unit_hint: str) -> Dict[str, Dict[str, float]]:
+    return _finalize(*_tree_collect(tree, unit_hint))
+
+# iXBRL 分割提出（表紙・各財務諸表・注記…）の並列解析
+IX_MAX_WORKERS = 8
+
+def _parse_inline_set(pkg: EdinetPackage, members: List[str], streaming: bool) -> Dict[str, Dict[str, float]]:
+    """全 iXBRL メンバーをスレッドプールで解析し、context と fact を1つに統合する。
+
+    DOM モードでは各メンバーを bytes から etree.fromstring で解析する（libxml2 が GIL を
+    解放するため並列に進み、所要時間は最大メンバーにほぼ比例）。
+    """
+    def work(name: str) -> Tuple[_Cands, ContextIndex]:
+        if streaming:
+            return _stream_collect(lambda: pkg.open(name), "zip")
+        return _tree_collect(_parse_any_xbrl(pkg.zf.read(name)), "zip")
+
+    if len(members) == 1:
+        parts = [work(members[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(members), IX_MAX_WORKERS)) as ex:
+            parts = list(ex.map(work, members))  # メンバー順を保持
+    return _finalize(*_merge_parts(parts))
+
+def _merge_parts(parts: List[Tuple[_Cands, ContextIndex]]) -> Tuple[_Cands, ContextIndex]:
+    """メンバーごとの (fact 候補, context) を1つに統合する（同じ context の fact は先のメンバーを優先）。"""
+    merged: _Cands = {}
+    ctxs = ContextIndex()
+    for cands, part_ctxs in parts:
+        for c in part_ctxs.contexts.values():
+            if c.id not in ctxs.contexts:
+                ctxs.add(c)
+        for canon, by_ctx in cands.items():
+            dst = merged.setdefault(canon, {})
+            for ctx_id, val in by_ctx.items():
+                dst.setdefault(ctx_id, val)
+    return merged, ctxs
+
+def _parse_package(pkg: EdinetPackage, streaming: bool) -> Dict[str, Dict[str, float]]:
+    if not pkg.instances():
+        ix_members = pkg.inline_instances()
+        if ix_members:
+            return _parse_inline_set(pkg, ix_members, streaming)
+    member = pkg.primary_instance()
+    open_member = lambda: pkg.open(member)  # 伸長しながら直接パーサへ流す
+    if streaming:
+        return _parse_streaming(open_member, "zip")
+    return _parse_tree(_parse_any_xbrl(open_member), "zip")
+
+def _parse_financials(z_or_x_bytes: bytes, streaming: bool = False) -> Dict[str, Dict[str, float]]:
+    if zipfile.is_zipfile(io.BytesIO(z_or_x_bytes)):
+        with EdinetPackage(z_or_x_bytes) as pkg:
+            return _parse_package(pkg, streaming)
+    if streaming:
+        return _parse_streaming(lambda: io.BytesIO(z_or_x_bytes), "raw")
+    return _parse_tree(_parse_any_xbrl(z_or_x_bytes), "raw")
+
+@cached_parse("edinet_parser_v2", PARSER_VERSION)
+def parse_financials_from_xbrl_bytes(z_or_x_bytes: bytes, streaming: bool = False) -> Dict[str, Dict[str, float]]:
+    """XBRL/iXBRL（または EDINET zip）から PL/BS/CF の主要項目を抽出する。
+
+    streaming=True では DOM を構築せず iterparse の1パスで context と fact を
+    集めるため、巨大な有報 iXBRL でもピークメモリが文書サイズに比例しない。
+    結果は入力の sha256 をキーに parsing.cache へ保存される。
+    """
+    return _parse_financials(z_or_x_bytes, streaming=streaming)
+
+@cached_parse("edinet_parser_v2", PARSER_VERSION)
+def parse_edinet_zip_file(path_or_bytes: Union[str, bytes], streaming: bool = False) -> Dict[str, Dict[str, float]]:
     if isinstance(path_or_bytes, (bytes, bytearray)):
-        return parse_financials_from_xbrl_bytes(path_or_bytes)
+        return _parse_financials(path_or_bytes, streaming=streaming)
+    if zipfile.is_zipfile(path_or_bytes):
+        # zip を mmap し、主インスタンスだけを central directory から特定して読む
+        with EdinetPackage(path_or_bytes) as pkg:
+            return _parse_package(pkg, streaming)
     with open(path_or_bytes, "rb") as f:
-        return parse_financials_from_xbrl_bytes(f.read())
+        return _parse_financials(f.read(), streaming=streaming)
+
+
+# ===== FactFrame：全数値 fact の列指向抽出 =====
+_DEC_INF = 32767    # decimals="INF"
+_DEC_NONE = -32768  # decimals 属性なし
+_BIG_ENDIAN = sys.byteorder == "big"  # ファイル上は常に little-endian
+
+class _Interner:
+    """文字列 -> 連番 id の辞書（列の値は id で持つ）。"""
+    __slots__ = ("ids", "values")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+        for v in values:
+            self.id(v)
+
+    def id(self, s: str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.values)
+            self.values.append(s)
+        return i
+
+def _dim_key(dims: Tuple[Tuple[str, str], ...]) -> str:
+    return ";".join(f"{ax}={mem}" for ax, mem in sorted(dims))
+
+def _decimals_code(raw: Optional[str]) -> int:
+    if raw is None:
+        return _DEC_NONE
+    if raw.strip().upper() == "INF":
+        return _DEC_INF
+    try:
+        return max(-32767, min(32766, int(raw)))
+    except ValueError:
+        return _DEC_NONE
+
+class FactFrame:
+    """文書内の全数値 fact を並列な型付き配列で保持する。
+
+    列: concept / context / unit / dim（各辞書の id, uint32）、scale（int8）、
+    decimals（int16。INF=32767, なし=-32768）、value（float64。scale・sign 適用済み）。
+    context 毎の期間（"start/end" または instant）と次元キーも辞書として持つ。
+    """
+
+    MAGIC = b"FFRM"
+    VERSION = 1
+    _COLUMNS = (("concept", "I"), ("context", "I"), ("unit", "I"), ("dim", "I"),
+                ("scale", "b"), ("decimals", "h"), ("value", "d"))
+    _INTERNERS = ("concepts", "contexts", "units", "dims")
+
+    def __init__(self) -> None:
+        self.concepts = _Interner()
+        self.contexts = _Interner()
+        self.units = _Interner()
+        self.dims = _Interner([""])  # 0 = 次元なし
+        self.context_period: Dict[int, str] = {}
+        self.context_dim: Dict[int, int] = {}
+        for name, code in self._COLUMNS:
+            setattr(self, name, array(code))
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def _append(self, concept: str, ctx_id: str, unit: str, scale: int, decimals: int, value: float) -> None:
+        self.concept.append(self.concepts.id(concept))
+        self.context.append(self.contexts.id(ctx_id))
+        self.unit.append(self.units.id(unit))
+        self.dim.append(0)  # context 確定後に _resolve_dims で埋める
+        self.scale.append(max(-128, min(127, scale)))
+        self.decimals.append(decimals)
+        self.value.append(value)
+
+    def _add_context(self, ctx: Context) -> None:
+        cid = self.contexts.id(ctx.id)
+        self.context_period[cid] = f"{ctx.start}/{ctx.end}" if ctx.period_type == "duration" else (ctx.instant or "")
+        self.context_dim[cid] = self.dims.id(_dim_key(ctx.dims))
+
+    def _mark(self) -> tuple:
+        """_rollback 用に行数・辞書・context 表の状態を控える。"""
+        return (len(self), {name: len(getattr(self, name).values) for name in self._INTERNERS},
+                dict(self.context_period), dict(self.context_dim))
+
+    def _rollback(self, mark: tuple) -> None:
+        """_mark 以降に積んだもの（解析に失敗したメンバー分）をすべて捨てる。"""
+        n, sizes, self.context_period, self.context_dim = mark
+        for name, _ in self._COLUMNS:
+            del getattr(self, name)[n:]
+        for name, size in sizes.items():
+            interner = getattr(self, name)
+            for v in interner.values[size:]:
+                del interner.ids[v]
+            del interner.values[size:]
+
+    def _resolve_dims(self) -> None:
+        cd = self.context_dim
+        self.dim = array("I", (cd.get(c, 0) for c in self.context))
+
+    # --- 参照 ---
+    def rows(self, concept: Optional[str] = None, dim: Optional[str] = None) -> Iterator[dict]:
+        """concept（QName）/ dim（次元キー、"" は次元なし）で絞り込んだ行を返す。"""
+        cid = self.concepts.ids.get(concept) if concept is not None else None
+        did = self.dims.ids.get(dim) if dim is not None else None
+        if (concept is not None and cid is None) or (dim is not None and did is None):
+            return
+        for i in range(len(self)):
+            if cid is not None and self.concept[i] != cid:
+                continue
+            if did is not None and self.dim[i] != did:
+                continue
+            ctx = self.context[i]
+            dec = self.decimals[i]
+            yield {
+                "concept": self.concepts.values[self.concept[i]],
+                "context": self.contexts.values[ctx],
+                "period": self.context_period.get(ctx, ""),
+                "dims": self.dims.values[self.dim[i]],
+                "unit": self.units.values[self.unit[i]],
+                "scale": self.scale[i],
+                "decimals": None if dec == _DEC_NONE else ("INF" if dec == _DEC_INF else dec),
+                "value": self.value[i],
+            }
+
+    # --- 直列化（zlib 圧縮した JSON ヘッダ + little-endian の生配列） ---
+    def to_bytes(self) -> bytes:
+        header = {
+            "concepts": self.concepts.values,
+            "contexts": self.contexts.values,
+            "units": self.units.values,
+            "dims": self.dims.values,
+            "context_period": {str(k): v for k, v in self.context_period.items()},
+            "context_dim": {str(k): v for k, v in self.context_dim.items()},
+            "n": len(self),
+        }
+        hb = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        parts = [struct.pack("<I", len(hb)), hb]
+        for name, _ in self._COLUMNS:
+            col = array(getattr(self, name).typecode, getattr(self, name))
+            if _BIG_ENDIAN:
+                col.byteswap()
+            parts.append(col.tobytes())
+        return self.MAGIC + struct.pack("<H", self.VERSION) + zlib.compress(b"".join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FactFrame":
+        if data[:4] != cls.MAGIC:
+            raise ValueError("FactFrame 形式ではありません")
+        (version,) = struct.unpack_from("<H", data, 4)
+        if version != cls.VERSION:
+            raise ValueError(f"未対応の FactFrame バージョン: {version}")
+        body = zlib.decompress(data[6:])
+        (hlen,) = struct.unpack_from("<I", body, 0)
+        header = json.loads(body[4:4 + hlen].decode("utf-8"))
+        ff = cls()
+        ff.concepts = _Interner(header["concepts"])
+        ff.contexts = _Interner(header["contexts"])
+        ff.units = _Interner(header["units"])
+        ff.dims = _Interner(header["dims"])
+        ff.context_period = {int(k): v for k, v in header["context_period"].items()}
+        ff.context_dim = {int(k): v for k, v in header["context_dim"].items()}
+        n, pos = header["n"], 4 + hlen
+        for name, code in cls._COLUMNS:
+            col = array(code)
+            size = n * col.itemsize
+            col.frombytes(body[pos:pos + size])
+            if _BIG_ENDIAN:
+                col.byteswap()
+            setattr(ff, name, col)
+            pos += size
+        return ff
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "FactFrame":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def _numeric_fact(ff: FactFrame, name: str, text: str, attrs: dict) -> None:
+    unit = attrs.get("unitRef")
+    if not unit:
+        return  # unitRef を持たない fact は非数値
+    v = _to_float(text)
+    if v is None:
+        return
+    try:
+        scale = int(attrs.get("scale") or 0)
+    except ValueError:
+        scale = 0
+    if scale:
+        v *= 10 ** scale
+    if attrs.get("sign") == "-":  # ix:nonFraction の符号
+        v = -v
+    ff._append(name, attrs.get("contextRef") or "", unit, scale, _decimals_code(attrs.get("decimals")), v)
+
+def _fact_frame_streaming(open_srcs: List[Callable[[], IO[bytes]]], html_retry: bool = True) -> FactFrame:
+    """1つ以上の文書（iXBRL 分割提出の各メンバー）を順に流し込み1つの FactFrame にする。
+
+    XML として壊れた文書は html_retry=True なら HTML パーサで読み直し、False なら
+    XMLSyntaxError をそのまま送出する。
+    """
+    ff = FactFrame()
+
+    def run(open_src: Callable[[], IO[bytes]], html: bool) -> None:
+        with open_src() as fp:
+            for kind, key, payload in _iterparse_xbrl(fp, html=html):
+                if kind == "context":
+                    ff._add_context(payload)
+                else:
+                    text, attrs = payload
+                    _numeric_fact(ff, key, text, attrs)
+
+    for open_src in open_srcs:
+        mark = ff._mark()
+        try:
+            run(open_src, html=False)
+        except etree.XMLSyntaxError:
+            # 途中まで積んだ行・context・辞書を捨ててから読み直す
+            ff._rollback(mark)
+            if not html_retry:
+                raise
+            run(open_src, html=True)
+    ff._resolve_dims()
+    return ff
+
+def extract_fact_frame(src: Union[str, bytes]) -> FactFrame:
+    """EDINET zip / XBRL / iXBRL（パスまたは bytes）から全数値 fact の FactFrame を作る。"""
+    is_bytes = isinstance(src, (bytes, bytearray))
+    if zipfile.is_zipfile(io.BytesIO(src) if is_bytes else src):
+        with EdinetPackage(src) as pkg:
+            inline = pkg.inline_instances()
+            if pkg.instances():
+                primary = pkg.primary_instance()
+                try:
+                    return _fact_frame_streaming([lambda: pkg.open(primary)], html_retry=not inline)
+                except etree.XMLSyntaxError:
+                    pass  # 壊れた XBRL インスタンスの代わりに iXBRL を新しい FactFrame で読む
+            members = inline or [pkg.primary_instance()]
+            return _fact_frame_streaming([(lambda m=m: pkg.open(m)) for m in members])
+    if is_bytes:
+        return _fact_frame_streaming([lambda: io.BytesIO(src)])
+    return _fact_frame_streaming([lambda: open(src, "rb")])
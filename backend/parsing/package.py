@@ -0,0 +1,132 @@
+# backend/parsing/package.py
+"""Zero-copy access to EDINET submission zips.
+
+The zip is memory-mapped and only its central directory is read up front.
+Members are decompressed on demand as streaming file objects, so a filing is
+inflated once, directly into the parser, and never held as a second bytes copy.
+
+    with EdinetPackage(path) as pkg:
+        with pkg.open(pkg.primary_instance()) as fp:
+            etree.parse(fp)
+"""
+from __future__ import annotations
+import io
+import mmap
+import zipfile
+from pathlib import Path
+from typing import IO, List, Optional, Sequence, Union
+
+INSTANCE_SUFFIXES = (".xbrl",)
+INLINE_SUFFIXES = (".htm", ".html", ".xhtml")
+
+
+class _MappedFile:
+    """Minimal seekable file interface over an mmap (mmap.seekable() needs 3.13+)."""
+
+    def __init__(self, mm: mmap.mmap):
+        self._mm = mm
+
+    def read(self, n: int = -1) -> bytes:
+        return self._mm.read(n if n is not None and n >= 0 else None)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self) -> int:
+        return self._mm.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+
+def _instance_priority(name: str) -> tuple:
+    n = name.replace("\\", "/").lower()
+    # PublicDoc の本体 > その他 > AuditDoc（監査報告書）
+    if "/auditdoc/" in n or "jpaud" in n.rsplit("/", 1)[-1]:
+        where = 2
+    elif "/publicdoc/" in n:
+        where = 0
+    else:
+        where = 1
+    return (where, name)
+
+
+class EdinetPackage:
+    """Read-only view over an EDINET zip (path, bytes, or binary file object)."""
+
+    def __init__(self, src: Union[str, Path, bytes, bytearray, IO[bytes]]):
+        self._file: Optional[IO[bytes]] = None
+        self._mm: Optional[mmap.mmap] = None
+        if isinstance(src, (str, Path)):
+            self._file = open(src, "rb")
+            try:
+                self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                self._file.close()
+                raise zipfile.BadZipFile(f"empty file: {src}")
+            fp: IO[bytes] = _MappedFile(self._mm)  # type: ignore[assignment]
+        elif isinstance(src, (bytes, bytearray)):
+            fp = io.BytesIO(src)
+        else:
+            fp = src
+        try:
+            self.zf = zipfile.ZipFile(fp)
+        except Exception:
+            self.close()
+            raise
+        self.names: List[str] = self.zf.namelist()
+
+    def __enter__(self) -> "EdinetPackage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, "zf", None) is not None:
+            self.zf.close()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def members(self, suffixes: Sequence[str]) -> List[str]:
+        suffixes = tuple(s.lower() for s in suffixes)
+        return [n for n in self.names if n.lower().endswith(suffixes)]
+
+    def instances(self) -> List[str]:
+        """XBRL instance documents, primary (PublicDoc) first."""
+        return sorted(self.members(INSTANCE_SUFFIXES), key=_instance_priority)
+
+    def filing_instances(self) -> List[str]:
+        """XBRL instances of the filing itself (audit reports excluded), primary first."""
+        return [n for n in self.instances() if _instance_priority(n)[0] < 2]
+
+    def inline_documents(self) -> List[str]:
+        """Inline XBRL documents, PublicDoc first."""
+        return sorted(self.members(INLINE_SUFFIXES), key=_instance_priority)
+
+    def inline_instances(self) -> List[str]:
+        """Inline XBRL members of the filing itself (no audit reports), in name order.
+
+        EDINET splits a submission into *_ixbrl.htm files (header, each statement,
+        notes); other .htm members are used only if no such file exists.
+        """
+        public = [n for n in self.inline_documents() if _instance_priority(n)[0] < 2]
+        return [n for n in public if n.lower().endswith("_ixbrl.htm")] or public
+
+    def primary_instance(self) -> str:
+        names = self.instances() or self.inline_documents()
+        if not names:
+            raise ValueError("XBRL/iXBRL ファイルが見つかりません")
+        return names[0]
+
+    def open(self, name: str) -> IO[bytes]:
+        """Streaming (decompress-on-read) file object for a member."""
+        return self.zf.open(name)
+
+    def size(self, name: str) -> int:
+        return self.zf.getinfo(name).file_size
@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 from pathlib import Path
-from zipfile import ZipFile
+import mmap
 import re
 from typing import Dict, Optional
 
-_NUMBER_RX = re.compile(r"[-+]?\d{1,3}(?:[,\s]\d{3})*(?:\.\d+)?|[-+]?\d+(?:\.\d+)?")
-_TAG_VALUE_RX = re.compile(r">\s*([^<]+)\s*<")
+from .cache import cached_parse
+from .package import EdinetPackage
+
+# Bump when parse output changes (invalidates cached results)
+PARSER_VERSION = "4"
+
+# 桁区切りありを先に試す。区切りなしの "5000" は 2 つ目の選択肢で全桁を読む
+# （旧実装は (?:...)* だったため "5000" が 500 になっていた）
+_NUMBER_RX = re.compile(r"[-+]?\d{1,3}(?:[,\s]\d{3})+(?:\.\d+)?|[-+]?\d+(?:\.\d+)?")
 
 # Tag synonyms (order matters: earlier = higher priority)
 PL_TAGS = {
@@ -96,42 +103,112 @@ def _to_float(s: str) -> Optional[float]:
         return None
 
 
-def _extract_first(xml: str, tag_names: list[str]) -> Optional[float]:
-    for t in tag_names:
-        # capture text value between >...< for any element matching local/qualified name
-        pat_open = re.compile(rf"<[^:]*:?{re.escape(t.split(':')[-1])}[^>]*>", re.IGNORECASE)
-        for m in pat_open.finditer(xml):
-            # slice forward to the closing angle and read following text until '<'
-            start = m.end()
-            mval = _TAG_VALUE_RX.search(xml, start)
-            if mval:
-                v = _to_float(mval.group(1))
-                if v is not None:
-                    return v
-    return None
-
-
-def _extract_period(xml: str) -> str:
-    for t in PERIOD_TAGS:
-        pat = re.compile(rf"<[^:]*:?{re.escape(t.split(':')[-1])}[^>]*>\s*([^<]+)\s*<", re.IGNORECASE)
-        m = pat.search(xml)
-        if m:
-            raw = m.group(1).strip()
-            # Normalize to FYyyyy if possible
-            y = re.search(r"(20\d{2}|19\d{2})", raw)
-            if y:
-                return f"FY{y.group(1)}"
-            return raw
-    # fallback: try find any 4-digit year
-    y = re.search(r"(20\d{2}|19\d{2})", xml)
-    return f"FY{y.group(1)}" if y else ""
+_YEAR_RX = re.compile(r"(20\d{2}|19\d{2})")
+
+# local-name（小文字）-> [(section, key, priority)] の dispatch table（import 時に構築）
+_PERIOD_END_LOCALS = ("endDate", "instant")
+
+
+def _build_dispatch() -> Dict[bytes, list]:
+    table: Dict[bytes, list] = {}
+    for section, tags in (("PL", PL_TAGS), ("BS", BS_TAGS), ("CF", CF_TAGS)):
+        for key, names in tags.items():
+            for prio, t in enumerate(names):
+                entries = table.setdefault(t.split(":")[-1].lower().encode(), [])
+                # 同じ local-name の重複は最初（高優先）のみ
+                if not any(e[0] == section and e[1] == key for e in entries):
+                    entries.append((section, key, prio))
+    for prio, t in enumerate(PERIOD_TAGS):
+        entries = table.setdefault(t.split(":")[-1].lower().encode(), [])
+        if not any(e[0] == "period" for e in entries):
+            entries.append(("period", "", prio))
+    for local in _PERIOD_END_LOCALS:
+        table.setdefault(local.lower().encode(), []).append(("period_end", "", 0))
+    return table
+
 
+_DISPATCH = _build_dispatch()
+# 全ターゲットを1本の正規表現に: <prefix:Local attrs>text<
+# 旧実装と同じく大文字小文字は区別しない。local-name は完全一致（旧実装は前方一致で、
+# NetSales が NetSalesOfCompletedConstructionContracts にも当たっていた）
+_TARGET_RX = re.compile(
+    rb"<(?:[A-Za-z_][\w.\-]*:)?("
+    + b"|".join(re.escape(k) for k in sorted(_DISPATCH, key=len, reverse=True))
+    + rb")(?:\s[^>]*)?(?<!/)>([^<]*)<",
+    re.IGNORECASE,
+)
 
+
+class _MemberScanner:
+    """1メンバーを1回だけ走査し、全ターゲットの値を優先度付きで集める。
+
+    bytes / bytearray / mmap をそのまま、またはチャンク単位で feed できる（str へのデコード不要）。
+    """
+
+    def __init__(self) -> None:
+        self.best: Dict[tuple, tuple] = {}  # (section, key) -> (priority, value)
+        self.max_end_year: Optional[str] = None
+        self._tail = b""
+
+    def feed(self, chunk) -> None:
+        buf = self._tail + bytes(chunk) if self._tail else chunk
+        last = buf.rfind(b"<")
+        if last < 0:
+            self._tail = b""
+            return
+        for m in _TARGET_RX.finditer(buf, 0, last + 1):
+            raw = m.group(2).decode("utf-8", errors="ignore").strip()
+            if not raw:
+                continue
+            for section, key, prio in _DISPATCH[m.group(1).lower()]:
+                if section == "period_end":
+                    y = _YEAR_RX.search(raw)
+                    if y and (self.max_end_year is None or y.group(1) > self.max_end_year):
+                        self.max_end_year = y.group(1)
+                    continue
+                cur = self.best.get((section, key))
+                if cur is not None and cur[0] <= prio:
+                    continue
+                val = raw if section == "period" else _to_float(raw)
+                if val is not None:
+                    self.best[(section, key)] = (prio, val)
+        # 未完了の可能性がある最後の '<' 以降は次のチャンクへ持ち越す
+        self._tail = bytes(buf[last:])
+
+    def value(self, section: str, key: str):
+        hit = self.best.get((section, key))
+        return hit[1] if hit else None
+
+    def period(self) -> str:
+        raw = self.value("period", "")
+        if raw:
+            # Normalize to FYyyyy if possible
+            y = _YEAR_RX.search(raw)
+            return f"FY{y.group(1)}" if y else raw
+        # fallback: latest context end date
+        return f"FY{self.max_end_year}" if self.max_end_year else ""
+
+
+def _scan_member(fp, chunk_size: int = 1 << 20) -> _MemberScanner:
+    sc = _MemberScanner()
+    if isinstance(fp, (bytes, bytearray, mmap.mmap)):
+        sc.feed(fp)
+        return sc
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        sc.feed(chunk)
+    return sc
+
+
+@cached_parse("xbrl_parser", PARSER_VERSION)
 def parse_xbrl_zip(zip_path: Path) -> Dict[str, dict]:
     """
     Best-effort parser for EDINET XBRL ZIP.
     Returns dict with keys: period (str), PL/BS/CF (dicts of floats or None).
     Safe on malformed ZIP/XBRL (returns None-valued structure).
+    Each member is streamed through a single-pass scanner (no decoded str copy).
     """
     pl: Dict[str, Optional[float]] = {k: None for k in PL_TAGS}
     bs: Dict[str, Optional[float]] = {k: None for k in BS_TAGS}
@@ -139,26 +216,22 @@ def parse_xbrl_zip(zip_path: Path) -> Dict[str, dict]:
     period: str = ""
 
     try:
-        with ZipFile(zip_path) as z:
-            # Prefer .xbrl/.xml
-            xbrl_names = [n for n in z.namelist() if n.lower().endswith((".xbrl", ".xml"))]
+        with EdinetPackage(zip_path) as pkg:
+            # Prefer .xbrl/.xml (primary PublicDoc instance first)
+            xbrl_names = pkg.instances() + [n for n in pkg.members((".xml",))]
             for name in xbrl_names:
                 try:
-                    xml = z.read(name).decode("utf-8", errors="ignore")
+                    with pkg.open(name) as fp:
+                        sc = _scan_member(fp)
                 except Exception:
                     continue
                 if not period:
-                    period = _extract_period(xml)
+                    period = sc.period()
                 # Fill PL/BS/CF if missing
-                for k, tags in PL_TAGS.items():
-                    if pl[k] is None:
-                        pl[k] = _extract_first(xml, tags)
-                for k, tags in BS_TAGS.items():
-                    if bs[k] is None:
-                        bs[k] = _extract_first(xml, tags)
-                for k, tags in CF_TAGS.items():
-                    if cf[k] is None:
-                        cf[k] = _extract_first(xml, tags)
+                for section, out in (("PL", pl), ("BS", bs), ("CF", cf)):
+                    for k in out:
+                        if out[k] is None:
+                            out[k] = sc.value(section, k)
                 # Stop early if we have a decent set
                 if any(pl.values()) and any(bs.values()):
                     break
@@ -1,45 +1,12 @@
-
-from storage.db import SessionLocal
-from storage.models import CompanyRef
-
-SEED = [
-    {"company_id":"7203", "name":"トヨタ自動車", "edinet_code":"E02144", "jq_code":"72030"},
-    {"company_id":"6758", "name":"ソニーグループ", "edinet_code":"E05714", "jq_code":"67580"},
-    {"company_id":"7974", "name":"任天堂", "edinet_code":"E02367", "jq_code":"79740"},
-    {"company_id":"9984", "name":"ソフトバンクG", "edinet_code":"E02778", "jq_code":"99840"},
-]
-
-def ensure_seed():
-    db = SessionLocal()
-    try:
-        for c in SEED:
-            ex = db.query(CompanyRef).filter(CompanyRef.company_id==c["company_id"]).first()
-            if not ex:
-                db.add(CompanyRef(**c))
-        db.commit()
-    finally:
-        db.close()
-
-def search_companies(q: str):
-    db = SessionLocal()
-    try:
-        ql = q.strip().lower()
-        rows = db.query(CompanyRef).all()
-        out = []
-        for r in rows:
-            if ql in r.company_id.lower() or ql in r.name.lower():
-                out.append({"id": r.company_id, "name": r.name, "edinet_code": r.edinet_code, "jq_code": r.jq_code})
-        return out
-    finally:
-        db.close()
-
-
 from __future__ import annotations
-from typing import List, Dict
-from sqlalchemy import or_
+from typing import TYPE_CHECKING, List, Dict
+from sqlalchemy import or_, select
 from storage.db import SessionLocal
 from storage.models import CompanyRef
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 SEED: List[Dict[str, str]] = [
     {"company_id": "7203", "name": "トヨタ自動車", "edinet_code": "E02144", "jq_code": "72030"},
     {"company_id": "6758", "name": "ソニーグループ", "edinet_code": "E05714", "jq_code": "67580"},
@@ -71,6 +38,45 @@ def ensure_seed() -> None:
         db.close()
 
 
+def _candidates(ql: str, limit: int):
+    # まずは LIKE で候補を絞る（全件走査を回避）
+    return (
+        select(CompanyRef.company_id, CompanyRef.name, CompanyRef.edinet_code, CompanyRef.jq_code)
+        .where(
+            or_(
+                CompanyRef.company_id.ilike(f"%{ql}%"),
+                CompanyRef.name.ilike(f"%{ql}%"),
+            )
+        )
+        .limit(max(limit * 3, 50))
+    )
+
+
+def _rank(candidates, ql: str, limit: int) -> List[Dict[str, str]]:
+    def score(row) -> int:
+        id_l = (row.company_id or "").lower()
+        nm_l = (row.name or "").lower()
+        s = 0
+        if ql == id_l or ql == nm_l:
+            s += 100  # 完全一致
+        if id_l.startswith(ql) or nm_l.startswith(ql):
+            s += 50   # 前方一致
+        if ql in id_l or ql in nm_l:
+            s += 10   # 部分一致
+        return s
+
+    ranked = sorted(candidates, key=score, reverse=True)[:limit]
+    return [
+        {
+            "id": r.company_id,
+            "name": r.name,
+            "edinet_code": r.edinet_code,
+            "jq_code": r.jq_code,
+        }
+        for r in ranked
+    ]
+
+
 def search_companies(q: str, limit: int = 20):
     """Lightweight search with ranking.
 
@@ -85,40 +91,15 @@ def search_companies(q: str, limit: int = 20):
 
     db = SessionLocal()
     try:
-        # まずは LIKE で候補を絞る（全件走査を回避）
-        candidates = (
-            db.query(CompanyRef)
-            .filter(
-                or_(
-                    CompanyRef.company_id.ilike(f"%{ql}%"),
-                    CompanyRef.name.ilike(f"%{ql}%"),
-                )
-            )
-            .limit(max(limit * 3, 50))
-            .all()
-        )
+        return _rank(db.execute(_candidates(ql, limit)).all(), ql, limit)
+    finally:
+        db.close()
 
-        def score(row: CompanyRef) -> int:
-            id_l = (row.company_id or "").lower()
-            nm_l = (row.name or "").lower()
-            s = 0
-            if ql == id_l or ql == nm_l:
-                s += 100  # 完全一致
-            if id_l.startswith(ql) or nm_l.startswith(ql):
-                s += 50   # 前方一致
-            if ql in id_l or ql in nm_l:
-                s += 10   # 部分一致
-            return s
 
-        ranked = sorted(candidates, key=score, reverse=True)[:limit]
-        return [
-            {
-                "id": r.company_id,
-                "name": r.name,
-                "edinet_code": r.edinet_code,
-                "jq_code": r.jq_code,
-            }
-            for r in ranked
-        ]
-    finally:
-        db.close()
\ No newline at end of file
+async def search_companies_async(db: AsyncSession, q: str, limit: int = 20):
+    """search_companies() on a request-scoped AsyncSession (storage.db.get_async_db)."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    ql = q.lower()
+    return _rank((await db.execute(_candidates(ql, limit))).all(), ql, limit)
@@ -1,53 +1,109 @@
-
 from __future__ import annotations
-from typing import Dict
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from loguru import logger
 from storage.db import SessionLocal
-from storage.models import FinancialSnapshot, CompanyRef
-from ingestion.jquants_downloader import get_statements
+from storage.models import CompanyRef, SyncState
+from storage.snapshots import upsert_snapshots
+from ingestion import upstream
+from ingestion.edinet_client import date_range
+from ingestion.filing_index import today_jst
+from ingestion.jquants_downloader import get_statements, get_statements_by_date
 from ingestion.edinet_downloader import get_latest_financials_from_edinet_by_code
 
 
-_DEF_START = "2023-01-01"
-_DEF_END = "2025-12-31"
+_DEF_START = "2023-01-01"  # first day synced for a company without a watermark
+
+
+def _snapshot_row(company_id: str, it: Dict[str, Any], source: str) -> Dict[str, Any]:
+    return {
+        "company_id": company_id,
+        "period": it.get("period", ""),
+        "period_end": it.get("period_end"),
+        "pl": it.get("pl", {}),
+        "bs": it.get("bs", {}),
+        "cf": it.get("cf", {}),
+        "source": source,
+    }
+
+
+def shift_day(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def sync_state(db, company_id: str, source: str) -> SyncState:
+    """The (company, source) watermark row; created (unsaved until commit) if missing."""
+    st = db.query(SyncState).filter(SyncState.company_id == company_id, SyncState.source == source).first()
+    if st is None:
+        st = SyncState(company_id=company_id, source=source, synced_through=None, doc_ids=[])
+        db.add(st)
+    return st
+
+
+def sync_start(st: SyncState) -> str:
+    """First day not covered by the watermark."""
+    return shift_day(st.synced_through, 1) if st.synced_through else _DEF_START
 
 
-def _key(period: str, source: str) -> tuple[str, str]:
-    return (str(period or ""), str(source or ""))
+def advance_sync(st: SyncState, through: str, doc_ids: Iterable[str] = ()) -> None:
+    """Move the watermark forward (never back) and remember ingested docIDs."""
+    if not st.synced_through or through > st.synced_through:
+        st.synced_through = through
+    new = set(doc_ids) - set(st.doc_ids or [])
+    if new:
+        st.doc_ids = sorted(set(st.doc_ids or []) | new)  # 新しい list を代入（JSON 列の変更検知のため）
+    st.updated_at = time.time()
 
 
-def get_financials(company_id: str, period: str = "fy", source: str = "auto") -> Dict[str, Dict[str, int]]:
+def hold_before(through: str, failed_days: Iterable[str]) -> str:
+    """Watermark target that stays before the first day with a failed document (so it is planned again)."""
+    first = min(failed_days, default=None)
+    return min(through, shift_day(first, -1)) if first else through
+
+
+def get_financials(
+    company_id: str, period: str = "fy", source: str = "auto", today: Optional[str] = None, deadline: Optional[float] = None
+) -> Dict[str, Dict[str, int]]:
     """Ingest financials from J-Quants and EDINET into FinancialSnapshot.
 
+    Incremental: each source has a SyncState watermark (last fully synced JST
+    day). J-Quants fetches only statements disclosed after the watermark and
+    is skipped once synced through yesterday; its watermark moves only after
+    a live fetch, so without credentials nothing is stored. EDINET only lists
+    the days after the watermark and skips docIDs already ingested. Today's
+    listing is never final, so the watermark stops at yesterday, and it stays
+    before the first day whose document failed to download or parse.
+
+    deadline: seconds this call may spend on upstream APIs (see
+    ingestion.upstream). A source that runs out of time or whose circuit is
+    open is skipped and keeps its watermark, so the next call retries it.
+
     Returns: {"status": "ok", "inserted": {"jquants": int, "edinet": int}}
     """
+    if deadline is not None:
+        with upstream.deadline(deadline):
+            return get_financials(company_id, period, source, today)
     db = SessionLocal()
     inserted = {"jquants": 0, "edinet": 0}
+    today = today or today_jst()
+    through = shift_day(today, -1)
     try:
-        cached = db.query(FinancialSnapshot).filter(FinancialSnapshot.company_id == company_id).all()
-        existing = {(_key(c.period, c.source)) for c in cached}
-
         # --- J-Quants ---
-        try:
-            jq = get_statements(company_id, period=period) or []
-        except Exception as e:
-            logger.warning(f"J-Quants get_statements failed for {company_id}: {e}")
-            jq = []
-        for it in jq:
-            k = _key(it.get("period", ""), "jquants")
-            if k not in existing:
-                db.add(
-                    FinancialSnapshot(
-                        company_id=company_id,
-                        period=it.get("period", ""),
-                        pl=it.get("pl", {}),
-                        bs=it.get("bs", {}),
-                        cf=it.get("cf", {}),
-                        source="jquants",
-                    )
-                )
-                existing.add(k)
-                inserted["jquants"] += 1
+        jq_state = sync_state(db, company_id, "jquants")
+        jq = []
+        if (jq_state.synced_through or "") < through:
+            try:
+                # 前回の watermark 以降に開示された分だけ取得（認証なし・API エラーは例外: watermark は進めない）
+                jq = get_statements(company_id, period=period, since=sync_start(jq_state), until=today) or []
+                advance_sync(jq_state, through)
+            except Exception as e:
+                logger.warning(f"J-Quants get_statements failed for {company_id}: {e}")
+                jq = []
+        # 新しい開示のみなので、同じ期間の既存行は訂正として更新（内容が同じなら skipped）
+        inserted["jquants"] = upsert_snapshots(
+            (_snapshot_row(company_id, it, "jquants") for it in jq), update=True, db=db
+        )["inserted"]
 
         # --- EDINET ---
         ed_code = None
@@ -58,31 +114,25 @@ def get_financials(company_id: str, period: str = "fy", source: str = "auto") ->
             logger.debug(f"CompanyRef lookup failed for {company_id}: {e}")
             ed_code = None
         if ed_code:
+            ed_state = sync_state(db, company_id, "edinet")
             try:
-                ed = get_latest_financials_from_edinet_by_code(ed_code, start_date=_DEF_START, end_date=_DEF_END) or []
+                failed: List[Tuple[str, str]] = []
+                ed = get_latest_financials_from_edinet_by_code(
+                    ed_code, start_date=sync_start(ed_state), end_date=today, known_doc_ids=set(ed_state.doc_ids or []),
+                    failed=failed,
+                ) or []
+                advance_sync(
+                    ed_state, hold_before(through, (day for _, day in failed)),
+                    (it.get("raw", {}).get("documentId") for it in ed),
+                )
             except Exception as e:
                 logger.warning(f"EDINET fetch failed for {ed_code}: {e}")
                 ed = []
-            for it in ed:
-                k = _key(it.get("period", ""), "edinet")
-                if k not in existing:
-                    db.add(
-                        FinancialSnapshot(
-                            company_id=company_id,
-                            period=it.get("period", ""),
-                            pl=it.get("pl", {}),
-                            bs=it.get("bs", {}),
-                            cf=it.get("cf", {}),
-                            source="edinet",
-                        )
-                    )
-                    existing.add(k)
-                    inserted["edinet"] += 1
-
-        if any(inserted.values()):
-            db.commit()
-        else:
-            db.rollback()  # noop but ensures clean state
+            inserted["edinet"] = upsert_snapshots(
+                (_snapshot_row(company_id, it, "edinet") for it in ed), update=False, db=db
+            )["inserted"]
+
+        db.commit()  # snapshots, facts and watermarks together
         return {"status": "ok", "inserted": inserted}
     except Exception as e:
         db.rollback()
@@ -90,3 +140,61 @@ def get_financials(company_id: str, period: str = "fy", source: str = "auto") ->
         raise
     finally:
         db.close()
+
+
+def _jq_company_map() -> Dict[str, str]:
+    """J-Quants LocalCode (5 digits, e.g. 72030) / 4-digit code -> company_id via CompanyRef.jq_code."""
+    db = SessionLocal()
+    try:
+        out: Dict[str, str] = {}
+        for company_id, jq in db.query(CompanyRef.company_id, CompanyRef.jq_code).filter(CompanyRef.jq_code.isnot(None)):
+            jq = str(jq).strip()
+            out[jq] = company_id
+            if len(jq) == 4:
+                out[jq + "0"] = company_id
+        return out
+    finally:
+        db.close()
+
+
+def _company_for_code(code: str, mapping: Dict[str, str]) -> str:
+    if code in mapping:
+        return mapping[code]
+    # 未登録銘柄は 4 桁コードを company_id とする
+    return code[:4] if len(code) == 5 and code.endswith("0") else code
+
+
+def sweep_jquants_statements(start_date: str, end_date: str) -> Dict[str, Any]:
+    """Bulk-ingest J-Quants statements of all companies by disclosure date.
+
+    One /fins/statements?date=... sweep (plus pagination) per day replaces a
+    request per company. Later disclosures for the same period (corrections)
+    update the stored snapshot.
+
+    Returns: {"status": "ok", "days": int, "statements": int, "inserted": int, "updated": int, "skipped": int}
+    """
+    mapping = _jq_company_map()
+    totals = {"days": 0, "statements": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    for day in date_range(start_date, end_date):
+        try:
+            rows = get_statements_by_date(day)
+        except Exception as e:
+            logger.warning(f"J-Quants statements sweep failed for {day}: {e}")
+            raise
+        totals["days"] += 1
+        totals["statements"] += len(rows)
+        counts = upsert_snapshots(
+            {
+                "company_id": _company_for_code(r["code"], mapping),
+                "period": r["period"],
+                "period_end": r.get("period_end"),
+                "pl": r["pl"],
+                "bs": r["bs"],
+                "cf": r["cf"],
+                "source": "jquants",
+            }
+            for r in rows
+        )
+        for k, v in counts.items():
+            totals[k] += v
+    return {"status": "ok", **totals}
@@ -1,34 +1,12 @@
 
 from __future__ import annotations
-from typing import Any, Optional, Dict
+from typing import TYPE_CHECKING, Dict, Optional
 from storage.db import SessionLocal
-from storage.models import FinancialSnapshot
+from storage.facts import load_facts, load_facts_async
+from storage.metric_values import METRIC_ITEMS, compute_series, load_metric_values, load_metric_values_async
 
-
-def _to_float(x: Any) -> Optional[float]:
-    try:
-        if x is None:
-            return None
-        if isinstance(x, str):
-            x = x.replace(",", "").replace(" ", "")
-        return float(x)
-    except Exception:
-        return None
-
-
-def _pick(d: dict, *keys: str) -> Optional[float]:
-    for k in keys:
-        if k in d and d[k] is not None:
-            v = _to_float(d[k])
-            if v is not None:
-                return v
-    return None
-
-
-def _safe_div(a: Optional[float], b: Optional[float]) -> Optional[float]:
-    if a is None or b is None or b == 0:
-        return None
-    return a / b
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 # Canonicalization for input metric ids
@@ -53,71 +31,70 @@ _CANON = {
 }
 
 
-def _metric_value(m: str, pl: dict, bs: dict, prev: Dict[str, float] | None = None) -> Optional[float]:
-    rev = _pick(pl, "Revenue", "NetSales", "Sales")
-    op = _pick(pl, "OperatingIncome", "OperatingProfit", "EBIT")
-    net = _pick(pl, "NetIncome", "Profit", "NetProfit", "ProfitAttributableToOwners")
-    assets = _pick(bs, "Assets", "TotalAssets")
-    equity = _pick(bs, "Equity", "TotalEquity", "ShareholdersEquity", "NetAssets")
-
-    if m == "ROE":
-        return _safe_div(net, equity)
-    if m == "ROA":
-        return _safe_div(net, assets)
-    if m == "OperatingMargin":
-        return _safe_div(op, rev)
-    if m == "NetMargin":
-        return _safe_div(net, rev)
-    if m == "EquityRatio":
-        return _safe_div(equity, assets)
-    if m == "GrossMargin":
-        gross = _pick(pl, "GrossProfit")
-        return _safe_div(gross, rev)
-    if m == "Revenue":
-        return rev
-    if m == "OperatingIncome":
-        return op
-    if m == "NetIncome":
-        return net
-    if m == "RevenueGrowth":
-        # uses prev["Revenue"] if present
-        prev_rev = (prev or {}).get("Revenue")
-        if prev_rev is not None and prev_rev != 0 and rev is not None:
-            return (rev - prev_rev) / prev_rev
-        return None
-    return None
-
-
-def calc_metrics(company_ids: list[str], metric_ids: list[str], period: str = "fy"):
+def _live_needed(company_ids: list[str], canon_metrics: list[str], stored) -> Dict[str, list[str]]:
+    """{company_id: metrics to compute live} (not materialized, or company not materialized yet)."""
+    needed = {cid: [m for m in canon_metrics if m not in METRIC_ITEMS or not stored.get(cid)] for cid in company_ids}
+    return {cid: ms for cid, ms in needed.items() if ms}
+
+
+def _live_codes(live_needed: Dict[str, list[str]]) -> tuple[list[str], list[str]]:
+    metrics = sorted({m for ms in live_needed.values() for m in ms})
+    return metrics, sorted({c for m in metrics for c in METRIC_ITEMS.get(m, ())})
+
+
+def _live_series(facts, company_ids: list[str], metrics: list[str], last: Optional[int]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Compute series from financial_fact rows (periods already in series order)."""
+    out = {}
+    for cid in company_ids:
+        by_period = facts.get(cid, {})
+        series = compute_series(by_period, metrics)
+        if last:
+            # 成長率の前期が範囲外でも正しくなるよう、全期間で計算してから切る
+            keep = set(list(by_period)[-last:])
+            series = {m: {p: v for p, v in vals.items() if p in keep} for m, vals in series.items()}
+        out[cid] = series
+    return out
+
+
+def _merge(company_ids: list[str], canon_metrics: list[str], stored, live_needed, live):
+    out = {cid: {} for cid in company_ids}
+    for cid in company_ids:
+        for m in canon_metrics:
+            out[cid][m] = live[cid][m] if m in live_needed.get(cid, ()) else stored[cid].get(m, {})
+    return out
+
+
+def calc_metrics(company_ids: list[str], metric_ids: list[str], period: str = "fy", last: Optional[int] = None):
+    """{company_id: {metric: {period: value}}}, periods in series order; `last` keeps the latest n periods."""
     db = SessionLocal()
     try:
-        out = {cid: {} for cid in company_ids}
         canon_metrics = [_CANON.get(m.upper(), m) for m in metric_ids]
-
-        for cid in company_ids:
-            snaps = db.query(FinancialSnapshot).filter(FinancialSnapshot.company_id == cid).all()
-            snaps = sorted(snaps, key=lambda s: str(s.period))
-
-            # Pre-compute revenue per period for growth calc
-            rev_by_period: Dict[str, float] = {}
-            for s in snaps:
-                r = _pick((s.pl or {}), "Revenue", "NetSales", "Sales")
-                if r is not None:
-                    rev_by_period[str(s.period)] = r
-
-            for m in canon_metrics:
-                series = {}
-                prev_cache = {"Revenue": None}
-                for s in snaps:
-                    pl, bs = (s.pl or {}), (s.bs or {})
-                    val = _metric_value(m, pl, bs, prev_cache)
-                    if val is not None:
-                        series[str(s.period)] = float(val)
-                    # update prev revenue for growth
-                    rv = _pick(pl, "Revenue", "NetSales", "Sales")
-                    if rv is not None:
-                        prev_cache["Revenue"] = rv
-                out[cid][m] = series
-        return out
+        # 取り込み時に計算済みの値（metric_value）を 1 回の範囲クエリで読む
+        materialized = [m for m in canon_metrics if m in METRIC_ITEMS]
+        stored = load_metric_values(db, company_ids, materialized, last=last)
+        live_needed = _live_needed(company_ids, canon_metrics, stored)
+        live = {}
+        if live_needed:
+            # 必要な項目だけを全社まとめて 1 クエリで取得（期間は DB 側で並べ済み）
+            metrics, codes = _live_codes(live_needed)
+            facts = load_facts(db, list(live_needed), codes)
+            live = _live_series(facts, list(live_needed), metrics, last)
+        return _merge(company_ids, canon_metrics, stored, live_needed, live)
     finally:
         db.close()
+
+
+async def calc_metrics_async(
+    db: AsyncSession, company_ids: list[str], metric_ids: list[str], period: str = "fy", last: Optional[int] = None
+):
+    """calc_metrics() on a request-scoped AsyncSession (storage.db.get_async_db)."""
+    canon_metrics = [_CANON.get(m.upper(), m) for m in metric_ids]
+    materialized = [m for m in canon_metrics if m in METRIC_ITEMS]
+    stored = await load_metric_values_async(db, company_ids, materialized, last=last)
+    live_needed = _live_needed(company_ids, canon_metrics, stored)
+    live = {}
+    if live_needed:
+        metrics, codes = _live_codes(live_needed)
+        facts = await load_facts_async(db, list(live_needed), codes)
+        live = _live_series(facts, list(live_needed), metrics, last)
+    return _merge(company_ids, canon_metrics, stored, live_needed, live)
@@ -0,0 +1,176 @@
+"""Daily incremental sync of the whole tracked universe (every CompanyRef row).
+
+    cd backend
+    python -m services.sync_service                 # one pass (cron: daily after EDINET's evening batch)
+    python -m services.sync_service --daemon --at 20:00
+
+One pass refreshes the EDINET filing index over the days after the oldest
+watermark (days already indexed are local), plans only docIDs not yet
+ingested per company, runs them through the backfill pipeline, and sweeps
+J-Quants statements once per new disclosure date for all companies. Each
+company's SyncState watermark then moves to yesterday (JST), or to the day
+before its first failed document, so failures stay in the next pass's plan
+(Backfill retries them with --retry-failed). Without J-Quants credentials the
+sweep is skipped and the J-Quants watermarks stay where they are.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from core.config import get_settings
+from ingestion.backfill import DEFAULT_DOC_TYPES, Backfill, Checkpoint, Job
+from ingestion.edinet_client import AsyncEdinetClient, date_range
+from ingestion.edinet_downloader import BASE, DATA_DIR, UA, filed_on
+from ingestion.filing_index import JST, get_filing_index, refresh_days, today_jst
+from ingestion.jquants_downloader import has_credentials
+from services.financial_service import (
+    advance_sync, hold_before, shift_day, sweep_jquants_statements, sync_start, sync_state,
+)
+from storage.db import SessionLocal, init_db
+from storage.models import CompanyRef
+from storage.raw_archive import get_raw_archive
+
+
+async def _sync_edinet(
+    plan: Dict[str, Dict[str, Any]], today: str, retry_failed: bool, **pipeline
+) -> Dict[str, Tuple[str, str, str]]:
+    """Run the delta of every company through the backfill pipeline. Returns {docID: (company_id, status, listing day)}."""
+    checkpoint = Checkpoint()
+    try:
+        async with AsyncEdinetClient(
+            BASE, max_concurrency=get_settings().EDINET_MAX_CONCURRENCY, data_dir=DATA_DIR, headers=UA,
+            archive=get_raw_archive(),
+        ) as client:
+            index = get_filing_index()
+            # 全社の最古ウォーターマーク以降を 1 回だけ索引（取得済みの日はローカル）
+            await refresh_days(index, client, date_range(min(p["start"] for p in plan.values()), today), today=today)
+            jobs: List[Job] = []
+            for company_id, p in plan.items():
+                for f in index.query(p["edinet_code"], p["start"], today, doc_type_codes=DEFAULT_DOC_TYPES):
+                    doc_id = f.get("docID") or f.get("docId")
+                    if doc_id and doc_id not in p["seen"]:
+                        jobs.append(Job(doc_id, company_id, f))
+            logger.info(f"sync: {len(plan)} EDINET companies, {len(jobs)} new documents")
+            await Backfill(client, checkpoint, **pipeline).run(jobs, retry_failed=retry_failed)
+            days = {j.doc_id: filed_on(j.filing, plan[j.company_id]["start"]) for j in jobs}
+            return {d: (c, status, days[d]) for d, (c, status) in checkpoint.statuses(days).items()}
+    finally:
+        checkpoint.close()
+
+
+def sync_universe(
+    today: Optional[str] = None,
+    edinet: bool = True,
+    jquants: bool = True,
+    retry_failed: bool = False,
+    **pipeline: Any,
+) -> Dict[str, Any]:
+    """One incremental pass over all tracked companies. `pipeline` is passed to Backfill (workers, batch size...).
+
+    Returns: {"status": "ok", "companies": int, "edinet": {docID status counts}, "jquants": sweep result | None}
+    """
+    today = today or today_jst()
+    through = shift_day(today, -1)
+    db = SessionLocal()
+    out: Dict[str, Any] = {"status": "ok", "today": today, "edinet": {}, "jquants": None}
+    try:
+        refs = db.query(CompanyRef).all()
+        out["companies"] = len(refs)
+
+        if edinet:
+            plan = {}
+            for r in refs:
+                if not r.edinet_code:
+                    continue
+                st = sync_state(db, r.company_id, "edinet")
+                plan[r.company_id] = {"edinet_code": r.edinet_code, "start": sync_start(st),
+                                      "seen": set(st.doc_ids or []), "state": st}
+            if plan:
+                statuses = asyncio.run(_sync_edinet(plan, today, retry_failed, **pipeline))
+                by_company: Dict[str, List[str]] = {}
+                failed_days: Dict[str, List[str]] = {}
+                for doc_id, (company_id, status, day) in statuses.items():
+                    out["edinet"][status] = out["edinet"].get(status, 0) + 1
+                    if status in ("stored", "skipped"):
+                        by_company.setdefault(company_id, []).append(doc_id)
+                    elif status == "failed":
+                        failed_days.setdefault(company_id, []).append(day)
+                for company_id, p in plan.items():
+                    # 失敗した書類の日より前で止める: 次のパスでも計画され、--retry-failed で再取得できる
+                    upto = hold_before(through, failed_days.get(company_id, ()))
+                    advance_sync(p["state"], upto, by_company.get(company_id, ()))
+                db.commit()
+
+        if jquants and refs and not has_credentials():
+            logger.warning("sync: J-Quants credentials are not configured; skipping the statements sweep")
+        elif jquants and refs:
+            states = [sync_state(db, r.company_id, "jquants") for r in refs]
+            start = min(sync_start(st) for st in states)
+            if start <= today:
+                # 開示日ごとの一括取得（全社分）。当日分は翌日のパスでも再取得される
+                out["jquants"] = sweep_jquants_statements(start, today)
+            for st in states:
+                advance_sync(st, through)
+            db.commit()
+        return out
+    except Exception:
+        db.rollback()
+        logger.exception("sync_universe failed")
+        raise
+    finally:
+        db.close()
+
+
+def _seconds_until(at: str) -> float:
+    hh, mm = (int(x) for x in at.split(":"))
+    now = datetime.now(JST)
+    nxt = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if nxt <= now:
+        nxt += timedelta(days=1)
+    return (nxt - now).total_seconds()
+
+
+def run_daily(at: str = "20:00", **kwargs: Any) -> None:
+    """Scheduler loop: one sync_universe pass every day at `at` (HH:MM, JST). A failed pass is logged and retried next day."""
+    while True:
+        wait = _seconds_until(at)
+        logger.info(f"next sync in {wait / 3600:.1f}h ({at} JST)")
+        time.sleep(wait)
+        try:
+            logger.info(f"sync done: {sync_universe(**kwargs)}")
+        except Exception:
+            pass  # sync_universe がログ済み
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Incremental sync of all tracked companies")
+    ap.add_argument("--date", help="treat this JST date as today (YYYY-MM-DD)")
+    ap.add_argument("--no-edinet", action="store_true")
+    ap.add_argument("--no-jquants", action="store_true")
+    ap.add_argument("--retry-failed", action="store_true")
+    ap.add_argument("--download-workers", type=int, default=8)
+    ap.add_argument("--parse-workers", type=int, default=None)
+    ap.add_argument("--daemon", action="store_true", help="run every day at --at instead of once")
+    ap.add_argument("--at", default="20:00", help="daily run time HH:MM (JST)")
+    args = ap.parse_args(argv)
+
+    init_db()
+    kwargs = dict(
+        edinet=not args.no_edinet, jquants=not args.no_jquants, retry_failed=args.retry_failed,
+        download_workers=args.download_workers, parse_workers=args.parse_workers,
+    )
+    if args.daemon:
+        run_daily(args.at, **kwargs)
+        return 0
+    print(sync_universe(today=args.date, **kwargs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,10 @@
 from __future__ import annotations
 import os
+import threading
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from core.config import get_settings
 
 # Resolve database URL (env > default SQLite under backend/data/db)
@@ -15,6 +17,31 @@ DATABASE_URL = settings.DATABASE_URL or DEFAULT_SQLITE_URL
 if DATABASE_URL.startswith("sqlite"):
     DEFAULT_SQLITE_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# async 版ドライバ（DATABASE_URL の dialect -> async_engine の URL スキーム）
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+
+def _pool_args(url: str) -> Dict[str, Any]:
+    """Pool sizing from settings; in-memory SQLite keeps SQLAlchemy's single-connection pool."""
+    if url.startswith("sqlite") and (":memory:" in url or url.partition("://")[2] in ("", "/")):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+# SQLite pragmas for reliability & performance
+def _set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON;")
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    cursor.execute("PRAGMA synchronous=NORMAL;")
+    cursor.close()
+
+
 # Engine options
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 engine = create_engine(
@@ -22,23 +49,88 @@ engine = create_engine(
     connect_args=connect_args,
     pool_pre_ping=True,
     future=True,
+    **_pool_args(DATABASE_URL),
 )
-
-# SQLite pragmas for reliability & performance
 if DATABASE_URL.startswith("sqlite"):
-    @event.listens_for(engine, "connect")
-    def _set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON;")
-        cursor.execute("PRAGMA journal_mode=WAL;")
-        cursor.execute("PRAGMA synchronous=NORMAL;")
-        cursor.close()
+    event.listen(engine, "connect", _set_sqlite_pragma)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
 
-def init_db():
+def async_database_url(url: str) -> Optional[str]:
+    """The async-driver URL for a sync database URL (None for dialects without one)."""
+    scheme, sep, rest = url.partition("://")
+    driver = _ASYNC_DRIVERS.get(scheme.split("+", 1)[0])
+    return f"{driver}://{rest}" if driver and sep else None
+
+
+_async_sessionmaker: Any = None  # None = 未作成, False = 使えない
+_async_lock = threading.Lock()
+
+
+def get_async_sessionmaker():
+    """async_sessionmaker on the async engine, created on first use.
+
+    None when DB_ASYNC is off, the dialect has no async driver, or the
+    optional packages (sqlalchemy[asyncio], aiosqlite / asyncpg) are missing;
+    callers then use the sync path.
+    """
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                _async_sessionmaker = _create_async_sessionmaker() or False
+    return _async_sessionmaker or None
+
+
+def _async_url() -> Optional[str]:
+    """ASYNC_DATABASE_URL if set, else DATABASE_URL on its async driver."""
+    return settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+
+
+def _create_async_sessionmaker():
+    url = _async_url()
+    if not settings.DB_ASYNC or not url:
+        return None
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        async_engine = create_async_engine(url, pool_pre_ping=True, **_pool_args(url))
+    except ImportError:  # optional dependency: fall back to the sync engine
+        return None
+    if url.startswith("sqlite"):
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragma)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_db() -> Iterator[Session]:
+    """FastAPI dependency: one Session per request, closed after the response."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[Any]:
+    """FastAPI dependency: one AsyncSession per request, or None when async access is unavailable."""
+    maker = get_async_sessionmaker()
+    if maker is None:
+        yield None
+        return
+    async with maker() as session:
+        yield session
+
+
+def init_db(migrate: bool = True):
     # Import models to register metadata, then create tables
     from . import models  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    if migrate:
+        # 既存 DB: 期間の解析列を追加・設定し、financial_snapshot の JSON から financial_fact を一度だけ生成
+        from .facts import migrate_facts
+        from .metric_values import migrate_metric_values
+        from .snapshots import migrate_period_columns
+        migrate_period_columns()
+        migrate_facts()
+        migrate_metric_values()
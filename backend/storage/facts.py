@@ -0,0 +1,233 @@
+# backend/storage/facts.py
+"""financial_fact: long-format (company, period, source, item, value) rows derived from FinancialSnapshot.
+
+Writers call write_facts() in the same transaction as the snapshot change;
+readers pull only the items they need with load_facts() (one indexed query
+instead of decoding every pl/bs/cf blob of a company).
+
+Existing databases are migrated by backfill_facts():
+
+    cd backend
+    python -m storage.facts             # rebuild financial_fact (and metric_value) from every snapshot
+"""
+from __future__ import annotations
+import argparse
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .items import ITEMS, normalize_items
+from .models import FinancialFact, FinancialItem, FinancialPeriod, FinancialSnapshot
+from .periods import parse_period
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# 同一会社・期間・項目が複数ソースにある場合の優先順（先勝ち）
+SOURCE_PRIORITY = ("edinet", "jquants")
+CHUNK = 500  # IN (...) のパラメータ数を抑える
+
+
+def _get_or_create(db: Session, model, key: str, wanted: Mapping[str, Dict[str, Any]]) -> Dict[str, int]:
+    """{natural key: id} for `wanted` ({key: extra columns}), inserting the missing ones."""
+    col = getattr(model, key)
+    keys = list(wanted)
+    ids: Dict[str, int] = {}
+    for i in range(0, len(keys), CHUNK):
+        ids.update(db.execute(select(col, model.id).where(col.in_(keys[i:i + CHUNK]))).all())
+    missing = [k for k in keys if k not in ids]
+    if missing:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), [{key: k, **wanted[k]} for k in missing])
+        except IntegrityError:
+            pass  # 並行する writer が先に登録した
+        for i in range(0, len(missing), CHUNK):
+            ids.update(db.execute(select(col, model.id).where(col.in_(missing[i:i + CHUNK]))).all())
+    return ids
+
+
+def item_ids(db: Session, items: Mapping[str, Optional[str]]) -> Dict[str, int]:
+    """{item code: id} for {code: statement}; unknown codes are added to the dictionary."""
+    return _get_or_create(db, FinancialItem, "code", {c: {"statement": s} for c, s in items.items()})
+
+
+def period_ids(db: Session, periods: Iterable[str]) -> Dict[str, int]:
+    return _get_or_create(db, FinancialPeriod, "period", {p: _period_cols(p) for p in set(periods)})
+
+
+def _period_cols(period: str) -> Dict[str, Any]:
+    year, quarter, ptype, _ = parse_period(period)
+    return {"fiscal_year": year, "fiscal_quarter": quarter, "period_type": ptype}
+
+
+def series_order(P: Any = FinancialPeriod, desc: bool = False) -> tuple:
+    """ORDER BY for periods in series order (storage.periods.period_key); unparsable periods last either way."""
+    cols = (P.fiscal_year, P.fiscal_quarter, P.period_type, P.period)
+    return (P.fiscal_year.is_(None), *(c.desc() if desc else c for c in cols))
+
+
+def recent_rank(company_col: Any, P: Any = FinancialPeriod) -> Any:
+    """1 for a company's latest period, 2 for the one before... (filter `<= n` for the last n periods)."""
+    return func.dense_rank().over(partition_by=company_col, order_by=series_order(P, desc=True))
+
+
+def _field(row: Any, name: str) -> Any:
+    return row.get(name) if isinstance(row, Mapping) else getattr(row, name, None)
+
+
+def write_facts(db: Session, rows: Iterable[Any]) -> int:
+    """Replace the facts of each snapshot (FinancialSnapshot or row dict). Does not commit. Returns facts written."""
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for r in rows:
+        key = (str(_field(r, "company_id")), str(_field(r, "period") or ""), str(_field(r, "source") or ""))
+        latest[key] = normalize_items(_field(r, "pl"), _field(r, "bs"), _field(r, "cf"))
+    if not latest:
+        return 0
+    periods = period_ids(db, (k[1] for k in latest))
+    items = item_ids(db, {code: st for facts in latest.values() for code, (st, _) in facts.items()})
+    keys = [(c, periods[p], s) for c, p, s in latest]
+    for i in range(0, len(keys), CHUNK):
+        db.execute(delete(FinancialFact).where(
+            tuple_(FinancialFact.company_id, FinancialFact.period_id, FinancialFact.source).in_(keys[i:i + CHUNK])
+        ))
+    params = [
+        {"company_id": c, "period_id": periods[p], "source": s, "item_id": items[code], "value": v}
+        for (c, p, s), facts in latest.items()
+        for code, (_, v) in facts.items()
+    ]
+    for i in range(0, len(params), CHUNK):
+        db.execute(insert(FinancialFact), params[i:i + CHUNK])
+    return len(params)
+
+
+def _facts_query(company_ids: Sequence[str], codes: Sequence[str], last: Optional[int]) -> Any:
+    F = FinancialFact
+    q = (
+        select(F.company_id, FinancialPeriod.period, FinancialItem.code, F.source, F.value)
+        .join(FinancialItem, FinancialItem.id == F.item_id)
+        .join(FinancialPeriod, FinancialPeriod.id == F.period_id)
+        .where(F.company_id.in_(list(company_ids)), FinancialItem.code.in_(list(codes)))
+        .order_by(F.company_id, *series_order())
+    )
+    if last:
+        # 会社ごとの直近 n 期（期間の順位は DB の窓関数で付ける）
+        recent = (
+            select(F.company_id, F.period_id, recent_rank(F.company_id).label("recent"))
+            .join(FinancialPeriod, FinancialPeriod.id == F.period_id)
+            .where(F.company_id.in_(list(company_ids)))
+            .distinct()
+            .subquery()
+        )
+        q = q.join(recent, (recent.c.company_id == F.company_id) & (recent.c.period_id == F.period_id)).where(
+            recent.c.recent <= last
+        )
+    return q
+
+
+def _fold_facts(rows: Iterable[Any], company_ids: Sequence[str], sources: Sequence[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    out: Dict[str, Dict[str, Dict[str, float]]] = {c: {} for c in company_ids}
+    rank = {s: i for i, s in enumerate(sources)}
+    best: Dict[tuple, int] = {}
+    for cid, period, code, source, value in rows:
+        r = rank.get(source, len(rank))
+        k = (cid, period, code)
+        if value is None or best.get(k, r + 1) <= r:
+            continue
+        best[k] = r
+        out[cid].setdefault(period, {})[code] = value
+    return out
+
+
+def load_facts(
+    db: Session,
+    company_ids: Sequence[str],
+    codes: Sequence[str],
+    sources: Sequence[str] = SOURCE_PRIORITY,
+    last: Optional[int] = None,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{company_id: {period: {item code: value}}} for the requested items only.
+
+    Periods come in series order (ordered by the database); `last` keeps each
+    company's latest n periods. When several sources have the same item, the
+    first in `sources` wins; sources not listed come after them.
+    """
+    if not company_ids or not codes:
+        return {c: {} for c in company_ids}
+    return _fold_facts(db.execute(_facts_query(company_ids, codes, last)), company_ids, sources)
+
+
+async def load_facts_async(
+    db: AsyncSession,
+    company_ids: Sequence[str],
+    codes: Sequence[str],
+    sources: Sequence[str] = SOURCE_PRIORITY,
+    last: Optional[int] = None,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """load_facts() on an AsyncSession (storage.db.get_async_db)."""
+    if not company_ids or not codes:
+        return {c: {} for c in company_ids}
+    return _fold_facts(await db.execute(_facts_query(company_ids, codes, last)), company_ids, sources)
+
+
+def backfill_facts(batch_size: int = 500, db: Optional[Session] = None) -> Dict[str, int]:
+    """Migration: (re)build financial_fact from every FinancialSnapshot, committing per batch."""
+    own = db is None
+    db = db or SessionLocal()
+    counts = {"snapshots": 0, "facts": 0}
+    try:
+        item_ids(db, {code: st for code, (st, _) in ITEMS.items()})  # 定義済み項目を先に登録（id を安定させる）
+        last_id = 0
+        while True:
+            snaps: List[FinancialSnapshot] = (
+                db.query(FinancialSnapshot).filter(FinancialSnapshot.id > last_id)
+                .order_by(FinancialSnapshot.id).limit(batch_size).all()
+            )
+            if not snaps:
+                break
+            counts["facts"] += write_facts(db, snaps)
+            counts["snapshots"] += len(snaps)
+            last_id = snaps[-1].id
+            db.commit()
+        return counts
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+def migrate_facts() -> Optional[Dict[str, int]]:
+    """Run backfill_facts once for databases that have snapshots but no facts yet (called by init_db)."""
+    db = SessionLocal()
+    try:
+        has_facts = db.execute(select(FinancialFact.id).limit(1)).first() is not None
+        has_snaps = db.execute(select(FinancialSnapshot.id).limit(1)).first() is not None
+        if has_facts or not has_snaps:
+            return None
+        return backfill_facts(db=db)
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Rebuild financial_fact from financial_snapshot")
+    ap.add_argument("--batch-size", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    from .db import init_db
+    from .metric_values import rebuild_metric_values
+
+    init_db(migrate=False)
+    print(backfill_facts(batch_size=args.batch_size))
+    print({"metric_values": rebuild_metric_values()})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
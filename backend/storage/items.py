@@ -0,0 +1,69 @@
+# backend/storage/items.py
+"""Financial item dictionary: canonical line items and the snapshot keys that map to them.
+
+Snapshot blobs (pl / bs / cf) carry whatever keys their source produced
+("Revenue", "NetSales", "net_income", or the Japanese labels of
+parsing.edinet_parser_v2 such as "売上高"). normalize_items() resolves them to
+one canonical item each, in the priority order the metric code used to probe
+the blobs with, so financial_fact holds one value per item.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# item code -> (statement, aliases; earlier = higher priority)
+ITEMS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "Revenue": ("pl", ("Revenue", "NetSales", "Sales", "revenue", "売上高")),
+    "GrossProfit": ("pl", ("GrossProfit",)),
+    "OperatingIncome": ("pl", ("OperatingIncome", "OperatingProfit", "OpIncome", "EBIT", "operating_income", "営業利益")),
+    "OrdinaryIncome": ("pl", ("OrdinaryIncome", "OrdinaryProfit")),
+    "NetIncome": ("pl", ("NetIncome", "Profit", "NetProfit", "ProfitAttributableToOwners", "PAT", "net_income", "当期純利益")),
+    "Assets": ("bs", ("Assets", "TotalAssets", "total_assets", "総資産")),
+    "Liabilities": ("bs", ("Liabilities", "TotalLiabilities")),
+    "Equity": ("bs", (
+        "Equity", "TotalEquity", "ShareholdersEquity", "EquityAttributableToOwners",
+        "EquityAttributableToOwnersOfParent", "NetAssets", "net_assets", "純資産",
+    )),
+    "OperatingCF": ("cf", ("OperatingCF", "cfo", "営業CF")),
+    "InvestingCF": ("cf", ("InvestingCF", "cfi", "投資CF")),
+    "FinancingCF": ("cf", ("FinancingCF", "cff", "財務CF")),
+    "Cash": ("cf", ("Cash", "CashAndEquivalents")),
+}
+
+_ALIASES = {alias for _, aliases in ITEMS.values() for alias in aliases}
+
+
+def to_float(x: Any) -> Optional[float]:
+    try:
+        if x is None or isinstance(x, bool):
+            return None
+        # Allow strings like "1,234" or "1 234"
+        if isinstance(x, str):
+            x = x.replace(",", "").replace(" ", "")
+        return float(x)
+    except Exception:
+        return None
+
+
+def normalize_items(pl: Optional[Mapping], bs: Optional[Mapping], cf: Optional[Mapping]) -> Dict[str, Tuple[str, float]]:
+    """Snapshot blobs -> {item code: (statement, value)}.
+
+    Canonical items take the first parsable alias of their own statement;
+    other numeric keys are kept under their own name so nothing is lost.
+    """
+    blobs = {"pl": pl or {}, "bs": bs or {}, "cf": cf or {}}
+    out: Dict[str, Tuple[str, float]] = {}
+    for code, (statement, aliases) in ITEMS.items():
+        blob = blobs[statement]
+        for alias in aliases:
+            v = to_float(blob.get(alias))
+            if v is not None:
+                out[code] = (statement, v)
+                break
+    for statement, blob in blobs.items():
+        for key, raw in blob.items():
+            if key in _ALIASES or key in out:
+                continue
+            v = to_float(raw)
+            if v is not None:
+                out[key] = (statement, v)
+    return out
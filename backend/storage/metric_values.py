@@ -0,0 +1,235 @@
+# backend/storage/metric_values.py
+"""metric_value: materialized metrics per (company, period), maintained on ingest.
+
+upsert_snapshots() calls refresh_metric_values() for the (company, period)
+pairs it wrote. Only those periods are rewritten, plus the periods whose
+growth depends on them (up to and including the next period with revenue).
+Readers get a whole series with one indexed range query (load_metric_values).
+
+data_version is METRICS_VERSION at the time the row was computed; bump it
+when a formula (or the period order growth is based on) changes. Readers ignore rows of other versions and init_db
+rebuilds them.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .facts import CHUNK, load_facts, recent_rank, series_order
+from .models import FinancialFact, FinancialPeriod, MetricValue
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# 2: 前期 = 年度・四半期順（storage.periods）。1 は文字列順だった
+METRICS_VERSION = 2
+
+# metric -> items it needs from financial_fact
+METRIC_ITEMS: Dict[str, Tuple[str, ...]] = {
+    "ROE": ("NetIncome", "Equity"),
+    "ROA": ("NetIncome", "Assets"),
+    "OperatingMargin": ("OperatingIncome", "Revenue"),
+    "NetMargin": ("NetIncome", "Revenue"),
+    "EquityRatio": ("Equity", "Assets"),
+    "GrossMargin": ("GrossProfit", "Revenue"),
+    "Revenue": ("Revenue",),
+    "OperatingIncome": ("OperatingIncome",),
+    "NetIncome": ("NetIncome",),
+    "RevenueGrowth": ("Revenue",),
+}
+ALL_ITEMS = sorted({c for items in METRIC_ITEMS.values() for c in items})
+
+
+def _safe_div(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None or b is None or b == 0:
+        return None
+    return a / b
+
+
+def metric_value(m: str, items: Dict[str, float], prev: Optional[Dict[str, float]] = None) -> Optional[float]:
+    rev = items.get("Revenue")
+    op = items.get("OperatingIncome")
+    net = items.get("NetIncome")
+    assets = items.get("Assets")
+    equity = items.get("Equity")
+
+    if m == "ROE":
+        return _safe_div(net, equity)
+    if m == "ROA":
+        return _safe_div(net, assets)
+    if m == "OperatingMargin":
+        return _safe_div(op, rev)
+    if m == "NetMargin":
+        return _safe_div(net, rev)
+    if m == "EquityRatio":
+        return _safe_div(equity, assets)
+    if m == "GrossMargin":
+        return _safe_div(items.get("GrossProfit"), rev)
+    if m == "Revenue":
+        return rev
+    if m == "OperatingIncome":
+        return op
+    if m == "NetIncome":
+        return net
+    if m == "RevenueGrowth":
+        # uses prev["Revenue"] if present
+        prev_rev = (prev or {}).get("Revenue")
+        if prev_rev is not None and prev_rev != 0 and rev is not None:
+            return (rev - prev_rev) / prev_rev
+        return None
+    return None
+
+
+def compute_series(by_period: Dict[str, Dict[str, float]], metrics: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """{metric: {period: value}}; by_period must be in series order (as load_facts returns it).
+
+    The previous period for growth is the preceding one with revenue.
+    Periods without a value are left out.
+    """
+    out: Dict[str, Dict[str, float]] = {m: {} for m in metrics}
+    prev: Dict[str, Optional[float]] = {"Revenue": None}
+    for p in by_period:
+        items = by_period[p]
+        for m in metrics:
+            val = metric_value(m, items, prev)
+            if val is not None:
+                out[m][str(p)] = float(val)
+        # update prev revenue for growth
+        if items.get("Revenue") is not None:
+            prev["Revenue"] = items["Revenue"]
+    return out
+
+
+def _affected(by_period: Dict[str, Dict[str, float]], touched: Set[str]) -> Set[str]:
+    """Touched periods plus those whose growth base may have moved (next periods up to the next one with revenue)."""
+    order = list(by_period)
+    out = set(touched)
+    for i, p in enumerate(order):
+        if p not in touched:
+            continue
+        for q in order[i + 1:]:
+            out.add(q)
+            if by_period[q].get("Revenue") is not None:
+                break
+    return out
+
+
+def refresh_metric_values(db: Session, keys: Iterable[Tuple[str, str]]) -> int:
+    """Recompute metric_value for the given (company_id, period) pairs and their dependents. Does not commit."""
+    touched: Dict[str, Set[str]] = {}
+    for cid, period in keys:
+        touched.setdefault(str(cid), set()).add(str(period))
+    if not touched:
+        return 0
+    facts = load_facts(db, list(touched), ALL_ITEMS)
+    metrics = list(METRIC_ITEMS)
+    stale: List[Tuple[str, str]] = []
+    params: List[dict] = []
+    for cid, periods in touched.items():
+        by_period = facts.get(cid, {})
+        affected = _affected(by_period, periods)
+        series = compute_series(by_period, metrics)
+        stale += [(cid, p) for p in affected]
+        params += [
+            {"company_id": cid, "period": p, "metric": m, "value": v, "data_version": METRICS_VERSION}
+            for m, vals in series.items() for p, v in vals.items() if p in affected
+        ]
+    for i in range(0, len(stale), CHUNK):
+        db.execute(delete(MetricValue).where(tuple_(MetricValue.company_id, MetricValue.period).in_(stale[i:i + CHUNK])))
+    for i in range(0, len(params), CHUNK):
+        db.execute(insert(MetricValue), params[i:i + CHUNK])
+    return len(params)
+
+
+def _metric_values_query(company_ids: Sequence[str], metrics: Sequence[str], last: Optional[int]) -> Any:
+    M = MetricValue
+    current = (M.company_id.in_(list(company_ids)), M.data_version == METRICS_VERSION)
+    q = (
+        select(M.company_id, M.metric, M.period, M.value)
+        .join(FinancialPeriod, FinancialPeriod.period == M.period)
+        .where(*current, M.metric.in_(list(metrics)))
+        .order_by(M.company_id, M.metric, *series_order())
+    )
+    if last:
+        # 会社ごとの直近 n 期（どの指標にも値のない期間は数えない）
+        recent = (
+            select(M.company_id, M.period, recent_rank(M.company_id).label("recent"))
+            .join(FinancialPeriod, FinancialPeriod.period == M.period)
+            .where(*current)
+            .distinct()
+            .subquery()
+        )
+        q = q.join(recent, (recent.c.company_id == M.company_id) & (recent.c.period == M.period)).where(
+            recent.c.recent <= last
+        )
+    return q
+
+
+def _fold_metric_values(rows: Iterable[Any], company_ids: Sequence[str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    out: Dict[str, Dict[str, Dict[str, float]]] = {c: {} for c in company_ids}
+    for cid, metric, period, value in rows:
+        out[cid].setdefault(metric, {})[period] = value
+    return out
+
+
+def load_metric_values(
+    db: Session, company_ids: Sequence[str], metrics: Sequence[str], last: Optional[int] = None
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{company_id: {metric: {period: value}}} of current-version rows.
+
+    Periods are ordered by the database (financial_period's parsed columns);
+    `last` keeps each company's latest n periods.
+    """
+    if not company_ids or not metrics:
+        return {c: {} for c in company_ids}
+    return _fold_metric_values(db.execute(_metric_values_query(company_ids, metrics, last)), company_ids)
+
+
+async def load_metric_values_async(
+    db: AsyncSession, company_ids: Sequence[str], metrics: Sequence[str], last: Optional[int] = None
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """load_metric_values() on an AsyncSession (storage.db.get_async_db)."""
+    if not company_ids or not metrics:
+        return {c: {} for c in company_ids}
+    return _fold_metric_values(await db.execute(_metric_values_query(company_ids, metrics, last)), company_ids)
+
+
+def rebuild_metric_values(company_ids: Optional[Sequence[str]] = None, db: Optional[Session] = None, batch: int = 200) -> int:
+    """Recompute every period of the given companies (default: all with facts), committing per batch."""
+    own = db is None
+    db = db or SessionLocal()
+    try:
+        if company_ids is None:
+            company_ids = [c for (c,) in db.execute(select(FinancialFact.company_id).distinct())]
+        written = 0
+        for i in range(0, len(company_ids), batch):
+            cids = list(company_ids[i:i + batch])
+            db.execute(delete(MetricValue).where(MetricValue.company_id.in_(cids)))
+            facts = load_facts(db, cids, ALL_ITEMS)
+            written += refresh_metric_values(db, ((c, p) for c in cids for p in facts.get(c, {})))
+            db.commit()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+def migrate_metric_values() -> Optional[int]:
+    """Materialize databases that have facts but no current-version metrics (called by init_db)."""
+    db = SessionLocal()
+    try:
+        if db.execute(select(FinancialFact.id).limit(1)).first() is None:
+            return None
+        if db.execute(select(MetricValue.id).limit(1)).first() is None:
+            return rebuild_metric_values(db=db)
+        old = [c for (c,) in db.execute(
+            select(MetricValue.company_id).where(MetricValue.data_version != METRICS_VERSION).distinct()
+        )]
+        return rebuild_metric_values(old, db=db) if old else None
+    finally:
+        db.close()
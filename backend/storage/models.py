@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, JSON, Float, ForeignKey, UniqueConstraint, Index
 from .db import Base
 
 
@@ -29,13 +29,109 @@ class FinancialSnapshot(Base):
     bs = Column(JSON)
     cf = Column(JSON)
     source = Column(String, index=True)  # jquants / edinet
+    # period を解析した値（storage.periods.parse_period、取り込み時に設定）
+    fiscal_year = Column(Integer)
+    fiscal_quarter = Column(Integer)  # 1-4（通期は 4）
+    period_type = Column(String)  # FY / Q
+    period_end = Column(String)  # YYYY-MM-DD（ソースが返した場合）
 
     __table_args__ = (
         # 会社×期間×ソースでユニーク（重複投入防止）
         UniqueConstraint("company_id", "period", "source", name="_uniq_company_period_source"),
         # 会社×期間の時系列取得を高速化（source非依存の集計にも有効）
         Index("idx_financial_snapshot_company_period", "company_id", "period"),
+        # 会社の時系列を年度・四半期順に（直近 N 期・年度範囲も索引で）
+        Index("idx_financial_snapshot_company_fiscal", "company_id", "fiscal_year", "fiscal_quarter", "period_type"),
     )
 
     def __repr__(self) -> str:
         return f"<FinancialSnapshot company_id={self.company_id} period={self.period} source={self.source}>"
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(String, index=True)
+    source = Column(String, index=True)  # jquants / edinet
+    synced_through = Column(String)  # YYYY-MM-DD (JST): last day fully synced
+    doc_ids = Column(JSON)  # EDINET docIDs already ingested (today's listing may grow)
+    updated_at = Column(Float)  # epoch seconds
+
+    __table_args__ = (
+        UniqueConstraint("company_id", "source", name="_uniq_sync_company_source"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<SyncState company_id={self.company_id} source={self.source} through={self.synced_through}>"
+
+
+class FinancialItem(Base):
+    """Item dictionary (storage.items.ITEMS plus any other key seen in a snapshot)."""
+    __tablename__ = "financial_item"
+    id = Column(Integer, primary_key=True)
+    code = Column(String, unique=True, nullable=False)  # e.g., Revenue / Assets / OperatingCF
+    statement = Column(String)  # pl / bs / cf
+
+    def __repr__(self) -> str:
+        return f"<FinancialItem {self.id} {self.code}>"
+
+
+class FinancialPeriod(Base):
+    __tablename__ = "financial_period"
+    id = Column(Integer, primary_key=True)
+    period = Column(String, unique=True, nullable=False)  # e.g., FY2023 / 2024-Q4
+    # FinancialSnapshot と同じ解析値（financial_fact / metric_value の並び順・範囲条件に使う）
+    fiscal_year = Column(Integer)
+    fiscal_quarter = Column(Integer)
+    period_type = Column(String)
+
+    __table_args__ = (
+        Index("idx_financial_period_fiscal", "fiscal_year", "fiscal_quarter", "period_type"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<FinancialPeriod {self.id} {self.period}>"
+
+
+class FinancialFact(Base):
+    """Long-format values of FinancialSnapshot: one row per (company, period, source, item)."""
+    __tablename__ = "financial_fact"
+    id = Column(Integer, primary_key=True)
+    company_id = Column(String, nullable=False)
+    period_id = Column(Integer, ForeignKey("financial_period.id"), nullable=False)
+    source = Column(String, nullable=False)  # jquants / edinet
+    item_id = Column(Integer, ForeignKey("financial_item.id"), nullable=False)
+    value = Column(Float)
+
+    __table_args__ = (
+        # 会社×項目で全期間を 1 回の索引走査で引く（指標計算の主経路）
+        UniqueConstraint("company_id", "item_id", "period_id", "source", name="_uniq_fact_company_item_period_source"),
+        # スナップショット単位の置き換え・期間横断の取得
+        Index("idx_financial_fact_company_period_source", "company_id", "period_id", "source"),
+        # 項目×期間で企業横断（スクリーニング）
+        Index("idx_financial_fact_item_period", "item_id", "period_id"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<FinancialFact company_id={self.company_id} period_id={self.period_id} item_id={self.item_id}>"
+
+
+class MetricValue(Base):
+    """Materialized metrics (storage.metric_values), rewritten for the periods each ingest touches."""
+    __tablename__ = "metric_value"
+    id = Column(Integer, primary_key=True)
+    company_id = Column(String, nullable=False)
+    period = Column(String, nullable=False)
+    metric = Column(String, nullable=False)  # e.g., ROE / RevenueGrowth
+    value = Column(Float)
+    data_version = Column(Integer, nullable=False)  # METRICS_VERSION when computed
+
+    __table_args__ = (
+        # 会社×指標の全期間を 1 回の範囲走査で返す（/analysis/timeseries）
+        UniqueConstraint("company_id", "metric", "period", name="_uniq_metric_company_metric_period"),
+        # 取り込み時の期間単位の置き換え
+        Index("idx_metric_value_company_period", "company_id", "period"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<MetricValue company_id={self.company_id} period={self.period} {self.metric}={self.value}>"
@@ -0,0 +1,46 @@
+# backend/storage/periods.py
+"""Structured form of the free-form period strings ("FY2023", "2024-Q3").
+
+Ingest stores parse_period() next to the string (FinancialSnapshot and the
+financial_period dictionary) so the database orders and range-filters time
+series. period_key() is the same order for values that never went through
+the database (API payloads, chart series).
+
+fiscal_year is the year the fiscal year ends (J-Quants / EDINET convention);
+fiscal_quarter is the quarter the period ends with, 4 for full-year periods.
+"""
+from __future__ import annotations
+import re
+from typing import Any, NamedTuple, Optional
+
+PERIOD_FY = "FY"
+PERIOD_Q = "Q"
+
+_PERIOD_RX = re.compile(r"(?P<y>\d{4})(?:\s*[-/]?\s*Q(?P<q>[1-4]))?")
+_DATE_RX = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+class PeriodParts(NamedTuple):
+    fiscal_year: Optional[int]
+    fiscal_quarter: Optional[int]
+    period_type: Optional[str]  # FY / Q; None = not parsable
+    period_end: Optional[str]  # YYYY-MM-DD when the source reported it
+
+
+def parse_period(period: Any, period_end: Any = None) -> PeriodParts:
+    m = _PERIOD_RX.search(str(period or ""))
+    end = str(period_end or "")[:10]
+    end = end if _DATE_RX.match(end) else None
+    if not m:
+        return PeriodParts(None, None, None, end)
+    if m.group("q"):
+        return PeriodParts(int(m.group("y")), int(m.group("q")), PERIOD_Q, end)
+    return PeriodParts(int(m.group("y")), 4, PERIOD_FY, end)
+
+
+def period_key(period: Any) -> tuple:
+    """Sort key in series order: year, quarter, FY before a same-quarter Q row; unparsable periods last."""
+    year, quarter, ptype, _ = parse_period(period)
+    if year is None:
+        return (1, 0, 0, "", str(period))
+    return (0, year, quarter, ptype, str(period))
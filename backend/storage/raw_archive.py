@@ -0,0 +1,355 @@
+# backend/storage/raw_archive.py
+"""Compressed, content-addressed archive of raw EDINET filings.
+
+Downloaded zips (the "originals", backend/data/raw/edinet/{docID}.zip) are
+the hot tier. On archive, the filing's primary instance documents are
+extracted and stored once per content hash, compressed (zstd when the
+`zstandard` package is installed, zlib otherwise) and sharded by hash
+prefix:
+
+    <root>/blobs/ab/cd/abcd...ef.zst
+    <root>/hot/{docID}.zip          rebuilt, uncompressed (ZIP_STORED) zips
+    <root>/index.sqlite             docID -> members -> blobs, LRU bookkeeping
+
+Originals and rebuilt zips are LRU-evicted to a byte budget. resolve_zip()
+always returns a zip path, so every parser works unchanged; rebuilt zips
+store members uncompressed, so EdinetPackage reads them straight from the
+mmap without inflating.
+
+    arc = get_raw_archive()
+    arc.put("S100ABCD", zip_path)
+    path = arc.resolve_zip("S100ABCD")   # original if still hot, else rebuilt
+
+Env:
+    RAW_ARCHIVE_DIR        default backend/data/archive/edinet
+    RAW_ORIGINALS_MAX_MB   byte budget of archived originals (unset = keep all)
+    RAW_HOT_MAX_MB         byte budget of rebuilt zips (default 2048)
+"""
+from __future__ import annotations
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Union
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional dependency: fall back to zlib
+    _zstd = None
+
+from parsing.package import EdinetPackage
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).resolve().parents[1] / "data" / "archive" / "edinet"
+CHUNK_SIZE = 1 << 20
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+CODEC = "zstd" if _zstd is not None else "zlib"
+_EXT = {"zstd": ".zst", "zlib": ".zz"}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS blob ("
+    " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL,"
+    " codec TEXT NOT NULL, path TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS doc_member ("
+    " doc_id TEXT NOT NULL, name TEXT NOT NULL, sha256 TEXT NOT NULL, pos INTEGER NOT NULL,"
+    " PRIMARY KEY (doc_id, name)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS ix_doc_member_sha ON doc_member (sha256)",
+    # tier: 'original'（ダウンロードした zip）/ 'hot'（blob から再構成した zip）
+    "CREATE TABLE IF NOT EXISTS tier_file ("
+    " tier TEXT NOT NULL, doc_id TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL,"
+    " last_access REAL NOT NULL, PRIMARY KEY (tier, doc_id))",
+    "CREATE INDEX IF NOT EXISTS ix_tier_file_lru ON tier_file (tier, last_access)",
+)
+
+
+def _compressobj(level: int):
+    if _zstd is not None:
+        return _zstd.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(min(level, 9))
+
+
+class _ZlibReader(io.RawIOBase):
+    """Streaming zlib decompressor as a readable file."""
+
+    def __init__(self, fp: IO[bytes]):
+        self._fp = fp
+        self._d = zlib.decompressobj()
+        self._buf = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and not self._eof:
+            chunk = self._fp.read(CHUNK_SIZE)
+            if chunk:
+                self._buf = self._d.decompress(chunk)
+            else:
+                self._buf, self._eof = self._d.flush(), True
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self) -> None:
+        self._fp.close()
+        super().close()
+
+
+def open_blob(path: Union[str, Path]) -> IO[bytes]:
+    """Decompressing reader for a blob; the codec is detected from the frame magic."""
+    fp = open(path, "rb")
+    if fp.read(4) == ZSTD_MAGIC:
+        if _zstd is None:
+            fp.close()
+            raise RuntimeError(f"{path}: zstd blob but the zstandard package is not installed")
+        fp.seek(0)
+        return _zstd.ZstdDecompressor().stream_reader(fp, closefd=True)
+    fp.seek(0)
+    return io.BufferedReader(_ZlibReader(fp), CHUNK_SIZE)
+
+
+def primary_members(pkg: EdinetPackage) -> List[str]:
+    """Filing documents worth keeping: the non-audit XBRL instances, else the inline XBRL set."""
+    return pkg.filing_instances() or pkg.inline_instances()
+
+
+def _unlink(path: Union[str, Path]) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class RawArchive:
+    """Blob store + docID index + LRU tiers (originals / rebuilt zips)."""
+
+    def __init__(
+        self,
+        root: Union[str, Path] = DEFAULT_ARCHIVE_DIR,
+        originals_max_bytes: Optional[int] = None,
+        hot_max_bytes: Optional[int] = 2048 << 20,
+        level: int = 10,
+    ):
+        self.root = Path(root)
+        self.originals_max_bytes = originals_max_bytes
+        self.hot_max_bytes = hot_max_bytes
+        self.level = level
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            (self.root / "hot").mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.root / "index.sqlite"), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # --- blobs ------------------------------------------------------------
+    def _blob_path(self, sha: str, codec: str) -> Path:
+        return self.root / "blobs" / sha[:2] / sha[2:4] / f"{sha}{_EXT[codec]}"
+
+    def _store_blob(self, src: IO[bytes]) -> tuple:
+        """Compress a stream into the store (dedup by content hash). Returns (sha256, size)."""
+        tmp_dir = self.root / "blobs"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        h, size, comp = hashlib.sha256(), 0, _compressobj(self.level)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    size += len(chunk)
+                    out.write(comp.compress(chunk))
+                out.write(comp.flush())
+            sha = h.hexdigest()
+            with self._lock:
+                db = self._db()
+                if db.execute("SELECT 1 FROM blob WHERE sha256=?", (sha,)).fetchone():
+                    _unlink(tmp)
+                    return sha, size
+                dest = self._blob_path(sha, CODEC)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, dest)
+                with db:
+                    db.execute(
+                        "INSERT INTO blob (sha256, size, stored_size, codec, path) VALUES (?,?,?,?,?)",
+                        (sha, size, dest.stat().st_size, CODEC, str(dest.relative_to(self.root))),
+                    )
+            return sha, size
+        except BaseException:
+            _unlink(tmp)
+            raise
+
+    # --- documents ----------------------------------------------------------
+    def put(self, doc_id: str, zip_path: Union[str, Path]) -> List[str]:
+        """Archive the primary documents of a downloaded zip and track it as an original."""
+        zip_path = Path(zip_path)
+        with EdinetPackage(zip_path) as pkg:
+            names = primary_members(pkg)
+            shas = []
+            for name in names:
+                with pkg.open(name) as fp:
+                    shas.append(self._store_blob(fp)[0])
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM doc_member WHERE doc_id=?", (doc_id,))
+                db.executemany(
+                    "INSERT INTO doc_member (doc_id, name, sha256, pos) VALUES (?,?,?,?)",
+                    [(doc_id, n, s, i) for i, (n, s) in enumerate(zip(names, shas))],
+                )
+        self._track("original", doc_id, zip_path)
+        if self.originals_max_bytes is not None:
+            self.evict("original", self.originals_max_bytes, keep=doc_id)
+        return names
+
+    def has(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM doc_member WHERE doc_id=? LIMIT 1", (doc_id,)).fetchone() is not None
+
+    def members(self, doc_id: str) -> Dict[str, str]:
+        """{member name: sha256} of an archived filing, in archive order."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT name, sha256 FROM doc_member WHERE doc_id=? ORDER BY pos", (doc_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def open_member(self, doc_id: str, name: str) -> IO[bytes]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT b.path FROM doc_member m JOIN blob b ON b.sha256 = m.sha256 WHERE m.doc_id=? AND m.name=?",
+                (doc_id, name),
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"{doc_id}:{name} is not archived")
+        return open_blob(self.root / row[0])
+
+    # --- tiers --------------------------------------------------------------
+    def _track(self, tier: str, doc_id: str, path: Path) -> None:
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO tier_file (tier, doc_id, path, size, last_access) VALUES (?,?,?,?,?)",
+                    (tier, doc_id, str(path.resolve()), path.stat().st_size, time.time()),
+                )
+
+    def _tier_path(self, tier: str, doc_id: str) -> Optional[Path]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT path FROM tier_file WHERE tier=? AND doc_id=?", (tier, doc_id)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                with db:
+                    db.execute("DELETE FROM tier_file WHERE tier=? AND doc_id=?", (tier, doc_id))
+                return None
+            with db:
+                db.execute("UPDATE tier_file SET last_access=? WHERE tier=? AND doc_id=?", (time.time(), tier, doc_id))
+            return Path(row[0])
+
+    def evict(self, tier: str, max_bytes: int, keep: Optional[str] = None) -> int:
+        """Delete least-recently-used files of a tier until it fits max_bytes. Returns bytes freed.
+
+        Originals are only evicted once archived, so nothing becomes unrecoverable.
+        """
+        freed = 0
+        with self._lock:
+            db = self._db()
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM tier_file WHERE tier=?", (tier,)).fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            rows = db.execute(
+                "SELECT t.doc_id, t.path, t.size FROM tier_file t WHERE t.tier=?"
+                " AND t.doc_id != ? AND EXISTS (SELECT 1 FROM doc_member m WHERE m.doc_id = t.doc_id)"
+                " ORDER BY t.last_access",
+                (tier, keep or ""),
+            ).fetchall()
+            gone = []
+            for doc_id, path, size in rows:
+                if total <= max_bytes:
+                    break
+                _unlink(path)
+                _unlink(path + ".json")  # ingestion.zip_store の manifest
+                gone.append((tier, doc_id))
+                total -= size
+                freed += size
+            with db:
+                db.executemany("DELETE FROM tier_file WHERE tier=? AND doc_id=?", gone)
+        return freed
+
+    def _rebuild_zip(self, doc_id: str) -> Path:
+        members = self.members(doc_id)
+        if not members:
+            raise KeyError(f"{doc_id} is not archived")
+        dest = self.root / "hot" / f"{doc_id}.zip"
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out, zipfile.ZipFile(out, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for name in members:
+                    with self.open_member(doc_id, name) as src, zf.open(name, "w", force_zip64=True) as dst:
+                        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                            dst.write(chunk)
+            os.replace(tmp, dest)
+        except BaseException:
+            _unlink(tmp)
+            raise
+        self._track("hot", doc_id, dest)
+        if self.hot_max_bytes is not None:
+            self.evict("hot", self.hot_max_bytes, keep=doc_id)
+        return dest
+
+    def resolve_zip(self, doc_id: str) -> Optional[Path]:
+        """A zip path for the filing: the original if still present, else rebuilt from blobs; None if unknown."""
+        for tier in ("original", "hot"):
+            p = self._tier_path(tier, doc_id)
+            if p is not None:
+                return p
+        if not self.has(doc_id):
+            return None
+        return self._rebuild_zip(doc_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            n, raw, stored = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blob"
+            ).fetchone()
+            docs = db.execute("SELECT COUNT(DISTINCT doc_id) FROM doc_member").fetchone()[0]
+            tiers = {t: {"files": c, "bytes": b} for t, c, b in db.execute(
+                "SELECT tier, COUNT(*), COALESCE(SUM(size), 0) FROM tier_file GROUP BY tier")}
+        return {"codec": CODEC, "docs": docs, "blobs": n, "raw_bytes": raw, "stored_bytes": stored, "tiers": tiers}
+
+
+_DEFAULT: Optional[RawArchive] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def _env_mb(key: str, default: Optional[int]) -> Optional[int]:
+    val = os.getenv(key)
+    return default if not val else int(float(val) * (1 << 20))
+
+
+def get_raw_archive() -> RawArchive:
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = RawArchive(
+                os.getenv("RAW_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR,
+                originals_max_bytes=_env_mb("RAW_ORIGINALS_MAX_MB", None),
+                hot_max_bytes=_env_mb("RAW_HOT_MAX_MB", 2048 << 20),
+            )
+        return _DEFAULT
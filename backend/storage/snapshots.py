@@ -0,0 +1,173 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import String, and_, bindparam, cast, func, inspect, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+from .db import SessionLocal, engine
+from .facts import write_facts
+from .metric_values import refresh_metric_values
+from .models import FinancialPeriod, FinancialSnapshot
+from .periods import parse_period
+
+SnapshotRow = Dict[str, Any]  # company_id, period, source, pl, bs, cf (+ period_end)
+Key = Tuple[str, str, str]  # (company_id, period, source) = _uniq_company_period_source
+
+DEFAULT_CHUNK_SIZE = 500
+_KEY_COLS = ("company_id", "period", "source")
+_BLOB_COLS = ("pl", "bs", "cf")
+_PERIOD_COLS = ("fiscal_year", "fiscal_quarter", "period_type", "period_end")
+
+
+def _period_cols(row: SnapshotRow) -> Dict[str, Any]:
+    return parse_period(row.get("period"), row.get("period_end"))._asdict()
+
+
+def _dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's dialect (None = not supported)."""
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def _upsert_chunk(db: Session, insert, rows: Dict[Key, SnapshotRow], update: bool) -> Set[Key]:
+    """One executemany INSERT ... ON CONFLICT; returns the keys actually written (inserted or changed)."""
+    T = FinancialSnapshot.__table__
+    stmt = insert(T)
+    if update:
+        ex = stmt.excluded
+        # 内容が同じ行は書き換えない（RETURNING にも出ない -> skipped）。期末日は新たに分かった時だけ
+        changed = or_(
+            *(cast(T.c[c], String).is_distinct_from(cast(ex[c], String)) for c in _BLOB_COLS),
+            and_(ex.period_end.isnot(None), T.c.period_end.is_distinct_from(ex.period_end)),
+        )
+        set_ = {c: ex[c] for c in _BLOB_COLS + _PERIOD_COLS}
+        set_["period_end"] = func.coalesce(ex.period_end, T.c.period_end)
+        stmt = stmt.on_conflict_do_update(index_elements=list(_KEY_COLS), set_=set_, where=changed)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(_KEY_COLS))
+    params = [
+        {"company_id": k[0], "period": k[1], "source": k[2], **{c: r.get(c, {}) for c in _BLOB_COLS}, **_period_cols(r)}
+        for k, r in rows.items()
+    ]
+    return {tuple(row) for row in db.execute(stmt.returning(T.c.company_id, T.c.period, T.c.source), params)}
+
+
+def _upsert_orm(db: Session, rows: Dict[Key, SnapshotRow], update: bool, existing: Set[Key]) -> Set[Key]:
+    """Fallback for dialects without ON CONFLICT: row-by-row ORM merge."""
+    T = FinancialSnapshot
+    current = {
+        (s.company_id, s.period, s.source): s
+        for s in db.query(T).filter(tuple_(T.company_id, T.period, T.source).in_(list(existing)))
+    } if existing else {}
+    written: Set[Key] = set()
+    for k, r in rows.items():
+        cur = current.get(k)
+        blobs = tuple(r.get(c, {}) for c in _BLOB_COLS)
+        parsed = _period_cols(r)
+        if cur is None:
+            db.add(T(company_id=k[0], period=k[1], source=k[2], **dict(zip(_BLOB_COLS, blobs)), **parsed))
+            written.add(k)
+        elif update and ((cur.pl, cur.bs, cur.cf) != blobs or parsed["period_end"] not in (None, cur.period_end)):
+            cur.pl, cur.bs, cur.cf = blobs
+            cur.period_end = parsed["period_end"] or cur.period_end
+            written.add(k)
+    db.flush()
+    return written
+
+
+def upsert_snapshots(
+    rows: Iterable[SnapshotRow],
+    update: bool = True,
+    db: Optional[Session] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """Bulk insert or update FinancialSnapshot rows keyed by (company_id, period, source).
+
+    Uses the dialect's INSERT ... ON CONFLICT on _uniq_company_period_source
+    (SQLite / PostgreSQL), one executemany per `chunk_size` rows; other
+    dialects fall back to the ORM. update=False keeps existing rows untouched
+    (insert-only) and the first row for a key in `rows` wins; with update=True
+    the last one wins and rows whose pl/bs/cf did not change (and that bring
+    no new period_end) count as skipped. The parsed period columns
+    (storage.periods) are filled from `period` / `period_end`.
+    financial_fact and metric_value rows of written snapshots are rewritten in
+    the same transaction. Commits unless a caller-owned session is given.
+
+    Returns {"inserted": n, "updated": n, "skipped": n}.
+    """
+    dedup: Dict[Key, SnapshotRow] = {}
+    for r in rows:
+        k = (str(r["company_id"]), str(r.get("period") or ""), str(r["source"]))
+        if update or k not in dedup:
+            dedup[k] = r
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    if not dedup:
+        return counts
+
+    own = db is None
+    db = db or SessionLocal()
+    try:
+        insert = _dialect_insert(db)
+        keys = list(dedup)
+        T = FinancialSnapshot
+        chunk_size = max(1, chunk_size)
+        for i in range(0, len(keys), chunk_size):
+            chunk = {k: dedup[k] for k in keys[i:i + chunk_size]}
+            # 既存キーだけを索引で引く（insert / update の内訳用。blob は読まない）
+            existing = {tuple(k) for k in db.execute(
+                select(T.company_id, T.period, T.source).where(tuple_(T.company_id, T.period, T.source).in_(list(chunk)))
+            )}
+            if insert is not None:
+                written = _upsert_chunk(db, insert, chunk, update)
+            else:
+                written = _upsert_orm(db, chunk, update, existing)
+            counts["inserted"] += len(written - existing)
+            counts["updated"] += len(written & existing)
+            counts["skipped"] += len(chunk) - len(written)
+            write_facts(db, ({**chunk[k], "company_id": k[0], "period": k[1], "source": k[2]} for k in written))
+            refresh_metric_values(db, ((k[0], k[1]) for k in written))
+        if own:
+            db.commit()
+        return counts
+    except Exception:
+        if own:
+            db.rollback()
+        raise
+    finally:
+        if own:
+            db.close()
+
+
+def migrate_period_columns() -> Optional[Dict[str, int]]:
+    """Add and fill the parsed period columns on databases created before them (called by init_db)."""
+    counts = {"columns": 0, "periods": 0}
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for model, cols in ((FinancialSnapshot, _PERIOD_COLS), (FinancialPeriod, _PERIOD_COLS[:3])):
+            T = model.__table__
+            have = {c["name"] for c in insp.get_columns(T.name)}
+            for c in cols:
+                if c not in have:
+                    conn.exec_driver_sql(f"ALTER TABLE {T.name} ADD COLUMN {c} {T.c[c].type.compile(conn.dialect)}")
+                    counts["columns"] += 1
+            for ix in T.indexes:
+                ix.create(conn, checkfirst=True)
+            # 未解析の期間文字列ごとに 1 回の UPDATE（解析できない文字列は NULL のまま）
+            todo = [p for (p,) in conn.execute(select(T.c.period).where(T.c.period_type.is_(None)).distinct())]
+            params = [
+                {"p": p, **{"_" + c: v for c, v in zip(_PERIOD_COLS[:3], parse_period(p))}}
+                for p in todo
+            ]
+            params = [x for x in params if x["_period_type"] is not None]
+            if params:
+                conn.execute(
+                    update(T).where(T.c.period == bindparam("p"), T.c.period_type.is_(None))
+                    .values({c: bindparam("_" + c) for c in _PERIOD_COLS[:3]}),
+                    params,
+                )
+                counts["periods"] += len(params)
+    return counts if any(counts.values()) else None
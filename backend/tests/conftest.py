@@ -0,0 +1,39 @@
+# backend/tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+# アプリ本体は backend/ 直下をルートに import する（from ingestion.x import ...）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# テスト中の parse キャッシュはリポジトリ外の一時ディレクトリへ
+os.environ.setdefault("PARSE_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="parse_cache_"), "parse_cache.sqlite"))
+os.environ.setdefault("FILING_INDEX_PATH", os.path.join(tempfile.mkdtemp(prefix="filing_index_"), "edinet_index.sqlite"))
+# テスト用 DB も一時ディレクトリの SQLite（storage.db の import 前に設定）
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="db_"), "test.db"))
+
+
+# 複数のテストで使う最小の XBRL インスタンス（連結・当期、主要項目）
+SAMPLE_XBRL = b'''<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+            xmlns:jpdei_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jpdei/2013-08-31/jpdei_cor"
+            xmlns:jppfs_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2023-11-01/jppfs_cor">
+  <xbrli:context id="CurrentYearDuration">
+    <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+  </xbrli:context>
+  <jpdei_cor:DocumentPeriodEndDate contextRef="FilingDateInstant">2024-03-31</jpdei_cor:DocumentPeriodEndDate>
+  <jppfs_cor:NetSalesOfCompletedConstructionContracts contextRef="CurrentYearDuration">1</jppfs_cor:NetSalesOfCompletedConstructionContracts>
+  <jppfs_cor:NetSales contextRef="CurrentYearDuration" unitRef="JPY">1,000</jppfs_cor:NetSales>
+  <jppfs_cor:OperatingIncome contextRef="CurrentYearDuration" unitRef="JPY">120</jppfs_cor:OperatingIncome>
+  <jppfs_cor:ProfitLoss contextRef="CurrentYearDuration" unitRef="JPY">70</jppfs_cor:ProfitLoss>
+  <jppfs_cor:ProfitAttributableToOwnersOfParent contextRef="CurrentYearDuration" unitRef="JPY">80</jppfs_cor:ProfitAttributableToOwnersOfParent>
+  <jppfs_cor:Assets contextRef="CurrentYearInstant" unitRef="JPY">5000</jppfs_cor:Assets>
+  <jppfs_cor:NetCashProvidedByUsedInOperatingActivities contextRef="CurrentYearDuration" unitRef="JPY">-30</jppfs_cor:NetCashProvidedByUsedInOperatingActivities>
+</xbrli:xbrl>'''
+
+
+@pytest.fixture
+def sample_xbrl() -> bytes:
+    return SAMPLE_XBRL
@@ -0,0 +1,77 @@
+# backend/tests/test_async_db.py
+import asyncio
+import sys
+
+import pytest
+
+import storage.db as db_mod
+from storage.db import async_database_url
+
+
+@pytest.fixture
+def fresh_async(monkeypatch):
+    """get_async_sessionmaker() を未作成の状態から評価し、テスト後に元へ戻す。"""
+    monkeypatch.setattr(db_mod, "_async_sessionmaker", None)
+    return monkeypatch
+
+
+def test_async_database_url_maps_dialects_to_async_drivers():
+    assert async_database_url("sqlite:////tmp/app.db") == "sqlite+aiosqlite:////tmp/app.db"
+    assert async_database_url("sqlite+pysqlite:///:memory:") == "sqlite+aiosqlite:///:memory:"
+    assert async_database_url("postgresql://u:p@h:5432/db") == "postgresql+asyncpg://u:p@h:5432/db"
+    assert async_database_url("postgresql+psycopg2://u@h/db") == "postgresql+asyncpg://u@h/db"
+    assert async_database_url("postgres://u@h/db") == "postgresql+asyncpg://u@h/db"
+    assert async_database_url("mysql://u@h/db") is None
+    assert async_database_url("not a url") is None
+
+
+def test_async_database_url_override(fresh_async):
+    fresh_async.setattr(db_mod.settings, "ASYNC_DATABASE_URL", "postgresql+asyncpg://u@replica/db")
+    assert db_mod._async_url() == "postgresql+asyncpg://u@replica/db"
+    fresh_async.setattr(db_mod.settings, "ASYNC_DATABASE_URL", None)
+    assert db_mod._async_url() == async_database_url(db_mod.DATABASE_URL)
+
+
+def test_async_sessionmaker_is_none_when_disabled(fresh_async):
+    fresh_async.setattr(db_mod.settings, "DB_ASYNC", False)
+    assert db_mod.get_async_sessionmaker() is None
+    assert db_mod._async_sessionmaker is False  # 使えない結果もキャッシュする
+
+
+def test_async_sessionmaker_is_none_without_driver(fresh_async):
+    fresh_async.setattr(db_mod.settings, "DB_ASYNC", True)
+    fresh_async.setitem(sys.modules, "aiosqlite", None)  # import すると ImportError
+    assert db_mod.get_async_sessionmaker() is None
+
+    async def first():
+        async for session in db_mod.get_async_db():
+            return session
+    assert asyncio.run(first()) is None  # ハンドラは同期パスへ
+
+
+def test_search_companies_async_ranks_like_sync(fresh_async):
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("greenlet")
+    from services.company_service import search_companies, search_companies_async
+    from storage.db import SessionLocal, init_db
+    from storage.models import CompanyRef
+
+    init_db()
+    db = SessionLocal()
+    db.add_all([CompanyRef(company_id=c, name=n) for c, n in
+                (("A100", "Alpha Beta"), ("B100", "Beta Holdings"), ("C100", "Gamma Beta Co"), ("BETA", "Other"))])
+    db.commit()
+    db.close()
+    fresh_async.setattr(db_mod.settings, "DB_ASYNC", True)
+    maker = db_mod.get_async_sessionmaker()
+    assert maker is not None
+
+    async def go():
+        async with maker() as session:
+            out = [await search_companies_async(session, q, limit=3) for q in ("beta", "100", "", "zzz")]
+        await maker.kw["bind"].dispose()
+        return out
+
+    got = asyncio.run(go())
+    assert got == [search_companies(q, limit=3) for q in ("beta", "100", "", "zzz")]
+    assert [r["id"] for r in got[0]][:2] == ["BETA", "B100"]  # 完全一致 > 前方一致
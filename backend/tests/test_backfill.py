@@ -0,0 +1,66 @@
+# backend/tests/test_backfill.py
+import asyncio
+import zipfile
+import pytest
+from ingestion.backfill import Backfill, Checkpoint, Job
+
+
+class _FakeClient:
+    def __init__(self, root, xbrl):
+        self.root = root
+        self.xbrl = xbrl
+        self.downloads = []
+
+    async def download_zip(self, doc_id):
+        self.downloads.append(doc_id)
+        if doc_id == "S404":
+            raise RuntimeError("not found")
+        p = self.root / f"{doc_id}.zip"
+        with zipfile.ZipFile(p, "w") as zf:
+            zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", self.xbrl)
+        return p
+
+
+def _jobs():
+    return [Job(f"S{i:03d}", f"C{i % 3}") for i in range(9)] + [Job("S404", "C0")]
+
+
+def test_backfill_stores_batches_and_resumes(tmp_path, sample_xbrl):
+    client = _FakeClient(tmp_path, sample_xbrl)
+    batches = []
+
+    def writer(rows):
+        batches.append(rows)
+        return len(rows)
+
+    def run(writer):
+        bf = Backfill(client, Checkpoint(tmp_path / "cp.sqlite"), writer=writer, download_workers=3,
+                      parse_workers=2, queue_size=2, batch_size=4, report=lambda s: None)
+        return asyncio.run(bf.run(_jobs()))
+
+    summary = run(writer)
+    assert sum(len(b) for b in batches) == 9 and max(len(b) for b in batches) <= 4  # batch_size 単位で書く
+    assert {r["company_id"] for b in batches for r in b} == {"C0", "C1", "C2"}
+    assert batches[0][0]["period"] == "FY2024" and batches[0][0]["source"] == "edinet"
+    assert summary["inserted"] == 9
+    assert summary["stages"]["download"]["failed"] == 1
+    assert summary["checkpoint"] == {"stored": 9, "failed": 1}
+    assert Checkpoint(tmp_path / "cp.sqlite").statuses(["S001", "S404", "S999"]) == {
+        "S001": ("C1", "stored"), "S404": ("C0", "failed")}
+
+    # 再実行: チェックポイント済みは一切ダウンロードしない
+    n = len(client.downloads)
+    assert run(writer)["already_done"] == 10
+    assert len(client.downloads) == n
+
+
+def test_backfill_crash_does_not_advance_checkpoint(tmp_path, sample_xbrl):
+    client = _FakeClient(tmp_path, sample_xbrl)
+
+    def broken(rows):
+        raise OSError("db down")
+
+    bf = Backfill(client, Checkpoint(tmp_path / "cp.sqlite"), writer=broken, parse_workers=1, report=lambda s: None)
+    with pytest.raises(OSError):
+        asyncio.run(bf.run(_jobs()))
+    assert Checkpoint(tmp_path / "cp.sqlite").finished() == set()
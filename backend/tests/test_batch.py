@@ -0,0 +1,22 @@
+# backend/tests/test_batch.py
+import zipfile
+from parsing.batch import parse_many
+
+
+def test_parse_many_keeps_order_and_isolates_errors(tmp_path, sample_xbrl):
+    paths = []
+    for i in range(5):
+        p = tmp_path / f"S{i}.zip"
+        with zipfile.ZipFile(p, "w") as zf:
+            if i == 2:
+                zf.writestr("readme.txt", b"no instance")  # 壊れた提出物
+            else:
+                zf.writestr("XBRL/PublicDoc/doc.xbrl", sample_xbrl)
+        paths.append(p)
+
+    res = parse_many(paths, workers=2, engine="v2", chunksize=2)
+    assert [r.key for r in res.results] == [str(p) for p in paths]
+    assert [r.ok for r in res.results] == [True, True, False, True, True]
+    assert "ValueError" in res.results[2].error
+    assert res.results[0].data["PL"]["営業利益"] == 120.0
+    assert res.stats.total == 5 and res.stats.failed == 1 and res.stats.docs_per_sec > 0
@@ -0,0 +1,49 @@
+# backend/tests/test_benchmarks.py
+import json
+
+import benchmarks.run as bench
+from benchmarks.synthetic import Spec, _contexts, make_zip
+from parsing.edinet_parser_v2 import extract_fact_frame
+
+TINY = Spec(years=2, segments=1, facts=100, ix_files=1)
+
+
+def test_synthetic_zip_has_requested_facts_in_both_kinds():
+    assert len(_contexts(TINY)) == 2 * 2 * (2 + 1)  # 年度 × 期間種別 × (連結 / 個別 / セグメント)
+    xbrl, ixbrl = extract_fact_frame(make_zip(TINY, "xbrl")), extract_fact_frame(make_zip(TINY, "ixbrl"))
+    assert len(xbrl) == len(ixbrl) == TINY.facts
+    # iXBRL は scale / sign 付きで書き出す -> 同じ値に戻る
+    assert sorted(r["value"] for r in xbrl.rows()) == sorted(r["value"] for r in ixbrl.rows())
+    assert make_zip(TINY, "xbrl") == make_zip(TINY, "xbrl")  # 同じ Spec なら同じバイト列
+
+
+def _report(**cases):
+    return {"spec": {"label": TINY.label}, "python": "3", "machine": "x", "results": {
+        k: {"seconds_median": s, "peak_rss_mb": rss, "phases": {}, "facts_per_sec": None, "mb_per_sec": None}
+        for k, (s, rss) in cases.items()
+    }}
+
+
+def test_compare_flags_time_and_memory_regressions_beyond_tolerance():
+    base = _report(**{"v2_dom/xbrl": (1.0, 100.0), "v2_stream/xbrl": (0.001, 50.0), "xbrl_zip/xbrl": (0.5, 80.0)})
+    cur = _report(**{
+        "v2_dom/xbrl": (1.2, 100.0),        # +20% -> 遅延
+        "v2_stream/xbrl": (0.004, 50.0),    # 4 倍だが差が min_delta 未満 -> 無視
+        "xbrl_zip/xbrl": (0.55, 120.0),     # 時間は許容内、RSS +50%
+        "v2_bytes/xbrl": (9.0, 999.0),      # ベースラインにない -> 比較しない
+    })
+    problems = bench.compare(cur, base)
+    assert problems == ["v2_dom/xbrl: 1.000s -> 1.200s", "xbrl_zip/xbrl: peak RSS 80MB -> 120MB"]
+    assert bench.compare(cur, base, tolerance=0.6) == []
+
+
+def test_main_compare_exit_code(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(bench, "BASELINE_DIR", tmp_path)
+    (tmp_path / "base.json").write_text(json.dumps(_report(**{"v2_dom/xbrl": (1.0, 100.0)})))
+    monkeypatch.setattr(bench, "run", lambda spec, cases, kinds, repeat: _report(**{"v2_dom/xbrl": (1.05, 100.0)}))
+    assert bench.main(["--preset", "small", "--compare", "base"]) == 0
+
+    monkeypatch.setattr(bench, "run", lambda spec, cases, kinds, repeat: _report(**{"v2_dom/xbrl": (2.0, 100.0)}))
+    assert bench.main(["--preset", "small", "--compare", "base"]) == 1
+    out = capsys.readouterr().out
+    assert "REGRESSION v2_dom/xbrl: 1.000s -> 2.000s" in out and "warning: baseline spec" in out
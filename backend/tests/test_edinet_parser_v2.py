@@ -1,5 +1,5 @@
 # backend/tests/test_edinet_parser_v2.py
-from backend.parsing.edinet_parser_v2 import parse_financials_from_xbrl_bytes
+from parsing.edinet_parser_v2 import parse_financials_from_xbrl_bytes, _canon_from_label_or_tag, canon_cache_stats, ContextIndex, _parse_any_xbrl, extract_fact_frame, FactFrame
 
 def test_parse_ixbrl_minimal():
     # 最小限の iXBRL（コンテキスト1個＋主要4項目）
@@ -29,3 +29,214 @@ def test_parse_ixbrl_minimal():
     assert res["PL"]["営業利益"] == -567.0
     assert res["BS"]["総資産"] == 10000.0
     assert res["CF"]["営業CF"] == 900.0
+
+
+# 連結/個別・当期/前期の context を持つ通常 XBRL
+_XBRL = b'''<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance"
+            xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+            xmlns:jppfs_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2023-11-01/jppfs_cor">
+  <xbrli:context id="Prior1YearDuration">
+    <xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:startDate>2022-04-01</xbrli:startDate><xbrli:endDate>2023-03-31</xbrli:endDate></xbrli:period>
+  </xbrli:context>
+  <xbrli:context id="CurrentYearDuration">
+    <xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+  </xbrli:context>
+  <xbrli:context id="CurrentYearDuration_NonConsolidatedMember">
+    <xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier>
+      <xbrli:segment><xbrldi:explicitMember dimension="jppfs_cor:ConsolidatedOrNonConsolidatedAxis">jppfs_cor:NonConsolidatedMember</xbrldi:explicitMember></xbrli:segment>
+    </xbrli:entity>
+    <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+  </xbrli:context>
+  <xbrli:context id="CurrentYearInstant">
+    <xbrli:entity><xbrli:identifier scheme="http://disclosure.edinet-fsa.go.jp">E00001</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:instant>2024-03-31</xbrli:instant></xbrli:period>
+  </xbrli:context>
+  <jppfs_cor:NetSales contextRef="Prior1YearDuration" unitRef="JPY" decimals="-6">900</jppfs_cor:NetSales>
+  <jppfs_cor:NetSales contextRef="CurrentYearDuration_NonConsolidatedMember" unitRef="JPY" decimals="-6">500</jppfs_cor:NetSales>
+  <jppfs_cor:NetSales contextRef="CurrentYearDuration" unitRef="JPY" decimals="-6">1000</jppfs_cor:NetSales>
+  <jppfs_cor:Assets contextRef="CurrentYearInstant" unitRef="JPY" decimals="-6">5000</jppfs_cor:Assets>
+</xbrli:xbrl>'''
+
+
+def _zip(name: str, data: bytes) -> bytes:
+    import io, zipfile
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_parse_xbrl_prefers_latest_duration_context():
+    res = parse_financials_from_xbrl_bytes(_XBRL)
+    assert res["PL"]["売上高"] == 1000.0
+    assert res["BS"]["総資産"] == 5000.0
+
+
+def test_streaming_matches_dom():
+    z = _zip("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", _XBRL)
+    parse = parse_financials_from_xbrl_bytes.uncached  # キャッシュを経由せず両経路を比較
+    for payload in (_XBRL, z):
+        assert parse(payload, streaming=True) == parse(payload)
+
+
+def test_canon_resolver_exact_synonym_and_memo():
+    assert _canon_from_label_or_tag("jppfs_cor:NetCashProvidedByUsedInOperatingActivities") == "cfo"
+    assert _canon_from_label_or_tag("売上高（百万円）") == "revenue"
+    assert _canon_from_label_or_tag("Operating Profit") == "operating_income"
+    assert _canon_from_label_or_tag("－") is None  # 正規化後に空文字になる値はマッチさせない
+    before = canon_cache_stats()["hits"]
+    _canon_from_label_or_tag("売上高（百万円）")
+    assert canon_cache_stats()["hits"] == before + 1
+
+
+def test_context_index_dimensions_and_rank():
+    idx = ContextIndex.from_tree(_parse_any_xbrl(_XBRL))
+    nc = idx["CurrentYearDuration_NonConsolidatedMember"]
+    assert nc.dims == (("jppfs_cor:ConsolidatedOrNonConsolidatedAxis", "jppfs_cor:NonConsolidatedMember"),)
+    assert not nc.consolidated and nc.fy_offset == 0
+    assert idx["Prior1YearDuration"].fy_offset == -1
+    assert idx["CurrentYearInstant"].period_type == "instant"
+    # 同一期間なら次元なしの context を優先、未知の context は最下位
+    assert idx.rank_of("CurrentYearDuration") < idx.rank_of("CurrentYearDuration_NonConsolidatedMember")
+    assert idx.rank_of("Unknown") == len(idx) + 1
+
+
+def test_zip_file_uses_public_instance_not_audit_report(tmp_path):
+    import zipfile
+    from parsing.edinet_parser_v2 import parse_edinet_zip_file
+    from parsing.package import EdinetPackage
+    p = tmp_path / "S100TEST.zip"
+    with zipfile.ZipFile(p, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("XBRL/AuditDoc/jpaud-aar-cn-001_E00001.xbrl", b"<xbrli:xbrl xmlns:xbrli='http://www.xbrl.org/2003/instance'/>")
+        zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", _XBRL)
+    with EdinetPackage(p) as pkg:
+        assert pkg.primary_instance() == "XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl"
+    for streaming in (False, True):
+        assert parse_edinet_zip_file.uncached(str(p), streaming=streaming)["PL"]["売上高"] == 1000.0
+
+
+def test_fact_frame_extracts_all_numeric_facts(tmp_path):
+    ix = b'''<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <ix:nonFraction name="jppfs_cor:OrdinaryIncome" contextRef="C1" unitRef="JPY" scale="6" decimals="-6" sign="-">1,200</ix:nonFraction>
+      <ix:nonNumeric name="jpcrp_cor:CompanyName" contextRef="C1">Example Co., Ltd.</ix:nonNumeric>
+      <ix:nonFraction name="jppfs_cor:NetSales" contextRef="C1" unitRef="JPY" decimals="INF">10</ix:nonFraction>
+      <xbrli:context id="C1">
+        <xbrli:entity><xbrli:identifier scheme="http://example.com">E</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+      </xbrli:context>
+    </html>'''
+    ff = extract_fact_frame(ix)
+    assert len(ff) == 2  # nonNumeric は対象外
+    (oi,) = ff.rows("jppfs_cor:OrdinaryIncome")
+    assert oi["value"] == -1_200_000_000.0 and oi["scale"] == 6 and oi["decimals"] == -6
+    assert oi["period"] == "2023-04-01/2024-03-31" and oi["dims"] == ""
+
+    path = tmp_path / "facts.ffrm"
+    ff.save(str(path))
+    loaded = FactFrame.load(str(path))
+    assert list(loaded.rows()) == list(ff.rows())
+    assert next(loaded.rows("jppfs_cor:NetSales"))["decimals"] == "INF"
+    assert list(loaded.rows("jppfs_cor:Unknown")) == []
+
+
+def test_multi_file_ixbrl_is_merged(tmp_path):
+    import zipfile
+    from parsing.edinet_parser_v2 import parse_edinet_zip_file
+    head = b'<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:xbrli="http://www.xbrl.org/2003/instance"><body>'
+    ctx = (b'<ix:header><ix:resources><xbrli:context id="CurrentYearDuration"><xbrli:entity><xbrli:identifier scheme="x">E</xbrli:identifier></xbrli:entity>'
+           b'<xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period></xbrli:context>'
+           b'<xbrli:context id="CurrentYearInstant"><xbrli:entity><xbrli:identifier scheme="x">E</xbrli:identifier></xbrli:entity>'
+           b'<xbrli:period><xbrli:instant>2024-03-31</xbrli:instant></xbrli:period></xbrli:context></ix:resources></ix:header>')
+    tail = b'</body></html>'
+    p = tmp_path / "S100IX.zip"
+    with zipfile.ZipFile(p, "w") as zf:
+        zf.writestr("XBRL/PublicDoc/0000000_header_ixbrl.htm", head + ctx + tail)
+        zf.writestr("XBRL/PublicDoc/0104010_honbun_ixbrl.htm",
+                    head + b'<ix:nonFraction name="jppfs_cor:Assets" contextRef="CurrentYearInstant" unitRef="JPY">5000</ix:nonFraction>' + tail)
+        zf.writestr("XBRL/PublicDoc/0105020_honbun_ixbrl.htm",
+                    head + b'<ix:nonFraction name="jppfs_cor:NetSales" contextRef="CurrentYearDuration" unitRef="JPY">1,000</ix:nonFraction>' + tail)
+        zf.writestr("XBRL/AuditDoc/jpaud-aar-cn-001_ixbrl.htm",
+                    head + b'<ix:nonFraction name="jppfs_cor:NetSales" contextRef="CurrentYearDuration" unitRef="JPY">1</ix:nonFraction>' + tail)
+    for streaming in (False, True):
+        res = parse_edinet_zip_file.uncached(str(p), streaming=streaming)
+        assert res["PL"]["売上高"] == 1000.0
+        assert res["BS"]["総資産"] == 5000.0
+
+
+def test_ixbrl_sign_matches_xbrl_and_fact_frame():
+    from benchmarks.synthetic import Spec, make_zip
+    ix = b'''<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <xbrli:context id="C1">
+        <xbrli:entity><xbrli:identifier scheme="http://example.com">E</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+      </xbrli:context>
+      <ix:nonFraction name="jppfs_cor:NetCashProvidedByUsedInInvestingActivities" contextRef="C1" unitRef="JPY" scale="6" sign="-">35,129</ix:nonFraction>
+    </html>'''
+    parse = parse_financials_from_xbrl_bytes.uncached
+    for streaming in (False, True):
+        assert parse(ix, streaming=streaming)["CF"]["投資CF"] == -35_129_000_000.0
+    (row,) = extract_fact_frame(ix).rows()
+    assert row["value"] == -35_129_000_000.0
+
+    # 合成提出書類: 負の値は iXBRL では sign="-" + 絶対値 -> XBRL 版と同じ結果になる
+    spec = Spec(years=2, segments=2, facts=300, ix_files=3)
+    xbrl, ixbrl = make_zip(spec, "xbrl"), make_zip(spec, "ixbrl")
+    res = parse(xbrl)
+    assert any(v < 0 for sec in res.values() for v in sec.values())
+    for streaming in (False, True):
+        assert parse(ixbrl, streaming=streaming) == res
+
+
+def test_non_consolidated_scenario_context_is_not_preferred():
+    # EDINET 形式: 次元は scenario。個別の context・fact が文書上は先に出る
+    def ctx(cid, scenario=""):
+        sc = f"<xbrli:scenario>{scenario}</xbrli:scenario>" if scenario else ""
+        return (f'<xbrli:context id="{cid}"><xbrli:entity><xbrli:identifier scheme="s">E</xbrli:identifier></xbrli:entity>'
+                '<xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate>'
+                f"</xbrli:period>{sc}</xbrli:context>")
+    axis = '<xbrldi:explicitMember dimension="jppfs_cor:ConsolidatedOrNonConsolidatedAxis">jppfs_cor:{}</xbrldi:explicitMember>'
+    doc = ('<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:xbrldi="http://xbrl.org/2006/xbrldi" '
+           'xmlns:jppfs_cor="http://disclosure.edinet-fsa.go.jp/taxonomy/jppfs/2023-11-01/jppfs_cor">'
+           + ctx("CurrentYearDuration_NonConsolidatedMember", axis.format("NonConsolidatedMember"))
+           + ctx("CurrentYearDuration")
+           + '<jppfs_cor:NetSales contextRef="CurrentYearDuration_NonConsolidatedMember">500</jppfs_cor:NetSales>'
+           '<jppfs_cor:NetSales contextRef="CurrentYearDuration">1000</jppfs_cor:NetSales>'
+           "</xbrli:xbrl>").encode()
+    idx = ContextIndex.from_tree(_parse_any_xbrl(doc))
+    nc = idx["CurrentYearDuration_NonConsolidatedMember"]
+    assert nc.dims == (("jppfs_cor:ConsolidatedOrNonConsolidatedAxis", "jppfs_cor:NonConsolidatedMember"),)
+    assert not nc.consolidated
+    assert idx.rank_of("CurrentYearDuration") < idx.rank_of("CurrentYearDuration_NonConsolidatedMember")
+    for streaming in (False, True):
+        assert parse_financials_from_xbrl_bytes.uncached(doc, streaming=streaming)["PL"]["売上高"] == 1000.0
+
+    # 明示的な ConsolidatedMember は次元なしより優先
+    explicit = ContextIndex.from_tree(_parse_any_xbrl(doc.replace(b"NonConsolidatedMember</xbrldi", b"ConsolidatedMember</xbrldi")))
+    assert explicit["CurrentYearDuration_NonConsolidatedMember"].consolidated
+    assert explicit.rank_of("CurrentYearDuration_NonConsolidatedMember") == 0
+
+
+def test_fact_frame_falls_back_to_ixbrl_when_xbrl_is_broken(tmp_path):
+    import zipfile
+    broken = _XBRL.replace(b"</xbrli:xbrl>", b"<jppfs_cor:Assets contextRef=")  # 途中で切れた XBRL
+    ix = b'''<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <xbrli:context id="C1">
+        <xbrli:entity><xbrli:identifier scheme="http://example.com">E</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+      </xbrli:context>
+      <ix:nonFraction name="jppfs_cor:NetSales" contextRef="C1" unitRef="JPY">1,000</ix:nonFraction>
+    </html>'''
+    p = tmp_path / "S100BROKEN.zip"
+    with zipfile.ZipFile(p, "w") as zf:
+        zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", broken)
+        zf.writestr("XBRL/PublicDoc/0105020_honbun_ixbrl.htm", ix)
+    ff = extract_fact_frame(str(p))
+    # 壊れた XBRL の1パス目で登録された context・次元・concept は残らない
+    assert ff.contexts.values == ["C1"]
+    assert ff.dims.values == [""]
+    assert ff.concepts.values == ["jppfs_cor:NetSales"]
+    (row,) = ff.rows()
+    assert row["value"] == 1000.0 and row["period"] == "2023-04-01/2024-03-31"
@@ -0,0 +1,55 @@
+# backend/tests/test_facts.py
+import pytest
+
+from storage.db import SessionLocal, init_db
+from storage.facts import backfill_facts, load_facts, migrate_facts
+from storage.models import FinancialFact, FinancialSnapshot
+from storage.snapshots import upsert_snapshots
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _db():
+    init_db()
+
+
+def test_upsert_writes_facts_and_load_prefers_source_order():
+    upsert_snapshots([
+        {"company_id": "F1", "period": "FY2023", "source": "edinet",
+         "pl": {"NetSales": "1,000", "ResearchAndDevelopment": 7}, "bs": {"TotalAssets": 5000}, "cf": {}},
+        {"company_id": "F1", "period": "FY2023", "source": "jquants",
+         "pl": {"Revenue": 990, "NetIncome": 60}, "bs": {}, "cf": {}},
+    ])
+    db = SessionLocal()
+    try:
+        facts = load_facts(db, ["F1", "none"], ["Revenue", "NetIncome", "Assets", "ResearchAndDevelopment"])
+        assert facts["none"] == {}
+        assert facts["F1"] == {"FY2023": {"Revenue": 1000.0, "NetIncome": 60.0, "Assets": 5000.0, "ResearchAndDevelopment": 7.0}}
+        assert load_facts(db, ["F1"], ["Revenue"], sources=("jquants", "edinet"))["F1"]["FY2023"] == {"Revenue": 990.0}
+    finally:
+        db.close()
+
+    # 更新すると同じ snapshot の fact は置き換わる（消えた項目は残らない）
+    upsert_snapshots([{"company_id": "F1", "period": "FY2023", "source": "edinet", "pl": {"NetSales": 1100}, "bs": {}, "cf": {}}])
+    db = SessionLocal()
+    try:
+        facts = load_facts(db, ["F1"], ["Revenue", "Assets"], sources=("edinet",))["F1"]["FY2023"]
+        assert facts == {"Revenue": 1100.0}
+    finally:
+        db.close()
+
+
+def test_backfill_rebuilds_facts_from_existing_snapshots():
+    db = SessionLocal()
+    try:
+        # facts 導入前に書かれた snapshot（fact なし）
+        db.add(FinancialSnapshot(company_id="F2", period="FY2022", source="edinet", pl={"Sales": 50}, bs={}, cf={"cfo": 5}))
+        db.commit()
+        assert load_facts(db, ["F2"], ["Revenue"])["F2"] == {}
+        assert migrate_facts() is None  # fact が既にある DB では何もしない
+
+        counts = backfill_facts(batch_size=1, db=db)
+        assert counts["snapshots"] == db.query(FinancialSnapshot).count()
+        assert counts["facts"] == db.query(FinancialFact).count()
+        assert load_facts(db, ["F2"], ["Revenue", "OperatingCF"])["F2"] == {"FY2022": {"Revenue": 50.0, "OperatingCF": 5.0}}
+    finally:
+        db.close()
@@ -0,0 +1,41 @@
+# backend/tests/test_fake_api.py
+import asyncio
+import zipfile
+import httpx
+import pytest
+from tenacity import stop_after_attempt
+from benchmarks.fake_api import FakeApi, FakeApiConfig
+from ingestion.edinet_client import AsyncEdinetClient
+from ingestion.rate_limit import RateLimiter
+
+
+def test_client_pages_and_downloads_through_fake_api(tmp_path):
+    cfg = FakeApiConfig(filings_per_day=5, page_size=2, variants=1)
+    with FakeApi(cfg) as api:
+        async def go():
+            async with AsyncEdinetClient(api.edinet_base, data_dir=tmp_path, limiter=RateLimiter({})) as c:
+                recs = await c.list_filings_by_date("2024-06-03")
+                assert await c.list_filings_by_date("2024-06-01") == []  # 土曜は提出なし
+                return recs, await c.download_zip(recs[0]["docID"])
+
+        recs, path = asyncio.run(go())
+        assert [r["seqNumber"] for r in recs] == [1, 2, 3, 4, 5]  # 3 ページに分割
+        assert recs == api.filings("2024-06-03")  # 同じ seed なら同じ一覧
+        with zipfile.ZipFile(path) as zf:
+            assert any(n.endswith(".xbrl") for n in zf.namelist())
+        assert api.stats()["GET /api/v2/documents.json 200"] == 4
+
+
+def test_injected_429_throttles_client_limiter(tmp_path):
+    with FakeApi(FakeApiConfig(rate_429=1.0, retry_after=0.5)) as api:
+        lim = RateLimiter({})
+
+        async def go():
+            async with AsyncEdinetClient(api.edinet_base, limiter=lim) as c:
+                await c.get_documents_json.retry_with(stop=stop_after_attempt(1), reraise=True)(c, "2024-06-03")
+
+        with pytest.raises(httpx.HTTPStatusError, match="429"):
+            asyncio.run(go())
+        st = lim.stats()["127.0.0.1"]
+        assert st["throttled"] == 1 and st["paused_for"] > 0.3
+        assert api.stats() == {"GET /api/v2/documents.json 429": 1}
@@ -0,0 +1,63 @@
+# backend/tests/test_filing_index.py
+import asyncio
+import httpx
+from ingestion.edinet_client import AsyncEdinetClient, date_range
+from ingestion.filing_index import FilingIndex, refresh_days
+
+
+def _listing(day):
+    return [
+        {"docID": f"S{day}A", "edinetCode": "E00001", "docTypeCode": "120", "periodEnd": "2024-03-31"},
+        {"docID": f"S{day}B", "edinetCode": "E00002", "docTypeCode": "140", "periodEnd": "2024-06-30"},
+    ]
+
+
+def test_daily_listing_fetched_once_and_queried_locally(tmp_path):
+    calls = []
+
+    def handler(req):
+        day = req.url.params["date"]
+        calls.append(day)
+        assert "edinetCode" not in req.url.params  # 日次一覧は会社に依らず丸ごと取得
+        return httpx.Response(200, json={"results": _listing(day), "hasNextPage": False})
+
+    idx = FilingIndex(tmp_path / "idx.sqlite")
+    days = date_range("2024-06-01", "2024-06-03")
+
+    async def refresh():
+        async with AsyncEdinetClient(transport=httpx.MockTransport(handler)) as c:
+            return await refresh_days(idx, c, days, today="2024-06-03")
+
+    assert asyncio.run(refresh()) == days
+    assert asyncio.run(refresh()) == ["2024-06-03"]  # 過去日は再取得しない、当日のみ
+    assert sorted(calls) == sorted(days + ["2024-06-03"])
+
+    got = idx.query("E00001", "2024-06-01", "2024-06-03")
+    assert [r["docID"] for r in got] == ["S2024-06-01A", "S2024-06-02A", "S2024-06-03A"]
+    assert idx.query(None, "2024-06-02", "2024-06-02", doc_type_codes=["140"])[0]["edinetCode"] == "E00002"
+    assert len(idx.query(None, "2024-06-01", "2024-06-03", period_end_from="2024-06-01")) == 3
+    assert FilingIndex(tmp_path / "idx.sqlite").stats() == {"days": 3, "final_days": 2, "filings": 6}
+
+
+def test_refresh_days_stores_off_the_event_loop(tmp_path):
+    import threading
+
+    class Index(FilingIndex):
+        threads = set()
+
+        def store_day(self, day, records, today=None):
+            self.threads.add(threading.get_ident())
+            super().store_day(day, records, today=today)
+
+    class Client:
+        async def list_filings_by_date(self, day):
+            return _listing(day)
+
+    async def refresh():
+        return threading.get_ident(), await refresh_days(idx, Client(), ["2024-06-01", "2024-06-02"], today="2024-06-03")
+
+    idx = Index(tmp_path / "idx.sqlite")
+    loop_thread, done = asyncio.run(refresh())
+    assert done == ["2024-06-01", "2024-06-02"]
+    assert Index.threads and loop_thread not in Index.threads  # SQLite 書き込みはループを塞がない
+    assert idx.stats()["filings"] == 4
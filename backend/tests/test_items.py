@@ -0,0 +1,43 @@
+# backend/tests/test_items.py
+from storage.items import normalize_items
+
+
+def test_normalize_items_resolves_aliases_in_priority_order():
+    facts = normalize_items(
+        {"NetSales": "1,000", "Sales": 999, "Profit": None, "NetProfit": "n/a", "PAT": 40, "OrdinaryProfit": 70},
+        {"TotalAssets": 2000, "NetAssets": 600, "TotalEquity": 500},
+        {"cfo": -5, "Note": "text"},
+    )
+    assert facts["Revenue"] == ("pl", 1000.0)  # 先頭の別名を優先
+    assert facts["NetIncome"] == ("pl", 40.0)  # 値のない・数値でない別名は飛ばす
+    assert facts["Equity"] == ("bs", 500.0) and facts["Assets"] == ("bs", 2000.0)
+    assert facts["OperatingCF"] == ("cf", -5.0) and facts["OrdinaryIncome"] == ("pl", 70.0)
+    assert "Sales" not in facts and "Note" not in facts
+
+
+def test_normalize_items_keeps_unknown_numeric_keys():
+    facts = normalize_items({"Revenue": 10, "ResearchAndDevelopment": "3"}, None, {"Cash": 1})
+    assert facts == {"Revenue": ("pl", 10.0), "Cash": ("cf", 1.0), "ResearchAndDevelopment": ("pl", 3.0)}
+
+
+def test_normalize_items_maps_v2_parser_labels():
+    from parsing.edinet_parser_v2 import parse_financials_from_xbrl_bytes
+    tags = {
+        "NetSales": 1000, "OperatingIncome": 120, "ProfitAttributableToOwnersOfParent": 80, "Assets": 5000,
+        "Equity": 2000, "NetCashProvidedByUsedInOperatingActivities": 150,
+        "NetCashProvidedByUsedInInvestingActivities": -60, "NetCashProvidedByUsedInFinancingActivities": -30,
+    }
+    facts = "".join(f'<ix:nonFraction name="jppfs_cor:{t}" contextRef="C1">{v}</ix:nonFraction>' for t, v in tags.items())
+    ix = f'''<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL" xmlns:xbrli="http://www.xbrl.org/2003/instance">
+      <xbrli:context id="C1">
+        <xbrli:entity><xbrli:identifier scheme="http://example.com">E</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:startDate>2023-04-01</xbrli:startDate><xbrli:endDate>2024-03-31</xbrli:endDate></xbrli:period>
+      </xbrli:context>{facts}</html>'''.encode()
+    parsed = parse_financials_from_xbrl_bytes.uncached(ix)
+    assert parsed["PL"]["売上高"] == 1000.0  # v2 は日本語ラベルで返す
+
+    assert normalize_items(parsed["PL"], parsed["BS"], parsed["CF"]) == {
+        "Revenue": ("pl", 1000.0), "OperatingIncome": ("pl", 120.0), "NetIncome": ("pl", 80.0),
+        "Assets": ("bs", 5000.0), "Equity": ("bs", 2000.0),
+        "OperatingCF": ("cf", 150.0), "InvestingCF": ("cf", -60.0), "FinancingCF": ("cf", -30.0),
+    }
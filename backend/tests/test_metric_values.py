@@ -0,0 +1,90 @@
+# backend/tests/test_metric_values.py
+import pytest
+
+import storage.metric_values as mv
+from services.metrics_service import _live_series, calc_metrics
+from storage.db import SessionLocal, init_db
+from storage.facts import load_facts
+from storage.metric_values import _affected, load_metric_values, migrate_metric_values
+from storage.snapshots import upsert_snapshots
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _db():
+    init_db()
+
+
+def _ingest(company_id, revenues, source="edinet"):
+    upsert_snapshots([
+        {"company_id": company_id, "period": p, "source": source,
+         "pl": {"Revenue": r, "NetIncome": r / 10}, "bs": {"Equity": 500}, "cf": {}}
+        for p, r in revenues.items()
+    ])
+
+
+def _load(company_id, metrics, last=None):
+    db = SessionLocal()
+    try:
+        return load_metric_values(db, [company_id], metrics, last=last)[company_id]
+    finally:
+        db.close()
+
+
+def _facts(company_id):
+    db = SessionLocal()
+    try:
+        return load_facts(db, [company_id], ["NetIncome", "Revenue"])
+    finally:
+        db.close()
+
+
+def test_affected_extends_to_next_period_with_revenue():
+    by_period = {"FY2021": {"Revenue": 1}, "FY2022": {"Assets": 1}, "FY2023": {"Revenue": 2}, "FY2024": {"Revenue": 3}}
+    assert _affected(by_period, {"FY2021"}) == {"FY2021", "FY2022", "FY2023"}
+    assert _affected(by_period, {"FY2024"}) == {"FY2024"}
+
+
+def test_ingesting_a_period_recomputes_growth_of_the_next():
+    _ingest("M1", {"FY2022": 100, "FY2024": 150})
+    assert _load("M1", ["RevenueGrowth"]) == {"RevenueGrowth": {"FY2024": 0.5}}
+
+    _ingest("M1", {"FY2023": 120})  # 間の期を後から取り込む -> FY2024 の前期が変わる
+    growth = _load("M1", ["RevenueGrowth"])["RevenueGrowth"]
+    assert list(growth) == ["FY2023", "FY2024"]
+    assert growth["FY2023"] == pytest.approx(0.2) and growth["FY2024"] == pytest.approx(0.25)
+
+
+def test_metrics_version_bump_hides_stale_rows(monkeypatch):
+    _ingest("M2", {"FY2023": 200, "FY2024": 220})
+    assert _load("M2", ["ROE"])["ROE"] == {"FY2023": 0.04, "FY2024": 0.044}
+
+    monkeypatch.setattr(mv, "METRICS_VERSION", mv.METRICS_VERSION + 1)
+    assert _load("M2", ["ROE"]) == {}  # 旧バージョンの行は読まない
+    assert calc_metrics(["M2"], ["ROE"])["M2"]["ROE"] == {"FY2023": 0.04, "FY2024": 0.044}  # その間は facts から計算
+    assert migrate_metric_values() is not None  # init_db が旧バージョンの会社を再計算
+    assert _load("M2", ["ROE"])["ROE"] == {"FY2023": 0.04, "FY2024": 0.044}
+
+    monkeypatch.undo()
+    migrate_metric_values()  # 他のテスト用に現行バージョンへ戻す
+    assert _load("M2", ["ROE"])["ROE"] == {"FY2023": 0.04, "FY2024": 0.044}
+
+
+def test_stored_metrics_match_live_computation():
+    _ingest("M3", {"FY2024": 130, "FY2022": 100, "FY2023": 110})
+    _ingest("M3", {"FY2023": 115}, source="jquants")  # edinet が優先
+    metrics = ["Revenue", "RevenueGrowth", "NetMargin"]
+    live = _live_series(_facts("M3"), ["M3"], metrics, None)["M3"]
+    assert _load("M3", metrics) == live
+    assert calc_metrics(["M3"], metrics)["M3"] == live
+    assert live["Revenue"] == {"FY2022": 100.0, "FY2023": 110.0, "FY2024": 130.0}
+
+
+def test_load_metric_values_last_matches_live_series():
+    _ingest("M4", {"FY2024": 130, "2024-Q1": 30, "FY2022": 100, "FY2023": 110, "2025-Q1": 35})
+    metrics = ["Revenue", "RevenueGrowth", "NetMargin"]
+    facts = _facts("M4")
+    for last in (None, 1, 2, 3, 10):
+        live = _live_series(facts, ["M4"], metrics, last)["M4"]
+        assert _load("M4", metrics, last=last) == {m: vals for m, vals in live.items() if vals}
+        assert calc_metrics(["M4"], metrics, last=last)["M4"] == live
+    assert list(_load("M4", ["Revenue"], last=2)["Revenue"]) == ["FY2024", "2025-Q1"]  # 年度・四半期順の直近 2 期
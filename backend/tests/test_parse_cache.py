@@ -0,0 +1,32 @@
+# backend/tests/test_parse_cache.py
+from parsing.cache import ParseCache, cached_parse, sha256_of
+
+
+def test_parse_cache_roundtrip_and_version_key(tmp_path):
+    cache = ParseCache(tmp_path / "c.sqlite", lru_size=1)
+    key = (sha256_of(b"zip"), "xbrl_parser", "1")
+    assert cache.get(key) is None
+    cache.put(key, {"PL": {"Revenue": 1.0, "NetIncome": None}})
+    got = cache.get(key)
+    got["PL"]["Revenue"] = 2.0  # 返り値を書き換えてもキャッシュは汚れない
+    assert cache.get(key) == {"PL": {"Revenue": 1.0, "NetIncome": None}}
+    assert cache.get((key[0], "xbrl_parser", "2")) is None  # バージョンが変われば別エントリ
+    # LRU から追い出されても SQLite から読める
+    cache.put((sha256_of(b"other"), "xbrl_parser", "1"), {})
+    assert ParseCache(tmp_path / "c.sqlite").get(key) is not None
+    assert cache.stats()["hits"] == 2
+
+
+def test_cached_parse_calls_parser_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("PARSE_CACHE_PATH", str(tmp_path / "c.sqlite"))
+    import parsing.cache as c
+    monkeypatch.setattr(c, "_DEFAULT", None)
+    calls = []
+
+    @cached_parse("dummy", "1")
+    def parse(src: bytes):
+        calls.append(src)
+        return {"n": len(src)}
+
+    assert parse(b"abc") == parse(b"abc") == {"n": 3}
+    assert calls == [b"abc"]
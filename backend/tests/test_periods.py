@@ -0,0 +1,14 @@
+# backend/tests/test_periods.py
+from storage.periods import PeriodParts, parse_period, period_key
+
+
+def test_parse_period_full_year_and_quarters():
+    assert parse_period("FY2023", "2024-03-31T00:00:00") == PeriodParts(2023, 4, "FY", "2024-03-31")
+    assert parse_period("2024-Q3") == PeriodParts(2024, 3, "Q", None)
+    assert parse_period("2023/ Q1", "n/a") == PeriodParts(2023, 1, "Q", None)  # 日付でない期末は捨てる
+    assert parse_period("") == PeriodParts(None, None, None, None)
+
+
+def test_period_key_orders_years_then_quarters_with_unknowns_last():
+    periods = ["FY2023", "?", "2023-Q1", "FY2022", "2024-Q1", "2023-Q3"]
+    assert sorted(periods, key=period_key) == ["FY2022", "2023-Q1", "2023-Q3", "FY2023", "2024-Q1", "?"]
@@ -0,0 +1,47 @@
+# backend/tests/test_rate_limit.py
+import asyncio
+import time
+import httpx
+from ingestion.edinet_client import AsyncEdinetClient
+from ingestion.rate_limit import RateLimiter, TokenBucket, parse_retry_after
+
+
+def test_token_bucket_burst_then_rate():
+    b = TokenBucket(rate=100.0, burst=3)
+    waits = [b.reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert 0.005 < waits[3] < 0.015 and 0.015 < waits[4] < 0.025  # 以降は 1/rate 間隔
+
+
+def test_throttle_pauses_halves_and_recovers():
+    lim = RateLimiter({"api.example.com": (10.0, 10.0)})
+    url = "https://api.example.com/v1/x"
+    assert lim.feedback(url, 429, "2") is True
+    st = lim.stats()["api.example.com"]
+    assert st["rate"] == 5.0 and st["throttled"] == 1 and 1.9 < st["paused_for"] <= 2.0
+    assert lim.bucket(url).reserve() > 1.9  # Retry-After 明けまで待たされる
+    for _ in range(20):
+        lim.feedback(url, 200)
+    assert lim.stats()["api.example.com"]["rate"] == 10.0  # 予算まで徐々に回復
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+    assert parse_retry_after("soon") is None and parse_retry_after(None) is None
+
+
+def test_async_client_shares_host_budget():
+    lim = RateLimiter({"edinet.test": (50.0, 1.0)})
+
+    def handler(req):
+        return httpx.Response(200, json={"results": [], "hasNextPage": False})
+
+    async def go():
+        async with AsyncEdinetClient("https://edinet.test/api/v2", max_concurrency=8, limiter=lim,
+                                     transport=httpx.MockTransport(handler)) as c:
+            t0 = time.perf_counter()
+            await c.list_filings_range(None, "2024-01-01", "2024-01-06")
+            return time.perf_counter() - t0
+
+    assert asyncio.run(go()) >= 5 / 50 * 0.9  # 6 リクエスト / burst 1 / 50 req/s
+    assert lim.stats()["edinet.test"]["requests"] == 6
@@ -0,0 +1,46 @@
+# backend/tests/test_raw_archive.py
+import zipfile
+from parsing.xbrl_parser import parse_xbrl_zip
+from storage.raw_archive import RawArchive
+
+
+def _zip(path, xbrl, pad=b""):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", xbrl)
+        zf.writestr("XBRL/AuditDoc/jpaud-aar-cn-001_E00001.xbrl", b"<xbrl/>")
+        zf.writestr("PublicDoc/0101010_honbun.htm", b"<html>" + pad + b"</html>")
+    return path
+
+
+def test_archive_dedups_and_rebuilds_after_eviction(tmp_path, sample_xbrl):
+    arc = RawArchive(tmp_path / "arc", originals_max_bytes=0)
+    z1 = _zip(tmp_path / "S1.zip", sample_xbrl, pad=b"x" * 5000)
+    z2 = _zip(tmp_path / "S2.zip", sample_xbrl)  # 本体インスタンスは S1 と同一内容
+
+    assert arc.put("S1", z1) == ["XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl"]  # 監査報告書・htm は対象外
+    arc.put("S2", z2)
+    st = arc.stats()
+    assert st["docs"] == 2 and st["blobs"] == 1 and st["stored_bytes"] < st["raw_bytes"]
+    assert len(list((tmp_path / "arc" / "blobs").glob("*/*/*"))) == 1  # ハッシュ先頭でシャーディング
+
+    # 予算 0: 直近の 1 件を除き原本は退避される
+    assert not z1.exists() and z2.exists()
+    rebuilt = arc.resolve_zip("S1")
+    assert rebuilt != z1 and rebuilt.parent.name == "hot"
+    with zipfile.ZipFile(rebuilt) as zf:
+        assert [i.compress_type for i in zf.infolist()] == [zipfile.ZIP_STORED]
+    assert parse_xbrl_zip.uncached(rebuilt) == parse_xbrl_zip.uncached(z2)
+    assert arc.resolve_zip("S2") == z2.resolve()
+    assert arc.resolve_zip("S404") is None
+
+
+def test_hot_tier_lru_eviction(tmp_path, sample_xbrl):
+    arc = RawArchive(tmp_path / "arc", hot_max_bytes=1)
+    for d in ("A", "B"):
+        z = _zip(tmp_path / f"{d}.zip", sample_xbrl)
+        arc.put(d, z)
+        z.unlink()
+    a = arc.resolve_zip("A")
+    b = arc.resolve_zip("B")  # A は LRU 予算超過で退避、B は残る
+    assert b.exists() and not a.exists()
+    assert arc.resolve_zip("A").exists()  # 必要になれば再構成
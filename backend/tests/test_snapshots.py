@@ -0,0 +1,92 @@
+# backend/tests/test_snapshots.py
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import storage.snapshots as snapshots
+from storage.db import SessionLocal, init_db
+from storage.facts import load_facts
+from storage.models import FinancialSnapshot
+from storage.snapshots import migrate_period_columns, upsert_snapshots
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _db():
+    init_db()
+
+
+def _row(company_id, period, revenue, **extra):
+    return {"company_id": company_id, "period": period, "source": "edinet",
+            "pl": {"Revenue": revenue}, "bs": {}, "cf": {}, **extra}
+
+
+def _snap(company_id, period):
+    db = SessionLocal()
+    try:
+        return db.query(FinancialSnapshot).filter_by(company_id=company_id, period=period).one()
+    finally:
+        db.close()
+
+
+def test_upsert_inserts_skips_identical_and_updates_changed():
+    rows = [_row("U1", "FY2023", 100), _row("U1", "2024-Q1", 30, period_end="2023-06-30")]
+    assert upsert_snapshots(rows) == {"inserted": 2, "updated": 0, "skipped": 0}
+    s = _snap("U1", "2024-Q1")
+    assert (s.fiscal_year, s.fiscal_quarter, s.period_type, s.period_end) == (2024, 1, "Q", "2023-06-30")
+
+    # 同じ内容の再投入は is_distinct_from で弾かれる（期末日なしでも既存の期末日は消えない）
+    assert upsert_snapshots([_row("U1", "FY2023", 100), _row("U1", "2024-Q1", 30)]) == {
+        "inserted": 0, "updated": 0, "skipped": 2}
+    assert _snap("U1", "2024-Q1").period_end == "2023-06-30"
+
+    assert upsert_snapshots([_row("U1", "FY2023", 120), _row("U1", "FY2022", 90)]) == {
+        "inserted": 1, "updated": 1, "skipped": 0}
+    assert _snap("U1", "FY2023").pl == {"Revenue": 120}
+    db = SessionLocal()
+    try:
+        assert load_facts(db, ["U1"], ["Revenue"])["U1"]["FY2023"] == {"Revenue": 120.0}  # fact も同じトランザクションで更新
+    finally:
+        db.close()
+
+
+def test_upsert_update_false_keeps_existing_rows_and_first_duplicate():
+    upsert_snapshots([_row("U2", "FY2023", 100)])
+    counts = upsert_snapshots([_row("U2", "FY2023", 999), _row("U2", "FY2024", 1), _row("U2", "FY2024", 2)], update=False)
+    assert counts == {"inserted": 1, "updated": 0, "skipped": 1}
+    assert _snap("U2", "FY2023").pl == {"Revenue": 100}
+    assert _snap("U2", "FY2024").pl == {"Revenue": 1}  # 重複キーは先勝ち
+
+
+def test_upsert_orm_fallback_matches_on_conflict(monkeypatch):
+    monkeypatch.setattr(snapshots, "_dialect_insert", lambda db: None)
+    assert upsert_snapshots([_row("U3", "FY2023", 100), _row("U3", "FY2022", 80)], chunk_size=1) == {
+        "inserted": 2, "updated": 0, "skipped": 0}
+    assert upsert_snapshots([_row("U3", "FY2023", 100), _row("U3", "FY2022", 85, period_end="2022-03-31")]) == {
+        "inserted": 0, "updated": 1, "skipped": 1}
+    assert upsert_snapshots([_row("U3", "FY2023", 1)], update=False) == {"inserted": 0, "updated": 0, "skipped": 1}
+    s = _snap("U3", "FY2022")
+    assert s.pl == {"Revenue": 85} and (s.fiscal_year, s.period_type, s.period_end) == (2022, "FY", "2022-03-31")
+
+
+def test_migrate_period_columns_adds_and_fills_columns(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:  # 期間列を持たない旧スキーマ
+        conn.exec_driver_sql(
+            "CREATE TABLE financial_snapshot (id INTEGER PRIMARY KEY, company_id VARCHAR, period VARCHAR,"
+            " pl JSON, bs JSON, cf JSON, source VARCHAR)"
+        )
+        conn.exec_driver_sql("CREATE TABLE financial_period (id INTEGER PRIMARY KEY, period VARCHAR NOT NULL UNIQUE)")
+        conn.exec_driver_sql(
+            "INSERT INTO financial_snapshot (company_id, period, source) VALUES"
+            " ('C', 'FY2023', 'edinet'), ('C', '2024-Q2', 'jquants'), ('C', '???', 'edinet')"
+        )
+        conn.exec_driver_sql("INSERT INTO financial_period (period) VALUES ('FY2023')")
+    monkeypatch.setattr(snapshots, "engine", engine)
+
+    assert migrate_period_columns() == {"columns": 7, "periods": 3}
+    cols = {c["name"] for c in inspect(engine).get_columns("financial_snapshot")}
+    assert {"fiscal_year", "fiscal_quarter", "period_type", "period_end"} <= cols
+    assert "idx_financial_snapshot_company_fiscal" in {ix["name"] for ix in inspect(engine).get_indexes("financial_snapshot")}
+    with engine.connect() as conn:
+        got = conn.execute(text("SELECT period, fiscal_year, fiscal_quarter, period_type FROM financial_snapshot ORDER BY id")).all()
+    assert [tuple(r) for r in got] == [("FY2023", 2023, 4, "FY"), ("2024-Q2", 2024, 2, "Q"), ("???", None, None, None)]
+    assert migrate_period_columns() is None  # 2 回目は何もしない
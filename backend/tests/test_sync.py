@@ -0,0 +1,154 @@
+# backend/tests/test_sync.py
+import pytest
+import ingestion.jquants_downloader as jq
+import services.financial_service as fs
+import services.sync_service as sync
+from storage.db import SessionLocal, init_db
+from storage.models import CompanyRef, SyncState
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _db():
+    init_db()
+
+
+def _state(company_id, source):
+    db = SessionLocal()
+    try:
+        st = db.query(SyncState).filter_by(company_id=company_id, source=source).one()
+        return st.synced_through, set(st.doc_ids or [])
+    finally:
+        db.close()
+
+
+def test_sync_universe_replans_failed_document(monkeypatch):
+    db = SessionLocal()
+    db.query(CompanyRef).delete()
+    db.add(CompanyRef(company_id="S1", name="S1", edinet_code="E90001"))
+    db.commit()
+    db.close()
+    plans = []
+
+    async def fake_sync(plan, today, retry_failed, **pipeline):
+        p = plans.append({c: (v["start"], set(v["seen"])) for c, v in plan.items()}) or plan["S1"]
+        if len(plans) == 1:  # 1 回目: 06-04 の書類がダウンロード失敗
+            return {"D1": ("S1", "stored", "2024-06-03"), "D2": ("S1", "failed", "2024-06-04"),
+                    "D3": ("S1", "stored", "2024-06-05")}
+        assert p["start"] <= "2024-06-04" and "D2" not in p["seen"]  # 失敗した書類は再び計画に入る
+        return {"D2": ("S1", "stored" if retry_failed else "failed", "2024-06-04")}
+
+    monkeypatch.setattr(sync, "_sync_edinet", fake_sync)
+    sync.sync_universe(today="2024-06-10", jquants=False)
+    assert _state("S1", "edinet") == ("2024-06-03", {"D1", "D3"})  # 失敗日の前日で止まる
+
+    sync.sync_universe(today="2024-06-11", jquants=False)  # 再試行なし: 止まったまま
+    assert _state("S1", "edinet")[0] == "2024-06-03"
+
+    sync.sync_universe(today="2024-06-12", jquants=False, retry_failed=True)
+    assert plans[-1]["S1"][0] == "2024-06-04"
+    assert _state("S1", "edinet") == ("2024-06-11", {"D1", "D2", "D3"})
+
+
+def test_get_financials_holds_edinet_watermark_and_fetches_jquants_delta(monkeypatch):
+    db = SessionLocal()
+    db.add(CompanyRef(company_id="S2", name="S2", edinet_code="E90002"))
+    db.commit()
+    db.close()
+    jq_calls, ed_calls = [], []
+
+    def fake_statements(company_id, period="fy", since=None, until=None):
+        jq_calls.append((since, until))
+        return []
+
+    def fake_edinet(code, start_date, end_date, known_doc_ids=None, failed=None):
+        ed_calls.append(start_date)
+        if len(ed_calls) == 1:
+            failed.append(("D9", "2024-06-05"))
+        return []
+
+    monkeypatch.setattr(fs, "get_statements", fake_statements)
+    monkeypatch.setattr(fs, "get_latest_financials_from_edinet_by_code", fake_edinet)
+    fs.get_financials("S2", today="2024-06-10")
+    assert _state("S2", "edinet")[0] == "2024-06-04" and _state("S2", "jquants")[0] == "2024-06-09"
+    fs.get_financials("S2", today="2024-06-12")
+    assert ed_calls[-1] == "2024-06-05"  # 失敗日から再取得
+    assert jq_calls == [("2023-01-01", "2024-06-10"), ("2024-06-10", "2024-06-12")]  # watermark 以降の開示だけ
+    assert _state("S2", "edinet")[0] == "2024-06-11"
+
+
+def _st(code, disclosed, kind="FY"):
+    return {"LocalCode": code, "DisclosedDate": disclosed, "TypeOfCurrentPeriod": kind,
+            "CurrentFiscalYearEndDate": "2024-03-31", "CurrentPeriodEndDate": "2024-03-31", "NetSales": "100"}
+
+
+def test_get_statements_since_uses_date_requests_for_short_ranges(monkeypatch):
+    calls = []
+
+    def fake_iter(params):
+        calls.append(params)
+        if "date" in params:
+            return iter([_st("72030", params["date"]), _st("67580", params["date"])])
+        return iter([_st("72030", "2024-05-01"), _st("72030", "2024-06-11")])
+
+    monkeypatch.setattr(jq, "_fetch_id_token", lambda: "tok")
+    monkeypatch.setattr(jq, "iter_statements", fake_iter)
+    rows = jq.get_statements("7203", since="2024-06-10", until="2024-06-11")
+    assert calls == [{"date": "2024-06-10"}, {"date": "2024-06-11"}]
+    assert [r["period"] for r in rows] == ["FY2024"]  # 他銘柄 67580 は除外
+
+    calls.clear()
+    rows = jq.get_statements("7203", since="2024-06-01", until="2024-06-30")  # 長い期間は銘柄指定 1 回
+    assert calls == [{"code": "7203"}]
+    assert len(rows) == 1
+
+
+def test_get_statements_incremental_raises_instead_of_demo_or_empty(monkeypatch):
+    monkeypatch.setattr(jq, "_fetch_id_token", lambda: None)
+    assert jq.get_statements("7203")[0]["period"] == "FY2023"  # 全件取得は従来どおりデモデータ
+    with pytest.raises(RuntimeError):
+        jq.get_statements("7203", since="2024-06-01", until="2024-06-10")
+
+    def broken(params):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(jq, "_fetch_id_token", lambda: "tok")
+    monkeypatch.setattr(jq, "iter_statements", broken)
+    assert jq.get_statements("7203") == []
+    with pytest.raises(ConnectionError):
+        jq.get_statements("7203", since="2024-06-01", until="2024-06-10")
+
+
+def test_get_financials_without_jquants_credentials_keeps_watermark(monkeypatch):
+    from storage.models import FinancialSnapshot
+
+    monkeypatch.setattr(jq, "_fetch_id_token", lambda: None)
+    fs.get_financials("S3", today="2024-06-10")
+    assert _state("S3", "jquants") == (None, set())
+    db = SessionLocal()
+    try:
+        assert db.query(FinancialSnapshot).filter_by(company_id="S3").count() == 0  # デモデータは保存しない
+    finally:
+        db.close()
+
+
+def test_sync_universe_skips_jquants_sweep_without_credentials(monkeypatch):
+    db = SessionLocal()
+    db.query(CompanyRef).delete()
+    db.add(CompanyRef(company_id="S4", name="S4"))
+    db.commit()
+    db.close()
+    swept = []
+    monkeypatch.setattr(sync, "has_credentials", lambda: False)
+    monkeypatch.setattr(sync, "sweep_jquants_statements", lambda start, end: swept.append((start, end)))
+    out = sync.sync_universe(today="2024-06-10", edinet=False)
+    assert out["status"] == "ok" and out["jquants"] is None and swept == []
+    db = SessionLocal()
+    try:
+        assert db.query(SyncState).filter_by(company_id="S4", source="jquants").count() == 0
+    finally:
+        db.close()
+
+    monkeypatch.setattr(sync, "has_credentials", lambda: True)
+    sync.sync_universe(today="2024-06-10", edinet=False)
+    assert swept == [("2023-01-01", "2024-06-10")]
+    assert _state("S4", "jquants")[0] == "2024-06-09"
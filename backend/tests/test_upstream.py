@@ -0,0 +1,75 @@
+# backend/tests/test_upstream.py
+import asyncio
+import time
+import httpx
+import pytest
+from benchmarks.fake_api import FakeApi, FakeApiConfig
+from tenacity import stop_after_attempt
+from ingestion.edinet_client import AsyncEdinetClient, run_sync
+from ingestion.rate_limit import RateLimiter
+from ingestion.upstream import (
+    CircuitBreaker, CircuitBreakers, CircuitOpenError, DeadlineExceeded, deadline, remaining, timeout,
+)
+
+
+def test_breaker_opens_then_probes_once():
+    b = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    b.on_failure()
+    b.allow()
+    b.on_failure()
+    with pytest.raises(CircuitOpenError):
+        b.allow()
+    time.sleep(0.12)
+    b.allow()  # half-open: 試行 1 本
+    with pytest.raises(CircuitOpenError):
+        b.allow()
+    b.on_failure()  # 試行失敗で再び open
+    assert b.stats()["state"] == "open" and b.stats()["opened"] == 2
+    time.sleep(0.12)
+    b.allow()
+    b.on_success()
+    assert b.state == "closed" and b.stats()["rejected"] == 2
+
+
+def test_deadline_nests_and_caps_timeouts():
+    assert remaining() is None and timeout(60) == 60
+    with deadline(5):
+        with deadline(60):
+            assert timeout(60) <= 5  # 内側でも外側の期限が効く
+        with deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                timeout(60)
+    assert remaining() is None
+
+
+def test_slow_upstream_respects_deadline_and_opens_circuit():
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=60)
+
+    async def go(base):
+        async with AsyncEdinetClient(base, limiter=RateLimiter({}), breakers=breakers) as c:
+            with deadline(0.2), pytest.raises(DeadlineExceeded):
+                await c.get_documents_json("2024-06-03")  # 60 s のソケットタイムアウトを待たない
+            # 自分の期限切れはホストの障害として数えない
+            assert breakers.stats()["127.0.0.1"]["state"] == "closed"
+            c.timeout = 0.2  # 期限内のソケットタイムアウトは障害 -> 1 回で open
+            with deadline(10), pytest.raises(httpx.TimeoutException):
+                await c.get_documents_json.retry_with(stop=stop_after_attempt(1), reraise=True)(c, "2024-06-03")
+            with pytest.raises(CircuitOpenError):
+                await c.get_documents_json("2024-06-03")
+
+    with FakeApi(FakeApiConfig(latency_ms=3000)) as api:
+        t0 = time.perf_counter()
+        asyncio.run(go(api.edinet_base))
+        assert time.perf_counter() - t0 < 1.5
+        assert len(api.stats()) == 0  # どれも応答前に打ち切り
+
+
+def test_run_sync_carries_deadline_into_thread():
+    async def left():
+        return remaining()
+
+    async def inside_loop():
+        return run_sync(left())  # 実行中ループからはスレッド経由
+
+    with deadline(5):
+        assert 0 < asyncio.run(inside_loop()) <= 5
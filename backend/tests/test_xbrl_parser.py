@@ -0,0 +1,46 @@
+# backend/tests/test_xbrl_parser.py
+import io
+import zipfile
+from parsing.xbrl_parser import parse_xbrl_zip, _scan_member
+
+
+def test_parse_xbrl_zip_single_pass(tmp_path, sample_xbrl):
+    p = tmp_path / "S100TEST.zip"
+    with zipfile.ZipFile(p, "w") as zf:
+        zf.writestr("XBRL/PublicDoc/jpcrp030000-asr-001_E00001.xbrl", sample_xbrl)
+    res = parse_xbrl_zip(p)
+    assert res["period"] == "FY2024"
+    assert res["PL"]["Revenue"] == 1000.0  # local-name は完全一致（NetSalesOf... は対象外）
+    assert res["PL"]["OperatingIncome"] == 120.0
+    assert res["PL"]["NetIncome"] == 80.0  # 同義語の優先順位を文書順より優先
+    assert res["BS"]["Assets"] == 5000.0
+    assert res["CF"]["OperatingCF"] == -30.0
+    assert res["BS"]["Liabilities"] is None
+
+
+def test_scan_member_chunked_matches_whole(sample_xbrl):
+    whole = _scan_member(sample_xbrl)
+    chunked = _scan_member(io.BytesIO(sample_xbrl), chunk_size=7)
+    assert chunked.best == whole.best
+    assert chunked.period() == whole.period() == "FY2024"
+
+
+def test_scan_member_tag_case_and_exact_local_name():
+    xml = (
+        b'<xbrli:xbrl><jppfs_cor:NetSalesOfCompletedConstructionContracts contextRef="c">7'
+        b"</jppfs_cor:NetSalesOfCompletedConstructionContracts>"
+        b'<JPPFS_COR:operatingincome contextRef="c">120</JPPFS_COR:operatingincome></xbrli:xbrl>'
+    )
+    sc = _scan_member(xml)
+    assert ("PL", "OperatingIncome") in sc.best  # 旧実装と同じく大文字小文字は区別しない
+    assert ("PL", "Revenue") not in sc.best  # 前方一致はしない（NetSales != NetSalesOf...）
+
+
+def test_scan_member_numbers_without_separators():
+    xml = (
+        b'<jppfs_cor:Assets contextRef="c">5000</jppfs_cor:Assets>'
+        b'<jppfs_cor:Liabilities contextRef="c">1,234,567</jppfs_cor:Liabilities>'
+    )
+    best = _scan_member(xml).best
+    assert best[("BS", "Assets")][1] == 5000.0  # 旧実装は "500" で止まっていた
+    assert best[("BS", "Liabilities")][1] == 1234567.0
@@ -0,0 +1,68 @@
+# backend/tests/test_zip_store.py
+import asyncio
+import io
+import zipfile
+import httpx
+import pytest
+from ingestion.edinet_client import AsyncEdinetClient
+from ingestion.zip_store import CorruptZipError, ZipWriter, cached_zip, manifest_path, read_manifest
+
+
+def _zip_bytes():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("XBRL/PublicDoc/a.xbrl", b"<xbrl/>" * 1000)
+    return buf.getvalue()
+
+
+def test_zip_writer_commits_only_valid_zips(tmp_path):
+    data = _zip_bytes()
+    dest = tmp_path / "S1.zip"
+    with ZipWriter(dest, source="test") as w:
+        for i in range(0, len(data), 100):
+            w.write(data[i:i + 100])
+        w.commit()
+    assert dest.read_bytes() == data
+    assert read_manifest(dest)["size"] == len(data)
+
+    with pytest.raises(CorruptZipError):
+        with ZipWriter(tmp_path / "S2.zip") as w:
+            w.write(b'{"metadata": {"status": "404"}}')  # EDINET のエラー JSON
+            w.commit()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["S1.zip", "S1.zip.json"]  # 一時ファイルも残らない
+
+
+def test_cached_zip_drops_truncated_and_adopts_legacy(tmp_path):
+    data = _zip_bytes()
+    dest = tmp_path / "S1.zip"
+    with ZipWriter(dest) as w:
+        w.write(data)
+        w.commit()
+    assert cached_zip(dest) == dest
+    dest.write_bytes(data[:-10])  # 途中で切れたファイル
+    assert cached_zip(dest) is None
+    assert not dest.exists() and not manifest_path(dest).exists()
+
+    legacy = tmp_path / "S2.zip"
+    legacy.write_bytes(data)  # マニフェストのない旧キャッシュ
+    assert cached_zip(legacy) == legacy and read_manifest(legacy)["source"] == "adopted"
+
+
+def test_async_download_refetches_corrupt_cache(tmp_path):
+    data = _zip_bytes()
+    calls = []
+
+    def handler(req):
+        calls.append(req.url.path)
+        return httpx.Response(200, content=data)
+
+    (tmp_path / "S3.zip").write_bytes(data[:50])  # 壊れた旧キャッシュ
+
+    async def go():
+        async with AsyncEdinetClient(data_dir=tmp_path, transport=httpx.MockTransport(handler)) as c:
+            p = await c.download_zip("S3")
+            await c.download_zip("S3")  # 2 回目はキャッシュ
+            return p
+
+    p = asyncio.run(go())
+    assert p.read_bytes() == data and len(calls) == 1